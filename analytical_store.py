@@ -0,0 +1,295 @@
+"""로컬 분석 저장소 (SQLite, 필터/그룹 집계를 SQL 쿼리로 처리하는 선택 기능)"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from analytics import (CUBE_DIMENSIONS, CUBE_MEASURES, FILE1_FILTER_COLUMNS, FILE2_FILTER_COLUMNS,
+                       AggregationPlan)
+from data_loader import CACHE_MAX_ENTRIES
+from product_search import PRODUCT_SEARCH_JAMO, normalize_name
+from table_export import CSV_CHUNK_ROWS, to_display_frame
+
+# 저장소 파일 경로 (환경 변수 DASHBOARD_STORE, 비어 있으면 저장소를 사용하지 않음)
+STORE_PATH = os.environ.get('DASHBOARD_STORE', '').strip()
+
+# 파일별 테이블 이름 접두어와 적재 컬럼 (필터/집계 컬럼과 상세 테이블 표시 컬럼)
+SALES_TABLE = 'sales'
+CONTRACTS_TABLE = 'contracts'
+SALES_TABLE_COLUMNS = CUBE_DIMENSIONS + CUBE_MEASURES
+CONTRACTS_TABLE_COLUMNS = list(FILE2_FILTER_COLUMNS) + ['제품계층구조2', '비용구분'] + CUBE_MEASURES
+
+# 적재 목록 테이블의 컬럼 (이전 형식의 저장소는 비우고 다시 적재)
+_DATASETS_COLUMNS = ['table_name', 'name', 'dataset_key', 'loaded_at', 'dropped_rows']
+
+
+def _quote(name):
+    """SQL 식별자 인용"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _sql_value(value):
+    """numpy 스칼라를 sqlite/json이 받는 파이썬 값으로 변환"""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _where(selection):
+    """{컬럼: 선택값 목록} → WHERE 절과 파라미터 (차원 내 OR, 차원 간 AND, 선택값은 JSON 배열 하나로 전달)"""
+    clauses, params = [], []
+    for col, values in (selection or {}).items():
+        values = [_sql_value(value) for value in values]
+        if not values:
+            clauses.append('0')
+            continue
+        clauses.append(f"{_quote(col)} IN (SELECT value FROM json_each(?))")
+        params.append(json.dumps(values, ensure_ascii=False))
+    return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+
+def _order_by(sort_keys, reverse=False):
+    """[(컬럼, 오름차순 여부)] → ORDER BY 절 (SortIndex와 같은 순서: 결측값은 맨 뒤, 동순위는 원래 행 순서, reverse면 전체 역순)"""
+    terms = []
+    for col, ascending in sort_keys:
+        terms.append(f"{_quote(col)} IS NULL {'DESC' if reverse else 'ASC'}")
+        terms.append(f"{_quote(col)} {'ASC' if ascending != reverse else 'DESC'}")
+    terms.append(f"rowid {'DESC' if reverse else 'ASC'}")
+    return ' ORDER BY ' + ', '.join(terms)
+
+
+class StoreTable:
+    """저장소에 적재된 파일 하나 (테이블 이름에 묶인 조회 핸들)"""
+
+    def __init__(self, store, table, dropped_rows=0):
+        self.store = store
+        self.table = table
+        self.dropped_rows = dropped_rows
+
+    def count(self, selection):
+        """selection 조건에 맞는 행 수"""
+        where, params = _where(selection)
+        return int(self.store.query(f"SELECT COUNT(*) AS n FROM {_quote(self.table)}{where}", params)['n'].iloc[0])
+
+    def aggregate(self, selection, keys, measures, dropna=True):
+        """selection 조건의 keys별 measures 합계 (groupby(as_index=False).sum()과 같은 형태, 키 순 정렬)"""
+        keys, measures = list(keys), list(measures)
+        columns = [_quote(key) for key in keys] + [f"TOTAL({_quote(m)}) AS {_quote(m)}" for m in measures]
+        where, params = _where(selection)
+        sql = f"SELECT {', '.join(columns)} FROM {_quote(self.table)}{where}"
+        if keys:
+            key_list = ', '.join(_quote(key) for key in keys)
+            sql += f" GROUP BY {key_list} ORDER BY {key_list}"
+        result = self.store.query(sql, params)
+        return result.dropna(subset=keys).reset_index(drop=True) if keys and dropna else result
+
+    def distinct(self, column, selection=None):
+        """selection 조건 행에 있는 column 값 목록 (결측 제외, 값 순 정렬: 사이드바 옵션용)"""
+        where, params = _where(selection)
+        not_null = f"{_quote(column)} IS NOT NULL"
+        where = f"{where} AND {not_null}" if where else f" WHERE {not_null}"
+        sql = f"SELECT DISTINCT {_quote(column)} AS value FROM {_quote(self.table)}{where} ORDER BY value"
+        return self.store.query(sql, params)['value'].tolist()
+
+    def search(self, column, query, jamo=PRODUCT_SEARCH_JAMO):
+        """column 값 중 query를 포함하는 값 목록 (ProductSearchIndex와 같은 정규화/순서: 앞쪽 일치 → 값 순)"""
+        query = normalize_name(query, jamo)
+        if not query:
+            return []
+        position = "instr(normalize_name(value, ?), ?)"
+        sql = (
+            f"SELECT value FROM (SELECT DISTINCT {_quote(column)} AS value FROM {_quote(self.table)} "
+            f"WHERE {_quote(column)} IS NOT NULL) WHERE {position} > 0 ORDER BY {position}, value"
+        )
+        return self.store.query(sql, [jamo, query, jamo, query])['value'].tolist()
+
+    def rows(self, selection, columns, sort_keys, reverse=False, limit=None, offset=0):
+        """selection 조건 행의 columns를 sort_keys 순서로 offset부터 limit행 반환 (limit=None이면 끝까지)"""
+        sql, params = self._rows_query(selection, columns, sort_keys, reverse)
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [int(limit), int(offset)]
+        return self.store.query(sql, params)
+
+    def iter_rows(self, selection, columns, sort_keys, reverse=False, chunk_rows=CSV_CHUNK_ROWS):
+        """rows와 같은 순서의 전체 행을 chunk_rows행씩 DataFrame 조각으로 생성 (쿼리 한 번을 나눠 읽음)"""
+        sql, params = self._rows_query(selection, columns, sort_keys, reverse)
+        return self.store.iter_query(sql, params, chunk_rows)
+
+    def _rows_query(self, selection, columns, sort_keys, reverse):
+        """행 조회 SQL과 파라미터"""
+        where, params = _where(selection)
+        column_list = ', '.join(_quote(col) for col in columns)
+        return f"SELECT {column_list} FROM {_quote(self.table)}{where}{_order_by(sort_keys, reverse)}", params
+
+
+class StoreAggregationPlan(AggregationPlan):
+    """AggregationPlan과 같은 인터페이스로, 가장 세분화된 그룹만 저장소에서 집계하고 나머지는 롤업"""
+
+    def __init__(self, store_table, selection, groupings, measures=CUBE_MEASURES):
+        self.measures = list(measures)
+        self._store_table = store_table
+        self._selection = selection
+        self.empty = store_table.count(selection) == 0
+        self._build(groupings)
+
+    def _aggregate_source(self, keys):
+        """결측 키도 유지해 롤업 시 누락 방지 (get에서 제외)"""
+        return self._store_table.aggregate(self._selection, keys, self.measures, dropna=False)
+
+
+class StoreRows:
+    """저장소 테이블에서 selection 조건 행을 정렬/페이지 단위로 조회 (FrameRows와 같은 인터페이스: 상세 테이블, CSV 내보내기)"""
+
+    def __init__(self, store_table, selection, sort_keys, display_columns):
+        self._store_table = store_table
+        self._selection = selection
+        self._sort_keys = sort_keys
+        self.sort_names = list(sort_keys)
+        self.display_columns = display_columns
+        # '월' 표시 컬럼은 월_숫자에서 만듦
+        self._columns = ['월_숫자' if col == '월' else col for col in display_columns]
+        self._count = store_table.count(selection)
+
+    def __len__(self):
+        return self._count
+
+    def page(self, sort_name, reverse, start, size):
+        """정렬 기준(sort_name) 순서의 start번째부터 size행을 표시용 프레임으로 반환"""
+        frame = self._store_table.rows(self._selection, self._columns, self._sort_keys[sort_name], reverse, size, start)
+        return to_display_frame(frame, self.display_columns)
+
+    def csv_chunks(self, sort_name, reverse):
+        """정렬 기준(sort_name) 순서의 전체 행을 CSV 문자열 조각으로 생성 (첫 조각에만 헤더 포함)"""
+        first = True
+        for frame in self._store_table.iter_rows(self._selection, self._columns, self._sort_keys[sort_name], reverse):
+            yield to_display_frame(frame, self.display_columns).to_csv(index=False, header=first)
+            first = False
+        if first:
+            yield pd.DataFrame(columns=self.display_columns).to_csv(index=False)
+
+
+class AnalyticalStore:
+    """정리된 파일 데이터를 SQLite 테이블로 보관 (세션 간 공유, 연결 하나를 잠금으로 직렬화)"""
+
+    def __init__(self, path, max_tables=CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_tables = max_tables
+        self._lock = threading.Lock()
+        self._loading = {}
+        self._conn = self._connect()
+        # WAL: CSV 내보내기가 별도 연결로 읽는 동안에도 다른 파일을 적재할 수 있음
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(datasets)")]
+        if columns and columns != _DATASETS_COLUMNS:
+            self._drop_all_tables()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS datasets ("
+            "table_name TEXT PRIMARY KEY, name TEXT, dataset_key TEXT, loaded_at REAL, dropped_rows INTEGER)"
+        )
+        self._conn.commit()
+
+    def _connect(self):
+        """저장소 연결 (제품명 검색용 normalize_name 함수 등록)"""
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.create_function('normalize_name', 2, normalize_name, deterministic=True)
+        return conn
+
+    def query(self, sql, params=()):
+        """SQL 조회 결과를 DataFrame으로 반환"""
+        with self._lock:
+            return pd.read_sql_query(sql, self._conn, params=params)
+
+    def iter_query(self, sql, params=(), chunk_rows=CSV_CHUNK_ROWS):
+        """SQL 조회 결과를 chunk_rows행씩 DataFrame 조각으로 생성 (별도 연결로 읽어 다른 세션의 조회를 막지 않음)"""
+        conn = self._connect()
+        try:
+            yield from pd.read_sql_query(sql, conn, params=params, chunksize=chunk_rows)
+        finally:
+            conn.close()
+
+    def table(self, name, dataset_key):
+        """파일(dataset_key)이 이미 적재되어 있으면 조회 핸들, 없으면 None"""
+        table = self._table_name(name, dataset_key)
+        with self._lock:
+            loaded = self._conn.execute("SELECT dropped_rows FROM datasets WHERE table_name = ?", (table,)).fetchone()
+        return StoreTable(self, table, loaded[0]) if loaded is not None else None
+
+    def load_table(self, name, dataset_key, build, columns, index_columns=()):
+        """파일(dataset_key)별 테이블 조회 핸들 반환 (적재되지 않았으면 build()가 만든 (프레임, 제외 행 수)의 columns를 적재)
+
+        같은 파일을 여러 세션이 동시에 요청하면 한 번만 읽어 적재하고 나머지는 기다림, 프레임은 적재 후 버림
+        """
+        table = self._table_name(name, dataset_key)
+        with self._lock:
+            loading = self._loading.setdefault(table, threading.Lock())
+        with loading:
+            try:
+                loaded = self.table(name, dataset_key)
+                if loaded is not None:
+                    return loaded
+                df, dropped_rows = build()
+                with self._lock:
+                    self._write_table(table, df[list(columns)], index_columns)
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO datasets VALUES (?, ?, ?, julianday('now'), ?)",
+                        (table, name, dataset_key, int(dropped_rows))
+                    )
+                    self._drop_old_tables(name)
+                    self._conn.commit()
+                return StoreTable(self, table, int(dropped_rows))
+            finally:
+                with self._lock:
+                    self._loading.pop(table, None)
+
+    @staticmethod
+    def _table_name(name, dataset_key):
+        """종류(name)와 파일 캐시 키로 정한 테이블 이름"""
+        digest = hashlib.blake2b(dataset_key.encode(), digest_size=8).hexdigest()
+        return f"{name}_{digest}"
+
+    def _write_table(self, table, frame, index_columns):
+        """범주형 컬럼은 값(문자열)으로 풀어서 테이블 생성 (행 순서 = rowid), 필터 컬럼마다 인덱스 생성"""
+        categorical = [col for col in frame.columns if isinstance(frame[col].dtype, pd.CategoricalDtype)]
+        frame = frame.astype({col: object for col in categorical})
+        frame.to_sql(table, self._conn, if_exists='replace', index=False, chunksize=50_000)
+        for col in index_columns:
+            index_name = _quote(f"{table}_{col}")
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {_quote(table)} ({_quote(col)})")
+
+    def _drop_old_tables(self, name):
+        """같은 종류(name)의 테이블은 최근 max_tables개만 유지"""
+        if self.max_tables is None:
+            return
+        stale = self._conn.execute(
+            "SELECT table_name FROM datasets WHERE name = ? ORDER BY loaded_at DESC LIMIT -1 OFFSET ?",
+            (name, self.max_tables)
+        ).fetchall()
+        for (table,) in stale:
+            self._conn.execute(f"DROP TABLE IF EXISTS {_quote(table)}")
+            self._conn.execute("DELETE FROM datasets WHERE table_name = ?", (table,))
+
+    def _drop_all_tables(self):
+        """이전 형식의 저장소: 적재된 테이블과 목록을 모두 지움 (파일을 다시 읽을 때 새 형식으로 적재)"""
+        for (table,) in self._conn.execute("SELECT table_name FROM datasets").fetchall():
+            self._conn.execute(f"DROP TABLE IF EXISTS {_quote(table)}")
+        self._conn.execute("DROP TABLE datasets")
+
+
+def load_sales_table(store, dataset_key, build):
+    """파일1 테이블 반환 (적재되지 않았으면 build()가 만든 정리된 프레임을 적재, 필터 컬럼별 인덱스 포함)"""
+    return store.load_table(SALES_TABLE, dataset_key, build, SALES_TABLE_COLUMNS, FILE1_FILTER_COLUMNS)
+
+
+def load_contracts_table(store, dataset_key, build):
+    """파일2 테이블 반환 (적재되지 않았으면 build()가 만든 정리된 프레임을 적재, 필터 컬럼별 인덱스 포함)"""
+    return store.load_table(CONTRACTS_TABLE, dataset_key, build, CONTRACTS_TABLE_COLUMNS, FILE2_FILTER_COLUMNS)
+
+
+@st.cache_resource(show_spinner=False)
+def get_analytical_store():
+    """프로세스 전체에서 공유하는 분석 저장소 (DASHBOARD_STORE 미설정 시 None)"""
+    return AnalyticalStore(STORE_PATH) if STORE_PATH else None
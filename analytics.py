@@ -0,0 +1,252 @@
+"""대시보드 집계/필터 유틸리티 (사전 집계 큐브, 행 번호 인덱스 필터/정렬, 집계 계획, 비율 계산)"""
+import numpy as np
+import pandas as pd
+
+from dataset_cache import derive_dataset
+
+# 파일1 큐브의 차원과 측정값
+CUBE_DIMENSIONS = ['연도', '월_숫자', '영업채널', '제품계층구조1', '제품계층구조2', '제품명']
+CUBE_MEASURES = ['총렌탈(건)', '렌탈(건)', '재렌탈(건)']
+
+# 파일1 섹션별로 필요한 그룹 키 (집계 계획에서 그룹별로 한 번만 계산)
+FILE1_SECTION_GROUPINGS = {
+    'kpi': [(), ('영업채널',)],                             # 합계, 홈케어 비중
+    'monthly': [('월_숫자', '영업채널'), ('월_숫자',)],      # 월별 채널 실적, 렌탈 유형
+    'channel': [('영업채널',), ('월_숫자', '영업채널')],     # 채널 비중, 채널별 성장 추세
+    'product': [('제품계층구조1',), ('제품명',), ()],        # 제품계층구조1, Top 10 제품
+    'rental_type': [('영업채널',)],                         # 채널별 렌탈 유형
+    'detail': [()],                                         # 요약 합계
+}
+
+# 사이드바/구분 필터 대상 차원
+FILE1_FILTER_COLUMNS = ('연도', '월_숫자', '영업채널', '제품계층구조1')
+FILE2_FILTER_COLUMNS = ('연도', '월_숫자', '제품계층구조1', '제품명', '리스구분', '약정기간')
+
+# 상세 데이터 테이블 표시 컬럼과 기본 정렬 (월 오름차순, 총렌탈 내림차순)
+DETAIL_COLUMNS_F1 = ['연도', '월', '영업채널', '제품계층구조1', '제품계층구조2',
+                     '제품명', '총렌탈(건)', '렌탈(건)', '재렌탈(건)']
+DETAIL_COLUMNS_F2 = ['연도', '월', '제품계층구조1', '제품계층구조2', '제품명',
+                     '약정기간', '리스구분', '비용구분', '총렌탈(건)', '렌탈(건)', '재렌탈(건)']
+DEFAULT_SORT = '기본 (월 ↑, 총렌탈 ↓)'
+
+# 차트별 최대 계열 수 (초과하는 계열은 '기타' 하나로 합산, None이면 제한 없음)
+CHART_TOP_K = {
+    'monthly_channel': 10,
+    'channel_share': 10,
+    'channel_growth': 10,
+    'product1': 10,
+    'rental_type': 10,
+    'cross': 10,
+}
+OTHER_LABEL = '기타'
+
+
+def build_sales_cube(df):
+    """파일1 원본 행을 차원 조합별 렌탈 건수 합계로 사전 집계"""
+    return df.groupby(CUBE_DIMENSIONS, as_index=False, observed=True, dropna=False)[CUBE_MEASURES].sum()
+
+
+def get_sales_cube(cache_key, df):
+    """로드된 파일(cache_key)마다 한 번만 큐브를 생성해 모든 세션이 공유"""
+    return derive_dataset(cache_key, 'cube', lambda: build_sales_cube(df))
+
+
+def safe_divide(numerator, denominator, fill_value=0.0):
+    """분모가 0인 곳은 fill_value로 채우는 벡터화 나눗셈 (Series/DataFrame, 스칼라 분모 지원)"""
+    if np.isscalar(denominator):
+        return numerator / denominator if denominator != 0 else numerator * 0 + fill_value
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = numerator / denominator
+    return result.where(denominator != 0, fill_value)
+
+
+def percent(numerator, denominator, decimals=1):
+    """백분율 (분모 0이면 0, decimals가 None이면 반올림하지 않음)"""
+    result = safe_divide(numerator, denominator) * 100
+    return result if decimals is None else np.round(result, decimals)
+
+
+def percent_of_total(values, decimals=1):
+    """전체 합계 대비 백분율"""
+    return percent(values, values.sum(), decimals)
+
+
+def share_within_group(df, value_col, group_cols, decimals=1):
+    """그룹 합계 대비 백분율 (그룹 합계를 merge하지 않고 transform으로 계산)"""
+    group_totals = df.groupby(group_cols, observed=True)[value_col].transform('sum')
+    return percent(df[value_col], group_totals, decimals)
+
+
+def limit_top_k(df, series_col, measures, k, group_cols=(), other_label=OTHER_LABEL):
+    """measures[0] 합계 상위 k개 계열만 남기고 나머지는 group_cols별로 other_label 한 계열로 합산
+
+    결과는 (group_cols, series_col)마다 한 행 (원래 other_label 값이 있으면 합산 계열에 포함)
+    """
+    measures = list(measures)
+    series_totals = df.groupby(series_col, observed=True)[measures[0]].sum()
+    if k is None or len(series_totals) <= k:
+        return df
+
+    group_cols = list(group_cols)
+    columns = group_cols + [series_col] + measures
+    is_top = df[series_col].isin(series_totals.nlargest(k).index)
+    top = df.loc[is_top, columns]
+    if group_cols:
+        other = df[~is_top].groupby(group_cols, as_index=False, observed=True)[measures].sum()
+    else:
+        other = df.loc[~is_top, measures].sum().to_frame().T
+    other[series_col] = other_label
+    # 범주형 계열 컬럼에는 '기타'를 넣을 수 없으므로 문자열로 합침
+    top = top.assign(**{series_col: top[series_col].astype(str)})
+    combined = pd.concat([top, other[columns]], ignore_index=True)
+    # 원래 데이터에 있는 '기타' 값이 상위 k개에 들면 합산 계열과 이름이 같으므로 한 계열로 다시 합산
+    return combined.groupby(group_cols + [series_col], as_index=False, sort=False)[measures].sum()
+
+
+class AggregationPlan:
+    """섹션별 그룹 키를 모아 그룹마다 한 번만 집계 (상위 그룹은 더 세분화된 결과에서 롤업)"""
+
+    def __init__(self, df, groupings, measures=CUBE_MEASURES):
+        self.measures = list(measures)
+        self.empty = df.empty
+        self._df = df
+        self._build(groupings)
+
+    def _build(self, groupings):
+        """키가 많은(세분화된) 그룹부터 계산해 상위 그룹의 롤업 원본으로 사용"""
+        self._results = {}
+        for keys in sorted(set(map(tuple, groupings)), key=len, reverse=True):
+            finer = [result for computed, result in self._results.items() if set(keys) < set(computed)]
+            if finer:
+                self._results[keys] = self._aggregate(min(finer, key=len), keys)
+            else:
+                self._results[keys] = self._aggregate_source(keys)
+
+    def _aggregate_source(self, keys):
+        """롤업할 세분화된 결과가 없는 그룹은 원본 프레임에서 집계"""
+        return self._aggregate(self._df, keys)
+
+    def _aggregate(self, source, keys):
+        """source를 keys로 그룹화한 측정값 합계 (결측 키도 유지해 롤업 시 누락 방지)"""
+        if not keys:
+            return source[self.measures].sum().to_frame().T
+        return source.groupby(list(keys), as_index=False, observed=True, dropna=False)[self.measures].sum()
+
+    def get(self, keys, measures=None):
+        """keys별 집계 결과 복사본 반환 (groupby(as_index=False).sum()과 동일한 형태)"""
+        keys = tuple(keys)
+        result = self._results[keys]
+        if keys:
+            result = result.dropna(subset=list(keys))
+        columns = list(keys) + (list(measures) if measures is not None else self.measures)
+        return result[columns].reset_index(drop=True)
+
+    def totals(self):
+        """전체 측정값 합계 (Series)"""
+        return self._results[()].iloc[0]
+
+
+class FilterIndex:
+    """차원별 값 → 행 번호 목록을 미리 계산해 두고, 필터 선택을 행 번호 배열로 반환"""
+
+    def __init__(self, df, columns):
+        self.n_rows = len(df)
+        self._dims = {}
+        for col in columns:
+            series = df[col]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                codes = series.cat.codes.to_numpy()
+                values = series.cat.categories
+            else:
+                codes, uniques = pd.factorize(series)
+                values = pd.Index(uniques)
+            # 값(코드)별 행 번호를 연속 구간으로 모아둔 목록 (결측값 코드 -1은 맨 앞)
+            order = np.argsort(codes, kind='stable')
+            offsets = np.searchsorted(codes[order], np.arange(len(values) + 1))
+            self._dims[col] = (codes, values, order, offsets)
+
+    def query(self, selections):
+        """{컬럼: 선택값 목록}을 만족하는 행 번호 배열 반환 (차원 내 OR, 차원 간 AND)"""
+        constraints = []
+        for col, selected in selections.items():
+            codes, values, order, offsets = self._dims[col]
+            selected_codes = values.get_indexer(list(selected))
+            selected_codes = np.unique(selected_codes[selected_codes >= 0])
+            # 모든 값이 선택되고 결측값도 없으면 조건 없음
+            if len(selected_codes) == len(values) and offsets[0] == 0:
+                continue
+            n_matches = (offsets[selected_codes + 1] - offsets[selected_codes]).sum()
+            constraints.append((n_matches, col, selected_codes))
+
+        if not constraints:
+            return np.arange(self.n_rows)
+
+        # 가장 선택적인 차원의 행 목록에서 시작해 나머지 차원은 코드 조회로 거름
+        constraints.sort(key=lambda item: item[0])
+        _, col, selected_codes = constraints[0]
+        codes, values, order, offsets = self._dims[col]
+        rows = np.sort(np.concatenate(
+            [order[offsets[code]:offsets[code + 1]] for code in selected_codes] or [np.empty(0, dtype=np.intp)]
+        ))
+        for _, col, selected_codes in constraints[1:]:
+            codes, values = self._dims[col][:2]
+            # 마지막 칸은 결측값 코드(-1) 자리
+            lookup = np.zeros(len(values) + 1, dtype=bool)
+            lookup[selected_codes] = True
+            rows = rows[lookup[codes[rows]]]
+        return rows
+
+
+def get_filter_index(cache_key, name, df, columns):
+    """로드된 파일(cache_key)과 대상 프레임(name)마다 한 번만 필터 인덱스를 생성해 모든 세션이 공유"""
+    return derive_dataset(cache_key, f"filter_index:{name}", lambda: FilterIndex(df, columns))
+
+
+def detail_sort_keys(display_columns):
+    """상세 테이블 정렬 기준: 기본 정렬 + 표시 컬럼별 오름차순 ('월'은 월_숫자 기준)"""
+    sort_keys = {DEFAULT_SORT: [('월_숫자', True), ('총렌탈(건)', False)]}
+    for col in display_columns:
+        sort_keys[col] = [('월_숫자' if col == '월' else col, True)]
+    return sort_keys
+
+
+def _sort_rank(series, ascending):
+    """정렬용 정수 순위 (결측값은 방향과 관계없이 맨 뒤)"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy().astype(np.int64)
+        n_values = len(series.cat.categories)
+    else:
+        codes, uniques = pd.factorize(series, sort=True)
+        n_values = len(uniques)
+    missing = codes < 0
+    if not ascending:
+        codes = n_values - 1 - codes
+    codes[missing] = n_values
+    return codes
+
+
+class SortIndex:
+    """정렬 기준별 전체 행 순서를 미리 계산해 두고, 필터링된 행을 다시 정렬하지 않고 순서대로 반환"""
+
+    def __init__(self, df, sort_keys):
+        self.n_rows = len(df)
+        self.names = list(sort_keys)
+        self._orders = {}
+        for name, keys in sort_keys.items():
+            ranks = [_sort_rank(df[col], ascending) for col, ascending in keys]
+            # np.lexsort는 마지막 키가 1순위이며 안정 정렬 (동순위는 원래 행 순서 유지)
+            self._orders[name] = np.lexsort(ranks[::-1]).astype(np.int32 if self.n_rows < 2**31 else np.int64)
+
+    def ordered_rows(self, rows, name, reverse=False):
+        """행 번호 배열 rows를 name 기준 순서로 반환 (reverse=True면 역순)"""
+        selected = np.zeros(self.n_rows, dtype=bool)
+        selected[rows] = True
+        order = self._orders[name]
+        if reverse:
+            order = order[::-1]
+        return order[selected[order]]
+
+
+def get_sort_index(cache_key, name, df, sort_keys):
+    """로드된 파일(cache_key)과 대상 프레임(name)마다 한 번만 정렬 인덱스를 생성해 모든 세션이 공유"""
+    return derive_dataset(cache_key, f"sort_index:{name}", lambda: SortIndex(df, sort_keys))
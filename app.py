@@ -1,79 +1,82 @@
 from datetime import datetime
 import os
+import time
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import streamlit as st
 import base64
 
+from analytical_store import StoreAggregationPlan, StoreRows, get_analytical_store
+from analytics import (CUBE_MEASURES,
+                       DETAIL_COLUMNS_F1, DETAIL_COLUMNS_F2,
+                       FILE1_FILTER_COLUMNS, FILE1_SECTION_GROUPINGS,
+                       FILE2_FILTER_COLUMNS, AggregationPlan, detail_sort_keys,
+                       get_filter_index, get_sales_cube, get_sort_index,
+                       percent, percent_of_total)
+from charts import (build_channel_growth_figure, build_channel_share_figure, build_cost_figure,
+                    build_cross_figure, build_monthly_channel_figure, build_monthly_type_figure,
+                    build_product1_figure, build_rental_type_figure, build_top_products_figure)
+from data_loader import (CONTRACTS_REQUIRED_COLUMNS, DEFAULT_FILE1, DEFAULT_FILE2,
+                         SALES_REQUIRED_COLUMNS, ExcelSheet, diagnostics_enabled,
+                         find_sales_columns, get_file_kind, get_file_name,
+                         get_schema_report, list_excel_sheets,
+                         prepare_contracts_frame, prepare_sales_frame,
+                         present_categories, source_cache_key)
+from dataset_cache import (begin_session_frames, derive_dataset, render_memory_panel,
+                           session_memory, track_frame)
+from figure_cache import get_figure_cache, selection_key, spec_figure
+from parallel_loader import start_load
+from partition_store import PARTITION_ROOT, PartitionSelection, list_partitions
+from product_search import get_product_search_index
+from table_export import FrameRows, build_csv_bytes, get_export_cache
+from timing import (current_timer, finish_run, log_background, render_timing_panel,
+                    session_id, start_run, summarize_selection, timed_section,
+                    timing_panel_enabled)
+
+
+def wait_for_load(dataset_load, file_label="파일"):
+    """백그라운드 로드(start_load)가 끝나기를 기다리며 진행률을 표시하고 결과 반환 (읽기 실패는 오류 표시 후 None)"""
+    progress_bar = st.empty()
+    
+    def show_progress(done, total):
+        # 큰 Excel은 청크마다, 파티션은 파티션마다 진행률 표시 (캐시에 있거나 금방 끝나면 호출되지 않음)
+        fraction = min(done / total, 1.0) if total else 0.0
+        progress_bar.progress(fraction, text=f"{file_label} 읽는 중... {done:,} / {total:,}")
+    
+    try:
+        return dataset_load.result(show_progress)
+    except Exception as e:
+        st.error(f"❌ {file_label} {get_file_kind(dataset_load.source)} 읽기 실패: {str(e)}")
+        return None
+    finally:
+        progress_bar.empty()
 
 
-
-
-def load_and_clean_dataframe(uploaded_file, file_label="파일"):
-    """파일을 로드하고 컬럼명을 정리하여 반환"""
+def load_and_clean_dataframe(dataset_load, file_label="파일", diagnostics=False):
+    """백그라운드 로드(start_load)가 끝나기를 기다려 컬럼명을 정리한 DataFrame 반환 (진단 모드에서만 컬럼 진단표 표시)"""
     try:
-        if uploaded_file is None:
+        if dataset_load is None:
             st.warning(f"⚠️ {file_label}이 업로드되지 않았습니다.")
             return pd.DataFrame()
         
-        # 파일 이름 확인
-        st.info(f"🔍 {file_label} 파일명: {uploaded_file.name if hasattr(uploaded_file, 'name') else '기본 파일'}")
-        
-        # 파일 포인터를 처음으로 이동
-        try:
-            if hasattr(uploaded_file, 'seek'):
-                uploaded_file.seek(0)
-        except Exception as seek_error:
-            st.warning(f"⚠️ 파일 포인터 이동 실패: {str(seek_error)}")
-        
-        # 파일 읽기
-        df = None
-        file_name = uploaded_file if isinstance(uploaded_file, str) else uploaded_file.name
-        
-        if file_name.endswith('.csv'):
-            # CSV 파일 처리
-            try:
-                df = pd.read_csv(uploaded_file, encoding='utf-8-sig')
-                st.success(f"✅ {file_label} CSV 파일 읽기 성공 (utf-8-sig)")
-            except UnicodeDecodeError:
-                try:
-                    if hasattr(uploaded_file, 'seek'):
-                        uploaded_file.seek(0)
-                    df = pd.read_csv(uploaded_file, encoding='cp949')
-                    st.success(f"✅ {file_label} CSV 파일 읽기 성공 (cp949)")
-                except Exception as e:
-                    st.error(f"❌ {file_label} CSV 읽기 실패: {str(e)}")
-                    return pd.DataFrame()
-            except Exception as e:
-                st.error(f"❌ {file_label} CSV 읽기 중 오류: {str(e)}")
-                return pd.DataFrame()
-        else:
-            # Excel 파일 처리
-            try:
-                df = pd.read_excel(uploaded_file, engine='openpyxl')
-                st.success(f"✅ {file_label} Excel 파일 읽기 성공")
-            except Exception as e:
-                st.error(f"❌ {file_label} Excel 읽기 실패: {str(e)}")
-                return pd.DataFrame()
+        # 파일 읽기 (경로+수정시각 또는 내용 해시 기준 캐시)
+        uploaded_file = dataset_load.source
+        file_name = get_file_name(uploaded_file)
+        file_kind = get_file_kind(uploaded_file)
+        loaded = wait_for_load(dataset_load, file_label)
+        if loaded is None:
+            return pd.DataFrame()
+        df, encoding = loaded
         
         # DataFrame이 비어있는지 확인
         if df is None or df.empty:
             st.error(f"❌ {file_label} 파일이 비어있거나 읽을 수 없습니다.")
             return pd.DataFrame()
         
-        # 컬럼명 정리: 공백, 줄바꿈, 특수문자 제거
-        df.columns = df.columns.astype(str).str.strip().str.replace('\n', '').str.replace('\r', '')
-        
-        st.success(f"✅ {file_label} 로드 성공: {len(df)}행 × {len(df.columns)}열")
-        
-        # 디버깅 정보 표시
-        with st.expander(f"🔍 {file_label} 컬럼 및 데이터 미리보기"):
-            st.write("**컬럼 목록:**")
-            for idx, col in enumerate(df.columns, 1):
-                st.write(f"{idx}. `{col}` (길이: {len(col)}자, repr: {repr(col)})")
-            st.write("**데이터 샘플 (첫 3행):**")
-            st.dataframe(df.head(3))
+        # 진단 정보 표시 (파일당 한 번 만든 진단표를 하나의 요소로 표시)
+        if diagnostics:
+            file_format = f"CSV ({encoding})" if encoding else file_kind
+            with st.expander(f"🔍 {file_label} 진단: {file_name} | {file_format} | {len(df)}행 × {len(df.columns)}열"):
+                st.dataframe(get_schema_report(source_cache_key(uploaded_file), df), use_container_width=True)
         
         return df
     
@@ -84,6 +87,474 @@ def load_and_clean_dataframe(uploaded_file, file_label="파일"):
         return pd.DataFrame()
 
 
+def load_store_table(dataset_load, file_label="파일", diagnostics=False):
+    """분석 저장소 사용 시: 백그라운드 적재가 끝나기를 기다려 저장소 테이블 반환 (실패 시 None, 프레임은 메모리에 두지 않음)"""
+    store_table = wait_for_load(dataset_load, file_label)
+    if store_table is not None and diagnostics:
+        st.caption(f"🔍 {file_label} 진단: {get_file_name(dataset_load.source)} | 분석 저장소 테이블 {store_table.table} "
+                   f"| {store_table.count({}):,}행")
+    return store_table
+
+
+def select_excel_sheet(source, key):
+    """Excel 통합 문서에 시트가 여러 개면 시트 선택 위젯을 표시하고 선택한 시트의 소스 반환 (첫 시트는 원래 소스 그대로)"""
+    sheets = list_excel_sheets(source) if source is not None else []
+    if len(sheets) <= 1:
+        return source
+    sheet = st.selectbox("시트 선택", sheets, key=key)
+    return source if sheet == sheets[0] else ExcelSheet(source, sheet)
+
+
+def select_table_page(detail, key, page_sizes=(50, 100, 500, 1000)):
+    """정렬/페이지 선택 위젯을 표시하고 (정렬 기준, 역순 여부, 현재 페이지 시작 위치, 페이지 크기) 반환"""
+    total = len(detail)
+    col_sort, col_reverse, col_size, col_page = st.columns([2, 1, 1, 1])
+    
+    with col_sort:
+        sort_name = st.selectbox("정렬 기준", detail.sort_names, key=f"{key}_sort")
+    with col_reverse:
+        reverse = st.checkbox("역순 정렬", key=f"{key}_reverse")
+    with col_size:
+        page_size = st.selectbox("페이지당 행 수", page_sizes, index=1, key=f"{key}_page_size")
+    
+    # 필터 변경으로 페이지 수가 줄어들면 마지막 페이지로 이동
+    n_pages = max(1, -(-total // page_size))
+    page_key = f"{key}_page"
+    if st.session_state.get(page_key, 1) > n_pages:
+        st.session_state[page_key] = n_pages
+    with col_page:
+        page = st.number_input("페이지", min_value=1, max_value=n_pages, step=1, key=page_key)
+    
+    start = (page - 1) * page_size
+    st.caption(f"총 {total:,}행 중 {start + 1:,}–{min(start + page_size, total):,}행 표시 (페이지 {page:,}/{n_pages:,})")
+    return sort_name, reverse, start, page_size
+
+
+def render_csv_export(detail, sort_name, reverse, scope, key, file_prefix):
+    """CSV 내보내기: 다운로드 버튼을 누를 때만 조각 단위로 직렬화 (같은 파일/필터 선택/정렬이면 만든 파일을 다시 사용)"""
+    session = session_id()
+    
+    def build_export():
+        # 버튼을 누르면 실행과 별도의 스레드에서 호출됨
+        started = time.perf_counter()
+        data = get_export_cache().get_or_build(
+            (*scope, key, sort_name, reverse), lambda: build_csv_bytes(detail.csv_chunks(sort_name, reverse))
+        )
+        log_background(f"csv.{key}", started, session)
+        return data
+    
+    # 내려받기만 하고 앱은 다시 실행하지 않음
+    st.download_button(
+        label="⬇️ 필터링된 데이터 다운로드 (CSV)",
+        data=build_export,
+        file_name=f"{file_prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+        mime="text/csv",
+        key=f"{key}_download",
+        on_click="ignore"
+    )
+
+
+def show_figure(figure_scope, name, build, empty_message="선택한 필터 조건에 해당하는 데이터가 없습니다."):
+    """(파일, 필터 선택, 차트 이름)별로 캐시된 차트 표시 (build는 데이터가 없으면 None 반환)"""
+    timer = current_timer()
+    spec = get_figure_cache().get_or_build((*figure_scope, name), lambda: timer.call(f"figure.{name}", build))
+    if spec is not None:
+        # 캐시된 차트 스펙 전송 시간
+        with timer.stage(f"chart.{name}"):
+            st.plotly_chart(spec_figure(spec), use_container_width=True)
+    else:
+        st.warning(empty_message)
+
+
+# ========== Section 1: 핵심 KPI 메트릭 ==========
+@st.fragment
+@timed_section('file1.kpi')
+def render_kpi_section(plan, prev_month_cube):
+    """핵심 KPI 메트릭 (전월 대비 증감 포함)"""
+    totals = plan.totals()
+
+    st.markdown("## 📈 핵심 성과 지표 (KPI)")
+
+    if plan.empty:
+        st.warning("⚠️ 선택한 필터 조건에 해당하는 데이터가 없습니다.")
+    else:
+        col1, col2, col3, col4 = st.columns(4)
+
+        # 총 렌탈 건수
+        total_rental = totals['총렌탈(건)']
+        prev_total_rental = prev_month_cube['총렌탈(건)'].sum() if not prev_month_cube.empty else 0
+        delta_total = total_rental - prev_total_rental
+        delta_pct_total = (delta_total / prev_total_rental * 100) if prev_total_rental > 0 else 0
+
+        with col1:
+            st.metric(
+                label="총 렌탈 건수",
+                value=f"{int(total_rental):,}건",
+                delta=f"{delta_pct_total:+.1f}% ({int(delta_total):+,}건)" if prev_total_rental > 0 else "N/A"
+            )
+
+        # 신규 렌탈 건수
+        new_rental = totals['렌탈(건)']
+        prev_new_rental = prev_month_cube['렌탈(건)'].sum() if not prev_month_cube.empty else 0
+        delta_new = new_rental - prev_new_rental
+        delta_pct_new = (delta_new / prev_new_rental * 100) if prev_new_rental > 0 else 0
+
+        with col2:
+            st.metric(
+                label="신규 렌탈 건수",
+                value=f"{int(new_rental):,}건",
+                delta=f"{delta_pct_new:+.1f}% ({int(delta_new):+,}건)" if prev_new_rental > 0 else "N/A"
+            )
+
+        # 재렌탈 건수
+        re_rental = totals['재렌탈(건)']
+        prev_re_rental = prev_month_cube['재렌탈(건)'].sum() if not prev_month_cube.empty else 0
+        delta_re = re_rental - prev_re_rental
+        delta_pct_re = (delta_re / prev_re_rental * 100) if prev_re_rental > 0 else 0
+
+        with col3:
+            st.metric(
+                label="재렌탈 건수",
+                value=f"{int(re_rental):,}건",
+                delta=f"{delta_pct_re:+.1f}% ({int(delta_re):+,}건)" if prev_re_rental > 0 else "N/A"
+            )
+
+        # 홈케어 채널 비중
+        channel_sums = plan.get(['영업채널'], ['총렌탈(건)'])
+        homecare_rental = channel_sums.loc[channel_sums['영업채널'] == '홈케어', '총렌탈(건)'].sum()
+        homecare_ratio = (homecare_rental / total_rental * 100) if total_rental > 0 else 0
+
+        prev_homecare_rental = prev_month_cube[prev_month_cube['영업채널'] == '홈케어']['총렌탈(건)'].sum() if not prev_month_cube.empty else 0
+        prev_homecare_ratio = (prev_homecare_rental / prev_total_rental * 100) if prev_total_rental > 0 else 0
+        delta_homecare = homecare_ratio - prev_homecare_ratio
+
+        with col4:
+            st.metric(
+                label="홈케어 채널 비중",
+                value=f"{homecare_ratio:.1f}%",
+                delta=f"{delta_homecare:+.1f}%p" if prev_total_rental > 0 else "N/A"
+            )
+
+
+# ========== Section 2: 월별 추이 분석 ==========
+@st.fragment
+@timed_section('file1.monthly')
+def render_monthly_trend_section(plan, figure_scope):
+    """월별 영업채널 실적과 렌탈 유형 추이"""
+    st.markdown("## 📊 월별 실적 추이")
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        show_figure(figure_scope, 'monthly_channel', lambda: build_monthly_channel_figure(plan))
+
+    with col2:
+        show_figure(figure_scope, 'monthly_type', lambda: build_monthly_type_figure(plan))
+
+
+# ========== Section 3: 채널별 심층 분석 ==========
+@st.fragment
+@timed_section('file1.channel')
+def render_channel_section(plan, figure_scope):
+    """영업채널별 실적 비중과 월별 성장 추세"""
+    st.markdown("## 🎯 영업채널별 분석")
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        show_figure(figure_scope, 'channel_share', lambda: build_channel_share_figure(plan))
+
+    with col2:
+        show_figure(figure_scope, 'channel_growth', lambda: build_channel_growth_figure(plan))
+
+
+# ========== Section 4: 제품 분석 ==========
+@st.fragment
+@timed_section('file1.product')
+def render_product_section(plan, figure_scope):
+    """제품계층구조1별 실적과 Top 10 제품"""
+    totals = plan.totals()
+
+    st.markdown("## 🔝 제품별 분석")
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        show_figure(figure_scope, 'product1', lambda: build_product1_figure(plan))
+
+    with col2:
+        if not plan.empty and totals['총렌탈(건)'] > 0:
+            show_figure(figure_scope, 'top_products', lambda: build_top_products_figure(plan), "제품명 데이터가 없습니다.")
+        else:
+            st.warning("선택한 필터 조건에 해당하는 데이터가 없습니다.")
+
+
+# ========== Section 5: 영업채널별 렌탈 유형 비중 (수정됨) ==========
+@st.fragment
+@timed_section('file1.rental_type')
+def render_rental_type_section(plan, figure_scope):
+    """영업채널별 신규/재렌탈 비중 차트와 집계표"""
+    st.markdown("## 🔄 영업채널별 렌탈 유형 분석")
+
+    channel_type = plan.get(['영업채널'])
+
+    if not channel_type.empty:
+        # 2열 레이아웃: 왼쪽에 차트, 오른쪽에 표
+        col1, col2 = st.columns([1.2, 0.8])
+
+        with col1:
+            show_figure(figure_scope, 'rental_type', lambda: build_rental_type_figure(plan))
+
+        with col2:
+            # 표 생성 (열합계, 행합계, 백분율 포함)
+            st.markdown("#### 📊 영업채널별 집계표")
+
+            # 표 데이터 준비
+            table_data = channel_type[['영업채널', '렌탈(건)', '재렌탈(건)', '총렌탈(건)']].copy()
+
+            # 비중 계산 (백분율)
+            total_sum = table_data['총렌탈(건)'].sum()
+            table_data['신규(%)'] = percent(table_data['렌탈(건)'], table_data['총렌탈(건)'])
+            table_data['재렌탈(%)'] = percent(table_data['재렌탈(건)'], table_data['총렌탈(건)'])
+            table_data['비중(%)'] = percent(table_data['총렌탈(건)'], total_sum)
+
+            # 열합계 행 추가
+            sum_row = pd.DataFrame({
+                '영업채널': ['합계'],
+                '렌탈(건)': [table_data['렌탈(건)'].sum()],
+                '재렌탈(건)': [table_data['재렌탈(건)'].sum()],
+                '총렌탈(건)': [table_data['총렌탈(건)'].sum()],
+                '신규(%)': [percent(table_data['렌탈(건)'].sum(), total_sum, decimals=None)],
+                '재렌탈(%)': [percent(table_data['재렌탈(건)'].sum(), total_sum, decimals=None)],
+                '비중(%)': [100.0]
+            })
+
+            table_data = pd.concat([table_data, sum_row], ignore_index=True)
+
+            # 표 표시
+            st.dataframe(
+                table_data.style.format({
+                    '렌탈(건)': '{:,.0f}',
+                    '재렌탈(건)': '{:,.0f}',
+                    '총렌탈(건)': '{:,.0f}',
+                    '신규(%)': '{:.1f}%',
+                    '재렌탈(%)': '{:.1f}%',
+                    '비중(%)': '{:.1f}%'
+                }),
+                use_container_width=True,
+                height=500
+            )
+    else:
+        st.warning("선택한 필터 조건에 해당하는 데이터가 없습니다.")
+
+
+# ========== Section 6: 상세 데이터 테이블 ==========
+@st.fragment
+@timed_section('file1.detail')
+def render_detail_section(detail, plan, scope):
+    """필터링된 원본 행 테이블 (서버 정렬/페이지 단위 표시)과 CSV 다운로드 (detail: FrameRows 또는 StoreRows, scope: (파일, 필터 선택))"""
+    totals = plan.totals()
+
+    st.markdown("## 📋 상세 데이터")
+
+    if len(detail) > 0:
+        # 현재 페이지 행만 표시용으로 변환해 전송
+        sort_name, reverse, start, page_size = select_table_page(detail, key="detail_f1")
+        with current_timer().stage("table.detail_f1"):
+            st.dataframe(
+                detail.page(sort_name, reverse, start, page_size),
+                use_container_width=True,
+                height=400
+            )
+
+        # CSV 다운로드 (버튼을 누를 때만 생성)
+        render_csv_export(detail, sort_name, reverse, scope, "detail_f1", "영업실적_필터링")
+
+        # 데이터 요약 정보
+        total_rental_sum = totals['총렌탈(건)']
+        new_rental_sum = totals['렌탈(건)']
+        re_rental_sum = totals['재렌탈(건)']
+
+        st.info(
+            f"📊 필터링된 데이터: 총 {len(detail):,}건 | 총 렌탈: {int(total_rental_sum):,}건 | 신규: {int(new_rental_sum):,}건 | 재렌탈: {int(re_rental_sum):,}건")
+    else:
+        st.warning("표시할 데이터가 없습니다.")
+
+
+# ========== 리스구분 × 약정기간 크로스 분석 (수정됨) ==========
+@st.fragment
+@timed_section('file2.cross')
+def render_cross_section(df2, row_index_f2, selection_f2, filtered_df2, figure_scope, contracts_table=None):
+    """리스구분 × 약정기간 크로스 차트와 집계표 (구분 필터 변경 시 이 섹션만 다시 실행, 저장소 사용 시 프레임 인자는 None)"""
+    st.markdown("## 📊 리스구분 × 약정기간 크로스 분석")
+
+    col1, col2 = st.columns([1.2, 0.8])
+
+    with col1:
+        # 구분 필터 추가
+        st.markdown("#### 📌 필터 옵션")
+
+        # 리스구분 필터
+        if contracts_table is not None:
+            lease_types = contracts_table.distinct('리스구분', selection_f2)
+        else:
+            lease_types = present_categories(filtered_df2['리스구분'])
+        selected_lease = st.multiselect(
+            "리스구분 선택",
+            lease_types,
+            default=lease_types,
+            key="lease_filter"
+        )
+
+        # 약정기간 필터
+        if contracts_table is not None:
+            contract_periods = contracts_table.distinct('약정기간', selection_f2)
+        else:
+            contract_periods = present_categories(filtered_df2['약정기간'])
+        selected_periods = st.multiselect(
+            "약정기간 선택",
+            contract_periods,
+            default=contract_periods,
+            key="period_filter"
+        )
+
+        # 월별/전체 리스구분 x 약정기간 크로스 집계 (전체는 월별 결과에서 롤업)
+        cross_filter = {**selection_f2, '리스구분': selected_lease, '약정기간': selected_periods}
+        cross_groupings = [('월_숫자', '리스구분', '약정기간'), ('리스구분', '약정기간')]
+        if contracts_table is not None:
+            cross_plan = StoreAggregationPlan(contracts_table, cross_filter, cross_groupings, ['총렌탈(건)'])
+        else:
+            filtered_cross = df2.iloc[row_index_f2.query(cross_filter)]
+            cross_plan = AggregationPlan(filtered_cross, cross_groupings, ['총렌탈(건)'])
+
+        cross_selection = selection_key({'리스구분': selected_lease, '약정기간': selected_periods})
+        show_figure((*figure_scope, cross_selection), 'cross', lambda: build_cross_figure(cross_plan),
+                    "크로스 데이터가 없습니다.")
+
+    with col2:
+        # 크로스 테이블 (리스구분 x 약정기간) - 백분율 포함
+        cross_table = cross_plan.get(['리스구분', '약정기간'])
+
+        if not cross_table.empty:
+            # 합계 행/열을 추가할 수 있도록 범주형을 문자열로 변환
+            cross_table[['리스구분', '약정기간']] = cross_table[['리스구분', '약정기간']].astype(str)
+
+            # 피벗 테이블 생성
+            pivot_table = cross_table.pivot_table(
+                index='리스구분',
+                columns='약정기간',
+                values='총렌탈(건)',
+                fill_value=0,
+                aggfunc='sum'
+            )
+
+            # 행 합계 추가
+            pivot_table['행합계'] = pivot_table.sum(axis=1)
+
+            # 열 합계 추가
+            pivot_table.loc['열합계'] = pivot_table.sum()
+
+            # 정수형으로 변환
+            pivot_table_count = pivot_table.astype(int)
+
+            # 백분율 테이블 생성
+            total_sum = pivot_table.loc['열합계', '행합계']
+            pivot_table_pct = percent(pivot_table, total_sum)
+
+            st.markdown("#### 📋 집계표 (건수)")
+            st.dataframe(
+                pivot_table_count.style.format("{:,}"),
+                use_container_width=True,
+                height=250
+            )
+
+            st.markdown("#### 📊 집계표 (비중 %)")
+            st.dataframe(
+                pivot_table_pct.style.format("{:.1f}%"),
+                use_container_width=True,
+                height=250
+            )
+        else:
+            st.warning("크로스 테이블 데이터가 없습니다.")
+
+
+# ========== 비용구분별 분석 ==========
+@st.fragment
+@timed_section('file2.cost')
+def render_cost_section(filtered_df2, selection_f2, figure_scope, contracts_table=None):
+    """비용구분별 실적 비중 차트와 비중표 (저장소 사용 시 filtered_df2는 None)"""
+    st.markdown("## 💰 비용구분별 분석")
+
+    col1, col2 = st.columns([1, 1])
+
+    with col1:
+        # 비용구분별 실적 (원형 그래프)
+        if contracts_table is not None:
+            cost_total = contracts_table.aggregate(selection_f2, ['비용구분'], ['총렌탈(건)'])
+        else:
+            cost_total = filtered_df2.groupby('비용구분', as_index=False, observed=True)['총렌탈(건)'].sum()
+        cost_total = cost_total[cost_total['총렌탈(건)'] > 0]
+
+        if not cost_total.empty:
+            cost_total['비중(%)'] = percent_of_total(cost_total['총렌탈(건)'])
+            cost_total = cost_total.sort_values('총렌탈(건)', ascending=False)
+
+            show_figure(figure_scope, 'cost', lambda: build_cost_figure(cost_total))
+        else:
+            st.warning("비용구분 데이터가 없습니다.")
+
+    with col2:
+        # 비용구분별 실적 테이블 (행합계, 열합계, 비중 포함)
+        if not cost_total.empty:
+            st.markdown("#### 📋 비용구분별 실적 비중표")
+
+            # 테이블 생성
+            cost_display = cost_total[['비용구분', '총렌탈(건)', '비중(%)']].copy()
+
+            # 합계 행 추가
+            total_row = pd.DataFrame({
+                '비용구분': ['합계'],
+                '총렌탈(건)': [cost_display['총렌탈(건)'].sum()],
+                '비중(%)': [100.0]
+            })
+            cost_display = pd.concat([cost_display, total_row], ignore_index=True)
+
+            # 스타일 적용
+            st.dataframe(
+                cost_display.style.format({
+                    '총렌탈(건)': '{:,.0f}',
+                    '비중(%)': '{:.1f}%'
+                }),
+                use_container_width=True,
+                height=500
+            )
+        else:
+            st.warning("비용구분 데이터가 없습니다.")
+
+
+# ========== 상세 데이터 테이블 (파일2) ==========
+@st.fragment
+@timed_section('file2.detail')
+def render_detail_section_f2(detail, scope):
+    """파일2 필터링된 원본 행 테이블 (서버 정렬/페이지 단위 표시)과 CSV 다운로드 (detail: FrameRows 또는 StoreRows, scope: (파일, 필터 선택))"""
+    st.markdown("## 📋 상세 데이터 (파일2)")
+
+    if len(detail) > 0:
+        # 현재 페이지 행만 표시용으로 변환해 전송
+        sort_name, reverse, start, page_size = select_table_page(detail, key="detail_f2")
+        with current_timer().stage("table.detail_f2"):
+            st.dataframe(
+                detail.page(sort_name, reverse, start, page_size),
+                use_container_width=True,
+                height=400
+            )
+
+        # CSV 다운로드 (버튼을 누를 때만 생성)
+        render_csv_export(detail, sort_name, reverse, scope, "detail_f2", "약정기간_리스구분_필터링")
+    else:
+        st.warning("표시할 데이터가 없습니다.")
+
+
 # 페이지 설정
 st.set_page_config(
     page_title="2025 영업 실적 대시보드",
@@ -98,9 +569,31 @@ st.title("📊 2025년 영업 실적 분석 대시보드")
 
 st.markdown("---")
 
-# 기본 파일 경로 설정
-DEFAULT_FILE1 = "data/2025년_영업실적.xlsx"
-DEFAULT_FILE2 = "data/2025년_비용약정2.csv"
+# 로컬 분석 저장소 (DASHBOARD_STORE 설정 시 섹션 집계를 SQL 쿼리로 처리)
+analytical_store = get_analytical_store()
+
+# 진단 모드 (?diagnostics=1 또는 DASHBOARD_DIAGNOSTICS=1일 때만 로드/컬럼 진단 정보 표시)
+diagnostics = diagnostics_enabled()
+
+# 실행 시간 측정 (단계별 시간을 로그에 기록, ?timing=1이면 사이드바 패널 표시)
+run_timer = start_run()
+logged_filters = {}
+begin_session_frames()
+
+# 섹션 목록 (사이드바에서 표시할 섹션 선택)
+FILE1_SECTIONS = {
+    'kpi': '📈 핵심 성과 지표 (KPI)',
+    'monthly': '📊 월별 실적 추이',
+    'channel': '🎯 영업채널별 분석',
+    'product': '🔝 제품별 분석',
+    'rental_type': '🔄 영업채널별 렌탈 유형 분석',
+    'detail': '📋 상세 데이터'
+}
+FILE2_SECTIONS = {
+    'cross': '📊 리스구분 × 약정기간 크로스 분석',
+    'cost': '💰 비용구분별 분석',
+    'detail': '📋 상세 데이터 (파일2)'
+}
 
 # 파일 업로드 섹션
 st.markdown("### 📁 데이터 파일 설정")
@@ -116,136 +609,156 @@ col_upload1, col_upload2 = st.columns(2)
 
 with col_upload1:
     st.markdown("**파일 1: 영업채널 분석용**")
-    if file1_exists:
-        use_default_1 = st.checkbox("기본 파일 사용 (2025년_영업실적.xlsx)", value=True, key="use_default_1")
-    else:
-        use_default_1 = False
-        st.info("기본 파일이 없습니다. 파일을 업로드해주세요.")
+    # 월별 파티션 저장소가 있으면 우선 사용 (연도/월 선택 후 해당 파티션만 읽음)
+    partitions_1 = list_partitions(PARTITION_ROOT, 'sales')
+    use_partitions_1 = bool(partitions_1) and st.checkbox(
+        f"월별 파티션 저장소 사용 ({sum(map(len, partitions_1.values()))}개월)", value=True, key="use_partitions_1"
+    )
     
-    if not use_default_1:
-        uploaded_file = st.file_uploader(
-            "영업채널 중심 데이터 (필수)",
-            type=['xlsx', 'xls', 'csv'],
-            key="file1"
-        )
+    if use_partitions_1:
+        uploaded_file = None  # 사이드바에서 연도/월을 고른 뒤 파티션 선택으로 대체
     else:
-        uploaded_file = DEFAULT_FILE1
+        if file1_exists:
+            use_default_1 = st.checkbox("기본 파일 사용 (2025년_영업실적.xlsx)", value=True, key="use_default_1")
+        else:
+            use_default_1 = False
+            st.info("기본 파일이 없습니다. 파일을 업로드해주세요.")
+    
+        if not use_default_1:
+            uploaded_file = st.file_uploader(
+                "영업채널 중심 데이터 (필수)",
+                type=['xlsx', 'xls', 'csv'],
+                key="file1"
+            )
+        else:
+            uploaded_file = DEFAULT_FILE1
+        uploaded_file = select_excel_sheet(uploaded_file, "sheet1")
 
 with col_upload2:
     st.markdown("**파일 2: 약정기간/리스구분 분석용**")
-    if file2_exists:
-        use_default_2 = st.checkbox("기본 파일 사용 (2025년_비용약정2.csv)", value=True, key="use_default_2")
-    else:
-        use_default_2 = False
-        st.info("기본 파일이 없습니다. 파일을 업로드해주세요.")
+    # 월별 파티션 저장소가 있으면 우선 사용 (연도/월 선택 후 해당 파티션만 읽음)
+    partitions_2 = list_partitions(PARTITION_ROOT, 'contracts')
+    use_partitions_2 = bool(partitions_2) and st.checkbox(
+        f"월별 파티션 저장소 사용 ({sum(map(len, partitions_2.values()))}개월)", value=True, key="use_partitions_2"
+    )
     
-    if not use_default_2:
-        uploaded_file2 = st.file_uploader(
-            "약정기간/리스구분 중심 데이터 (선택)",
-            type=['xlsx', 'xls', 'csv'],
-            key="file2"
-        )
+    if use_partitions_2:
+        uploaded_file2 = None  # 사이드바에서 연도/월을 고른 뒤 파티션 선택으로 대체
     else:
-        uploaded_file2 = DEFAULT_FILE2
+        if file2_exists:
+            use_default_2 = st.checkbox("기본 파일 사용 (2025년_비용약정2.csv)", value=True, key="use_default_2")
+        else:
+            use_default_2 = False
+            st.info("기본 파일이 없습니다. 파일을 업로드해주세요.")
+    
+        if not use_default_2:
+            uploaded_file2 = st.file_uploader(
+                "약정기간/리스구분 중심 데이터 (선택)",
+                type=['xlsx', 'xls', 'csv'],
+                key="file2"
+            )
+        else:
+            uploaded_file2 = DEFAULT_FILE2
+        uploaded_file2 = select_excel_sheet(uploaded_file2, "sheet2")
 
 st.markdown("---")
 
 # ========================================
 # 파일 1 분석 (기존 코드)
 # ========================================
+# 파티션 저장소: 연도/월 필터를 먼저 표시하고 선택한 파티션만 읽음
+if use_partitions_1:
+    st.sidebar.header("🔍 필터 설정 (파일1)")
+    years = list(partitions_1)
+    selected_year = st.sidebar.selectbox("연도 선택", years, index=len(years)-1)
+    months = partitions_1[selected_year]
+    selected_months = st.sidebar.multiselect("월 선택", months, default=months)
+    if selected_months:
+        # KPI 전월 대비용으로 전월 파티션도 함께 읽음 (섹션 집계는 선택한 월로만 필터링하므로 전월 행은 섹션에 포함되지 않음)
+        load_months = set(selected_months)
+        if max(selected_months) - 1 in months:
+            load_months.add(max(selected_months) - 1)
+        uploaded_file = PartitionSelection(PARTITION_ROOT, 'sales', selected_year, load_months)
+    else:
+        st.warning("⚠️ 선택한 월이 없습니다. 사이드바에서 월을 선택하세요.")
+
+# 파일1/파일2 읽기와 전처리를 백그라운드에서 동시에 시작 (각 분석은 결과를 기다렸다가 표시)
+# 파일2 파티션 선택은 사이드바의 파일2 필터 위치에서 정해지므로 그때 시작
+file1_load = start_load(uploaded_file, 'sales') if uploaded_file is not None else None
+file2_load = start_load(uploaded_file2, 'contracts') if uploaded_file2 is not None else None
+
 if uploaded_file is not None:
-    # 파일 읽기
-    df = load_and_clean_dataframe(uploaded_file, "파일1")
+    # 파일 읽기 (파일2를 읽는 동안 파일1 분석 표시)
+    # 분석 저장소 사용 시 백그라운드 로드가 정리된 데이터를 저장소에 적재하고 프레임/인덱스는 메모리에 두지 않음
+    sales_table = None
+    if analytical_store is not None:
+        sales_table = run_timer.call('file1.load', load_store_table, file1_load, "파일1", diagnostics)
+        df = pd.DataFrame()
+    else:
+        df = run_timer.call('file1.load', load_and_clean_dataframe, file1_load, "파일1", diagnostics)
     
-    if not df.empty:
+    if sales_table is not None or not df.empty:
         try:
-            # 필수 컬럼 매핑 (유연한 컬럼명 처리)
-            column_mapping = {}
+            dataset_key = source_cache_key(uploaded_file)
+            if sales_table is None:
+                stage_started = time.perf_counter()
 
-            # 연도 컬럼 찾기
-            if '연도' in df.columns:
-                column_mapping['연도'] = '연도'
-            else:
-                st.error("'연도' 컬럼을 찾을 수 없습니다.")
-                st.stop()
+                # 필수 컬럼 매핑 (유연한 컬럼명 처리)
+                column_mapping = find_sales_columns(df.columns)
 
-            # 월 컬럼 찾기
-            if '월' in df.columns:
-                column_mapping['월'] = '월'
-            else:
-                st.error("'월' 컬럼을 찾을 수 없습니다.")
-                st.stop()
+                # 필수 컬럼 확인
+                missing_keys = [key for key in SALES_REQUIRED_COLUMNS if key not in column_mapping]
 
-            # 영업채널 컬럼 찾기
-            if '영업채널' in df.columns:
-                column_mapping['영업채널'] = '영업채널'
-            else:
-                st.error("'영업채널' 컬럼을 찾을 수 없습니다.")
-                st.stop()
-
-            # 제품 컬럼 찾기
-            for col in df.columns:
-                if '제품계층구조1' in col or '제품계층구조 1' in col:
-                    column_mapping['제품계층구조1'] = col
-                if '제품계층구조2' in col or '제품계층구조 2' in col:
-                    column_mapping['제품계층구조2'] = col
-                if '제품명' in col:
-                    column_mapping['제품명'] = col
-
-            # 렌탈 건수 컬럼 찾기
-            for col in df.columns:
-                if '총렌탈' in col and '건' in col:
-                    column_mapping['총렌탈(건)'] = col
-                elif col == '렌탈(건)' or (('렌탈' in col or '신규' in col) and '건' in col and '총' not in col and '재' not in col):
-                    column_mapping['렌탈(건)'] = col
-                elif '재렌탈' in col and '건' in col:
-                    column_mapping['재렌탈(건)'] = col
-
-            # 필수 컬럼 확인
-            required_keys = ['연도', '월', '영업채널', '제품계층구조1', '제품계층구조2', '제품명',
-                             '총렌탈(건)', '렌탈(건)', '재렌탈(건)']
-
-            missing_keys = [key for key in required_keys if key not in column_mapping]
-
-            if missing_keys:
-                st.error(f"필수 컬럼을 찾을 수 없습니다: {', '.join(missing_keys)}")
-                st.info(f"현재 파일의 컬럼명: {', '.join(df.columns.tolist())}")
-                st.stop()
-
-            # 컬럼명 표준화
-            df_renamed = df.rename(columns={v: k for k, v in column_mapping.items()})
-
-            # 데이터 전처리
-            # 연도 처리
-            df_renamed['연도'] = df_renamed['연도'].astype(str).str.replace('년', '').str.strip()
-            
-            # 월 처리  
-            df_renamed['월'] = df_renamed['월'].astype(str).str.replace('월', '').str.strip()
-            df_renamed['월_숫자'] = pd.to_numeric(df_renamed['월'], errors='coerce')
-            df_renamed = df_renamed.dropna(subset=['월_숫자'])
-            df_renamed['월_숫자'] = df_renamed['월_숫자'].astype(int)
-            
-            # 렌탈 건수 숫자 변환
-            for col in ['총렌탈(건)', '렌탈(건)', '재렌탈(건)']:
-                df_renamed[col] = pd.to_numeric(df_renamed[col], errors='coerce').fillna(0)
-            
-            # 사이드바 필터
-            st.sidebar.header("🔍 필터 설정 (파일1)")
+                if missing_keys:
+                    st.error(f"필수 컬럼을 찾을 수 없습니다: {', '.join(missing_keys)}")
+                    st.info(f"현재 파일의 컬럼명: {', '.join(df.columns.tolist())}")
+                    st.stop()
+
+                run_timer.record('file1.mapping', stage_started)
+                stage_started = time.perf_counter()
+
+                # 데이터 전처리 (컬럼명 표준화, 연도/월, 렌탈 건수, 범주형 변환)
+                # 파일당 한 번만 만들어 모든 세션이 같은 프레임을 읽기 전용으로 공유
+                df_renamed = derive_dataset(dataset_key, 'sales', lambda: prepare_sales_frame(df, column_mapping))
+                run_timer.record('file1.clean', stage_started)
+                stage_started = time.perf_counter()
+                
+                # 차원 조합별 사전 집계 큐브 (파일당 한 번 생성, 모든 섹션이 큐브를 조회)
+                sales_cube = get_sales_cube(dataset_key, df_renamed)
+                cube_index = get_filter_index(dataset_key, 'cube', sales_cube, FILE1_FILTER_COLUMNS)
+                
+                # 필터 인덱스 (차원 값별 행 번호, 파일당 한 번 생성)
+                row_index = get_filter_index(dataset_key, 'rows', df_renamed, FILE1_FILTER_COLUMNS)
+                run_timer.record('file1.index', stage_started)
             
-            # 연도 필터
-            years = sorted(df_renamed['연도'].unique())
-            selected_year = st.sidebar.selectbox("연도 선택", years, index=len(years)-1 if years else 0)
             
-            # 월 필터
-            months = sorted(df_renamed[df_renamed['연도'] == selected_year]['월_숫자'].unique())
-            selected_months = st.sidebar.multiselect(
-                "월 선택",
-                months,
-                default=months
-            )
+            # 사이드바 필터 (파티션 저장소 사용 시 연도/월 필터는 파일을 읽기 전에 표시함, 저장소 사용 시 목록은 쿼리로 조회)
+            if not use_partitions_1:
+                st.sidebar.header("🔍 필터 설정 (파일1)")
+                
+                # 연도 필터
+                if sales_table is not None:
+                    years = sales_table.distinct('연도')
+                else:
+                    years = sorted(df_renamed['연도'].unique())
+                selected_year = st.sidebar.selectbox("연도 선택", years, index=len(years)-1 if years else 0)
+                
+                # 월 필터
+                if sales_table is not None:
+                    months = sales_table.distinct('월_숫자', {'연도': [selected_year]})
+                else:
+                    months = sorted(df_renamed['월_숫자'].iloc[row_index.query({'연도': [selected_year]})].unique())
+                selected_months = st.sidebar.multiselect(
+                    "월 선택",
+                    months,
+                    default=months
+                )
             
             # 영업채널 필터
-            channels = sorted(df_renamed['영업채널'].unique())
+            if sales_table is not None:
+                channels = sales_table.distinct('영업채널')
+            else:
+                channels = present_categories(df_renamed['영업채널'])
             selected_channels = st.sidebar.multiselect(
                 "영업채널 선택",
                 channels,
@@ -253,606 +766,213 @@ if uploaded_file is not None:
             )
             
             # 제품계층구조1 필터
-            product1 = sorted(df_renamed['제품계층구조1'].unique())
+            if sales_table is not None:
+                product1 = sales_table.distinct('제품계층구조1')
+            else:
+                product1 = present_categories(df_renamed['제품계층구조1'])
             selected_product1 = st.sidebar.multiselect(
                 "제품계층구조1 선택",
                 product1,
                 default=product1
             )
             
-            # 데이터 필터링
-            filtered_df = df_renamed[
-                (df_renamed['연도'] == selected_year) &
-                (df_renamed['월_숫자'].isin(selected_months)) &
-                (df_renamed['영업채널'].isin(selected_channels)) &
-                (df_renamed['제품계층구조1'].isin(selected_product1))
-            ].copy()
+            # 표시할 섹션 (숨긴 섹션은 집계/차트를 계산하지 않음)
+            visible_sections = st.sidebar.multiselect(
+                "표시할 섹션",
+                list(FILE1_SECTIONS),
+                default=list(FILE1_SECTIONS),
+                format_func=FILE1_SECTIONS.get,
+                key="sections_f1"
+            )
+            
+            # 데이터 필터링 (차원 내 OR, 차원 간 AND → 행 번호)
+            selection = {
+                '연도': [selected_year],
+                '월_숫자': selected_months,
+                '영업채널': selected_channels,
+                '제품계층구조1': selected_product1
+            }
+            
+            # 차트 캐시 범위 (같은 파일과 필터 선택이면 캐시된 차트 재사용)
+            figure_scope = (dataset_key, selection_key(selection))
+            
+            logged_filters['file1'] = summarize_selection(selection)
+            stage_started = time.perf_counter()
+            
+            # 표시할 섹션에 필요한 그룹 집계만 한 번씩 계산 (저장소 또는 필터링된 큐브에서)
+            groupings = [keys for section in visible_sections for keys in FILE1_SECTION_GROUPINGS[section]]
+            if sales_table is not None:
+                plan = StoreAggregationPlan(sales_table, selection, groupings)
+            else:
+                filtered_cube = sales_cube.iloc[cube_index.query(selection)]
+                track_frame('file1.filtered', filtered_cube, figure_scope)
+                plan = AggregationPlan(filtered_cube, groupings)
+            
+            # 상세 데이터 테이블의 행 (저장소 쿼리 또는 원본 행 번호와 정렬 인덱스)
+            if 'detail' in visible_sections:
+                if sales_table is not None:
+                    detail = StoreRows(sales_table, selection, detail_sort_keys(DETAIL_COLUMNS_F1), DETAIL_COLUMNS_F1)
+                else:
+                    sort_index = get_sort_index(dataset_key, 'rows', df_renamed, detail_sort_keys(DETAIL_COLUMNS_F1))
+                    detail_rows = row_index.query(selection)
+                    track_frame('file1.detail_rows', detail_rows, figure_scope)
+                    detail = FrameRows(df_renamed, detail_rows, sort_index, DETAIL_COLUMNS_F1)
             
             # 이전 월 데이터 (전월 대비용)
-            if len(selected_months) > 0:
+            if 'kpi' not in visible_sections:
+                prev_month_cube = pd.DataFrame()
+            elif len(selected_months) > 0:
                 prev_month = max(selected_months) - 1
-                if prev_month > 0:
-                    prev_month_df = df_renamed[
-                        (df_renamed['연도'] == selected_year) &
-                        (df_renamed['월_숫자'] == prev_month) &
-                        (df_renamed['영업채널'].isin(selected_channels)) &
-                        (df_renamed['제품계층구조1'].isin(selected_product1))
-                    ].copy()
+                prev_selection = {**selection, '월_숫자': [prev_month]}
+                if prev_month <= 0:
+                    prev_month_cube = pd.DataFrame()
+                elif sales_table is not None:
+                    prev_month_cube = sales_table.aggregate(prev_selection, ['영업채널'], CUBE_MEASURES)
                 else:
-                    prev_month_df = pd.DataFrame()
-            else:
-                prev_month_df = pd.DataFrame()
-
-            # ========== Section 1: 핵심 KPI 메트릭 ==========
-            st.markdown("## 📈 핵심 성과 지표 (KPI)")
-
-            if filtered_df.empty:
-                st.warning("⚠️ 선택한 필터 조건에 해당하는 데이터가 없습니다.")
+                    prev_month_cube = sales_cube.iloc[cube_index.query(prev_selection)]
             else:
-                col1, col2, col3, col4 = st.columns(4)
-
-                # 총 렌탈 건수
-                total_rental = filtered_df['총렌탈(건)'].sum()
-                prev_total_rental = prev_month_df['총렌탈(건)'].sum() if not prev_month_df.empty else 0
-                delta_total = total_rental - prev_total_rental
-                delta_pct_total = (delta_total / prev_total_rental * 100) if prev_total_rental > 0 else 0
-
-                with col1:
-                    st.metric(
-                        label="총 렌탈 건수",
-                        value=f"{int(total_rental):,}건",
-                        delta=f"{delta_pct_total:+.1f}% ({int(delta_total):+,}건)" if prev_total_rental > 0 else "N/A"
-                    )
-
-                # 신규 렌탈 건수
-                new_rental = filtered_df['렌탈(건)'].sum()
-                prev_new_rental = prev_month_df['렌탈(건)'].sum() if not prev_month_df.empty else 0
-                delta_new = new_rental - prev_new_rental
-                delta_pct_new = (delta_new / prev_new_rental * 100) if prev_new_rental > 0 else 0
-
-                with col2:
-                    st.metric(
-                        label="신규 렌탈 건수",
-                        value=f"{int(new_rental):,}건",
-                        delta=f"{delta_pct_new:+.1f}% ({int(delta_new):+,}건)" if prev_new_rental > 0 else "N/A"
-                    )
-
-                # 재렌탈 건수
-                re_rental = filtered_df['재렌탈(건)'].sum()
-                prev_re_rental = prev_month_df['재렌탈(건)'].sum() if not prev_month_df.empty else 0
-                delta_re = re_rental - prev_re_rental
-                delta_pct_re = (delta_re / prev_re_rental * 100) if prev_re_rental > 0 else 0
-
-                with col3:
-                    st.metric(
-                        label="재렌탈 건수",
-                        value=f"{int(re_rental):,}건",
-                        delta=f"{delta_pct_re:+.1f}% ({int(delta_re):+,}건)" if prev_re_rental > 0 else "N/A"
-                    )
-
-                # 홈케어 채널 비중
-                homecare_rental = filtered_df[filtered_df['영업채널'] == '홈케어']['총렌탈(건)'].sum()
-                homecare_ratio = (homecare_rental / total_rental * 100) if total_rental > 0 else 0
+                prev_month_cube = pd.DataFrame()
+            run_timer.record('file1.filter', stage_started)
 
-                prev_homecare_rental = prev_month_df[prev_month_df['영업채널'] == '홈케어']['총렌탈(건)'].sum() if not prev_month_df.empty else 0
-                prev_homecare_ratio = (prev_homecare_rental / prev_total_rental * 100) if prev_total_rental > 0 else 0
-                delta_homecare = homecare_ratio - prev_homecare_ratio
-
-                with col4:
-                    st.metric(
-                        label="홈케어 채널 비중",
-                        value=f"{homecare_ratio:.1f}%",
-                        delta=f"{delta_homecare:+.1f}%p" if prev_total_rental > 0 else "N/A"
-                    )
-
-            st.markdown("---")
-
-            # ========== Section 2: 월별 추이 분석 ==========
-            st.markdown("## 📊 월별 실적 추이")
-
-            col1, col2 = st.columns(2)
-
-            with col1:
-                # 월별 영업채널별 총렌탈 건수
-                monthly_channel = filtered_df.groupby(['월_숫자', '영업채널'], as_index=False)['총렌탈(건)'].sum()
-
-                if not monthly_channel.empty:
-                    # 월별 전체 합계 계산 (백분율용)
-                    monthly_total = monthly_channel.groupby('월_숫자')['총렌탈(건)'].sum().reset_index()
-                    monthly_total.columns = ['월_숫자', '월별합계']
-                    monthly_channel = monthly_channel.merge(monthly_total, on='월_숫자')
-                    monthly_channel['비중(%)'] = (monthly_channel['총렌탈(건)'] / monthly_channel['월별합계'] * 100).round(1)
-                    monthly_channel = monthly_channel.sort_values('월_숫자')
-
-                    fig1 = px.bar(
-                        monthly_channel,
-                        x='월_숫자',
-                        y='총렌탈(건)',
-                        color='영업채널',
-                        title="월별 영업채널별 총렌탈 건수",
-                        labels={'월_숫자': '월', '총렌탈(건)': '총렌탈 건수'},
-                        text='총렌탈(건)',
-                        height=400,
-                        hover_data={
-                            '총렌탈(건)': ':,',
-                            '비중(%)': ':.1f',
-                            '월_숫자': False
-                        }
-                    )
-                    fig1.update_traces(
-                        texttemplate='%{text:,.0f}',
-                        textposition='inside',
-                        hovertemplate='<b>%{fullData.name}</b><br>' +
-                                      '월: %{x}월<br>' +
-                                      '총렌탈: %{y:,}건<br>' +
-                                      '비중: %{customdata[0]:.1f}%<br>' +
-                                      '<extra></extra>'
-                    )
-                    fig1.update_layout(
-                        xaxis_type='category',
-                        xaxis_title="월",
-                        yaxis_title="총렌탈 건수"
-                    )
-                    st.plotly_chart(fig1, use_container_width=True)
-                else:
-                    st.warning("선택한 필터 조건에 해당하는 데이터가 없습니다.")
-
-            with col2:
-                # 월별 렌탈 유형별 건수
-                monthly_type = filtered_df.groupby('월_숫자', as_index=False).agg({
-                    '렌탈(건)': 'sum',
-                    '재렌탈(건)': 'sum'
-                })
-
-                if not monthly_type.empty:
-                    monthly_type['총렌탈'] = monthly_type['렌탈(건)'] + monthly_type['재렌탈(건)']
-                    monthly_type['신규비중(%)'] = (monthly_type['렌탈(건)'] / monthly_type['총렌탈'] * 100).round(1)
-                    monthly_type['재렌탈비중(%)'] = (monthly_type['재렌탈(건)'] / monthly_type['총렌탈'] * 100).round(1)
-                    monthly_type = monthly_type.sort_values('월_숫자')
-
-                    fig2 = go.Figure()
-                    fig2.add_trace(go.Bar(
-                        x=monthly_type['월_숫자'],
-                        y=monthly_type['렌탈(건)'],
-                        name='신규 렌탈',
-                        text=monthly_type['렌탈(건)'],
-                        texttemplate='%{text:,.0f}',
-                        textposition='inside',
-                        customdata=monthly_type[['신규비중(%)']],
-                        hovertemplate='<b>신규 렌탈</b><br>' +
-                                      '월: %{x}월<br>' +
-                                      '건수: %{y:,}건<br>' +
-                                      '비중: %{customdata[0]:.1f}%<br>' +
-                                      '<extra></extra>'
-                    ))
-                    fig2.add_trace(go.Bar(
-                        x=monthly_type['월_숫자'],
-                        y=monthly_type['재렌탈(건)'],
-                        name='재렌탈',
-                        text=monthly_type['재렌탈(건)'],
-                        texttemplate='%{text:,.0f}',
-                        textposition='inside',
-                        customdata=monthly_type[['재렌탈비중(%)']],
-                        hovertemplate='<b>재렌탈</b><br>' +
-                                      '월: %{x}월<br>' +
-                                      '건수: %{y:,}건<br>' +
-                                      '비중: %{customdata[0]:.1f}%<br>' +
-                                      '<extra></extra>'
-                    ))
-
-                    fig2.update_layout(
-                        title="월별 렌탈 유형별 건수 (신규 vs 재렌탈)",
-                        xaxis_title="월",
-                        yaxis_title="건수",
-                        barmode='group',
-                        height=400,
-                        xaxis_type='category'
-                    )
-                    st.plotly_chart(fig2, use_container_width=True)
-                else:
-                    st.warning("선택한 필터 조건에 해당하는 데이터가 없습니다.")
-
-            st.markdown("---")
-
-            # ========== Section 3: 채널별 심층 분석 ==========
-            st.markdown("## 🎯 영업채널별 분석")
-
-            col1, col2 = st.columns(2)
-
-            with col1:
-                # 영업채널별 실적 비중
-                channel_total = filtered_df.groupby('영업채널', as_index=False)['총렌탈(건)'].sum()
-
-                if not channel_total.empty and channel_total['총렌탈(건)'].sum() > 0:
-                    channel_total['비중(%)'] = (channel_total['총렌탈(건)'] / channel_total['총렌탈(건)'].sum() * 100).round(1)
-                    channel_total = channel_total.sort_values('총렌탈(건)', ascending=False)
-
-                    fig3 = px.pie(
-                        channel_total,
-                        values='총렌탈(건)',
-                        names='영업채널',
-                        title="영업채널별 실적 비중",
-                        hole=0.4,
-                        height=400
-                    )
-                    fig3.update_traces(
-                        textposition='inside',
-                        textinfo='percent+label',
-                        hovertemplate='<b>%{label}</b><br>' +
-                                      '건수: %{value:,}건<br>' +
-                                      '비중: %{percent}<br>' +
-                                      '<extra></extra>'
-                    )
-                    st.plotly_chart(fig3, use_container_width=True)
-                else:
-                    st.warning("선택한 필터 조건에 해당하는 데이터가 없습니다.")
-
-            with col2:
-                # 영업채널별 성장 추세
-                monthly_channel_growth = filtered_df.groupby(['월_숫자', '영업채널'], as_index=False)['총렌탈(건)'].sum()
-
-                if not monthly_channel_growth.empty:
-                    # 각 채널별 월별 비중 계산
-                    monthly_totals = monthly_channel_growth.groupby('월_숫자')['총렌탈(건)'].sum().reset_index()
-                    monthly_totals.columns = ['월_숫자', '월별합계']
-                    monthly_channel_growth = monthly_channel_growth.merge(monthly_totals, on='월_숫자')
-                    monthly_channel_growth['비중(%)'] = (monthly_channel_growth['총렌탈(건)'] / monthly_channel_growth['월별합계'] * 100).round(1)
-                    monthly_channel_growth = monthly_channel_growth.sort_values('월_숫자')
-
-                    fig4 = px.line(
-                        monthly_channel_growth,
-                        x='월_숫자',
-                        y='총렌탈(건)',
-                        color='영업채널',
-                        title="영업채널별 월별 성장 추세",
-                        markers=True,
-                        labels={'월_숫자': '월', '총렌탈(건)': '총렌탈 건수'},
-                        height=400,
-                        hover_data={
-                            '총렌탈(건)': ':,',
-                            '비중(%)': ':.1f',
-                            '월_숫자': False
-                        }
-                    )
-                    fig4.update_traces(
-                        hovertemplate='<b>%{fullData.name}</b><br>' +
-                                      '월: %{x}월<br>' +
-                                      '총렌탈: %{y:,}건<br>' +
-                                      '비중: %{customdata[0]:.1f}%<br>' +
-                                      '<extra></extra>'
-                    )
-                    fig4.update_layout(
-                        xaxis_type='category',
-                        xaxis_title="월",
-                        yaxis_title="총렌탈 건수"
-                    )
-                    st.plotly_chart(fig4, use_container_width=True)
-                else:
-                    st.warning("선택한 필터 조건에 해당하는 데이터가 없습니다.")
-
-            st.markdown("---")
-
-            # ========== Section 4: 제품 분석 ==========
-            st.markdown("## 🔝 제품별 분석")
-
-            col1, col2 = st.columns(2)
-
-            with col1:
-                # 제품계층구조1별 매출 비중
-                product1_total = filtered_df.groupby('제품계층구조1', as_index=False)['총렌탈(건)'].sum()
-
-                if not product1_total.empty and product1_total['총렌탈(건)'].sum() > 0:
-                    product1_total['비중(%)'] = (product1_total['총렌탈(건)'] / product1_total['총렌탈(건)'].sum() * 100).round(1)
-                    product1_total = product1_total.sort_values('총렌탈(건)', ascending=True)
-
-                    fig5 = px.bar(
-                        product1_total,
-                        x='총렌탈(건)',
-                        y='제품계층구조1',
-                        orientation='h',
-                        title="제품계층구조1별 실적",
-                        text='총렌탈(건)',
-                        height=400,
-                        hover_data={
-                            '총렌탈(건)': ':,',
-                            '비중(%)': ':.1f'
-                        }
-                    )
-                    fig5.update_traces(
-                        texttemplate='%{text:,.0f}',
-                        textposition='outside',
-                        hovertemplate='<b>%{y}</b><br>' +
-                                      '건수: %{x:,}건<br>' +
-                                      '비중: %{customdata[0]:.1f}%<br>' +
-                                      '<extra></extra>'
-                    )
-                    fig5.update_layout(
-                        xaxis_title="총렌탈 건수",
-                        yaxis_title="제품계층구조1"
-                    )
-                    st.plotly_chart(fig5, use_container_width=True)
-                else:
-                    st.warning("선택한 필터 조건에 해당하는 데이터가 없습니다.")
-
-            with col2:
-                # Top 10 제품명 실적
-                if not filtered_df.empty and filtered_df['총렌탈(건)'].sum() > 0:
-                    top_products = filtered_df.groupby('제품명', as_index=False)['총렌탈(건)'].sum()
-                    top_products['비중(%)'] = (top_products['총렌탈(건)'] / filtered_df['총렌탈(건)'].sum() * 100).round(1)
-                    top_products = top_products.sort_values('총렌탈(건)', ascending=False).head(10)
-                    top_products = top_products.sort_values('총렌탈(건)', ascending=True)
-
-                    if not top_products.empty:
-                        fig6 = px.bar(
-                            top_products,
-                            x='총렌탈(건)',
-                            y='제품명',
-                            orientation='h',
-                            title="Top 10 제품명 실적",
-                            text='총렌탈(건)',
-                            height=400,
-                            hover_data={
-                                '총렌탈(건)': ':,',
-                                '비중(%)': ':.1f'
-                            }
-                        )
-                        fig6.update_traces(
-                            texttemplate='%{text:,.0f}',
-                            textposition='outside',
-                            hovertemplate='<b>%{y}</b><br>' +
-                                          '건수: %{x:,}건<br>' +
-                                          '비중: %{customdata[0]:.1f}%<br>' +
-                                          '<extra></extra>'
-                        )
-                        fig6.update_layout(
-                            xaxis_title="총렌탈 건수",
-                            yaxis_title="제품명"
-                        )
-                        st.plotly_chart(fig6, use_container_width=True)
-                    else:
-                        st.warning("제품명 데이터가 없습니다.")
-                else:
-                    st.warning("선택한 필터 조건에 해당하는 데이터가 없습니다.")
+            # 섹션별 렌더링 (각 섹션은 독립적으로 다시 실행되는 fragment, 숨긴 섹션은 계산하지 않음)
+            if 'kpi' in visible_sections:
+                render_kpi_section(plan, prev_month_cube)
+                st.markdown("---")
 
-            st.markdown("---")
+            if 'monthly' in visible_sections:
+                render_monthly_trend_section(plan, figure_scope)
+                st.markdown("---")
 
-            # ========== Section 5: 영업채널별 렌탈 유형 비중 (수정됨) ==========
-            st.markdown("## 🔄 영업채널별 렌탈 유형 분석")
+            if 'channel' in visible_sections:
+                render_channel_section(plan, figure_scope)
+                st.markdown("---")
 
-            channel_type = filtered_df.groupby('영업채널', as_index=False).agg({
-                '총렌탈(건)': 'sum',
-                '렌탈(건)': 'sum',
-                '재렌탈(건)': 'sum'
-            })
+            if 'product' in visible_sections:
+                render_product_section(plan, figure_scope)
+                st.markdown("---")
 
-            if not channel_type.empty:
-                # 비중 계산
-                channel_type['신규비중(%)'] = channel_type.apply(
-                    lambda x: (x['렌탈(건)'] / x['총렌탈(건)'] * 100) if x['총렌탈(건)'] > 0 else 0,
-                    axis=1
-                ).round(1)
-                channel_type['재렌탈비중(%)'] = channel_type.apply(
-                    lambda x: (x['재렌탈(건)'] / x['총렌탈(건)'] * 100) if x['총렌탈(건)'] > 0 else 0,
-                    axis=1
-                ).round(1)
-
-                # 2열 레이아웃: 왼쪽에 차트, 오른쪽에 표
-                col1, col2 = st.columns([1.2, 0.8])
-                
-                with col1:
-                    # 세로 누적 막대 차트
-                    fig7 = go.Figure()
-                    fig7.add_trace(go.Bar(
-                        x=channel_type['영업채널'],
-                        y=channel_type['렌탈(건)'],
-                        name='신규 렌탈',
-                        text=channel_type['렌탈(건)'],
-                        texttemplate='%{text:,.0f}',
-                        textposition='inside',
-                        customdata=channel_type[['신규비중(%)']],
-                        hovertemplate='<b>신규 렌탈</b><br>' +
-                                      '채널: %{x}<br>' +
-                                      '건수: %{y:,}건<br>' +
-                                      '비중: %{customdata[0]:.1f}%<br>' +
-                                      '<extra></extra>'
-                    ))
-                    fig7.add_trace(go.Bar(
-                        x=channel_type['영업채널'],
-                        y=channel_type['재렌탈(건)'],
-                        name='재렌탈',
-                        text=channel_type['재렌탈(건)'],
-                        texttemplate='%{text:,.0f}',
-                        textposition='inside',
-                        customdata=channel_type[['재렌탈비중(%)']],
-                        hovertemplate='<b>재렌탈</b><br>' +
-                                      '채널: %{x}<br>' +
-                                      '건수: %{y:,}건<br>' +
-                                      '비중: %{customdata[0]:.1f}%<br>' +
-                                      '<extra></extra>'
-                    ))
-
-                    fig7.update_layout(
-                        title="영업채널별 렌탈 유형 비중 (신규 vs 재렌탈)",
-                        xaxis_title="영업채널",
-                        yaxis_title="건수",
-                        barmode='stack',
-                        height=500
-                    )
-                    st.plotly_chart(fig7, use_container_width=True)
-                
-                with col2:
-                    # 표 생성 (열합계, 행합계, 백분율 포함)
-                    st.markdown("#### 📊 영업채널별 집계표")
-                    
-                    # 표 데이터 준비
-                    table_data = channel_type[['영업채널', '렌탈(건)', '재렌탈(건)', '총렌탈(건)']].copy()
-                    
-                    # 비중 계산 (백분율)
-                    total_sum = table_data['총렌탈(건)'].sum()
-                    table_data['신규(%)'] = (table_data['렌탈(건)'] / table_data['총렌탈(건)'] * 100).round(1)
-                    table_data['재렌탈(%)'] = (table_data['재렌탈(건)'] / table_data['총렌탈(건)'] * 100).round(1)
-                    table_data['비중(%)'] = (table_data['총렌탈(건)'] / total_sum * 100).round(1)
-                    
-                    # 열합계 행 추가
-                    sum_row = pd.DataFrame({
-                        '영업채널': ['합계'],
-                        '렌탈(건)': [table_data['렌탈(건)'].sum()],
-                        '재렌탈(건)': [table_data['재렌탈(건)'].sum()],
-                        '총렌탈(건)': [table_data['총렌탈(건)'].sum()],
-                        '신규(%)': [(table_data['렌탈(건)'].sum() / table_data['총렌탈(건)'].sum() * 100)],
-                        '재렌탈(%)': [(table_data['재렌탈(건)'].sum() / table_data['총렌탈(건)'].sum() * 100)],
-                        '비중(%)': [100.0]
-                    })
-                    
-                    table_data = pd.concat([table_data, sum_row], ignore_index=True)
-                    
-                    # 표 표시
-                    st.dataframe(
-                        table_data.style.format({
-                            '렌탈(건)': '{:,.0f}',
-                            '재렌탈(건)': '{:,.0f}',
-                            '총렌탈(건)': '{:,.0f}',
-                            '신규(%)': '{:.1f}%',
-                            '재렌탈(%)': '{:.1f}%',
-                            '비중(%)': '{:.1f}%'
-                        }),
-                        use_container_width=True,
-                        height=500
-                    )
-            else:
-                st.warning("선택한 필터 조건에 해당하는 데이터가 없습니다.")
+            if 'rental_type' in visible_sections:
+                render_rental_type_section(plan, figure_scope)
+                st.markdown("---")
 
-            st.markdown("---")
-            
-            # ========== Section 6: 상세 데이터 테이블 ==========
-            st.markdown("## 📋 상세 데이터")
-            
-            if not filtered_df.empty:
-                # 표시할 컬럼 선택
-                display_columns = ['연도', '월', '영업채널', '제품계층구조1', '제품계층구조2',
-                                 '제품명', '총렌탈(건)', '렌탈(건)', '재렌탈(건)']
-                
-                # 월 컬럼을 문자열로 변환 (표시용)
-                filtered_df_display = filtered_df.copy()
-                filtered_df_display['월'] = filtered_df_display['월_숫자'].astype(str) + '월'
-                
-                # 먼저 정렬한 후 컬럼 선택
-                filtered_df_sorted = filtered_df_display.sort_values(['월_숫자', '총렌탈(건)'], ascending=[True, False])
-                
-                st.dataframe(
-                    filtered_df_sorted[display_columns],
-                    use_container_width=True,
-                    height=400
-                )
-                
-                # CSV 다운로드
-                csv = filtered_df_sorted[display_columns].to_csv(index=False, encoding='utf-8-sig')
-                st.download_button(
-                    label="⬇️ 필터링된 데이터 다운로드 (CSV)",
-                    data=csv,
-                    file_name=f"영업실적_필터링_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                    mime="text/csv"
-                )
-                
-                # 데이터 요약 정보
-                total_rental_sum = filtered_df['총렌탈(건)'].sum()
-                new_rental_sum = filtered_df['렌탈(건)'].sum()
-                re_rental_sum = filtered_df['재렌탈(건)'].sum()
-                
-                st.info(
-                    f"📊 필터링된 데이터: 총 {len(filtered_df):,}건 | 총 렌탈: {int(total_rental_sum):,}건 | 신규: {int(new_rental_sum):,}건 | 재렌탈: {int(re_rental_sum):,}건")
-            else:
-                st.warning("표시할 데이터가 없습니다.")
-            
-            st.markdown("---")
+            if 'detail' in visible_sections:
+                render_detail_section(detail, plan, figure_scope)
+                st.markdown("---")
 
         except Exception as e:
             st.error(f"❌ 오류 발생: {str(e)}")
             import traceback
             st.code(traceback.format_exc())
-else:
+elif not use_partitions_1:
     st.info("👆 파일 1을 선택하거나 업로드하여 시작하세요.")
 
 
 # ========================================
 # 파일 2 분석 (약정기간/리스구분/비용구분) - 수정된 버전
 # ========================================
+# 파티션 저장소: 연도/월 필터를 먼저 표시하고 선택한 파티션만 읽음
+if use_partitions_2:
+    st.sidebar.markdown("---")
+    st.sidebar.header("🔍 필터 설정 (파일2)")
+    years_f2 = list(partitions_2)
+    selected_year_f2 = st.sidebar.selectbox("연도 선택 (파일2)", years_f2, index=len(years_f2)-1, key="year_f2")
+    months_f2 = partitions_2[selected_year_f2]
+    selected_months_f2 = st.sidebar.multiselect("월 선택 (파일2)", months_f2, default=months_f2, key="months_f2")
+    if selected_months_f2:
+        uploaded_file2 = PartitionSelection(PARTITION_ROOT, 'contracts', selected_year_f2, selected_months_f2)
+    else:
+        st.warning("⚠️ 파일2에서 선택한 월이 없습니다. 사이드바에서 월을 선택하세요.")
+
 if uploaded_file2 is not None:
     st.markdown("---")
     st.markdown("---")
     st.markdown("# 📅 약정기간 & 리스구분 & 비용구분 분석 (파일2)")
     st.markdown("---")
     
-    # 파일 읽기
-    df2 = load_and_clean_dataframe(uploaded_file2, "파일2")
+    # 파일 읽기 (CSV는 스키마에 있는 컬럼만 타입을 지정해 읽음, 사용하지 않는 컬럼 제외)
+    # 분석 저장소 사용 시 백그라운드 로드가 정리된 데이터를 저장소에 적재하고 프레임/인덱스는 메모리에 두지 않음
+    if file2_load is None:
+        file2_load = start_load(uploaded_file2, 'contracts')
+    contracts_table = None
+    if analytical_store is not None:
+        contracts_table = run_timer.call('file2.load', load_store_table, file2_load, "파일2", diagnostics)
+        df2 = pd.DataFrame()
+    else:
+        df2 = run_timer.call('file2.load', load_and_clean_dataframe, file2_load, "파일2", diagnostics)
     
-    if not df2.empty:
+    if contracts_table is not None or not df2.empty:
         try:
-            # 필수 컬럼 목록
-            required_cols_file2 = [
-                '연도', '월', '제품계층구조1', '제품계층구조2', '제품계층구조3',
-                '제품코드', '제품명', '약정기간', '리스구분', '비용구분',
-                '총렌탈(건)', '렌탈(건)', '재렌탈(건)', '일시불 건'
-            ]
-            
-            # 실제로 없는 컬럼 찾기
-            missing_cols = []
-            for required_col in required_cols_file2:
-                if required_col not in df2.columns:
-                    missing_cols.append(required_col)
-            
-            if missing_cols:
-                st.error(f"❌ 파일2에 필수 컬럼이 없습니다: {', '.join(missing_cols)}")
-                st.stop()
-            
-            st.success("✅ 모든 필수 컬럼이 확인되었습니다!")
-            
-            # 데이터 전처리
-            df2['연도'] = df2['연도'].astype(str).str.replace('년', '').str.strip()
-            df2['월'] = df2['월'].astype(str).str.replace('월', '').str.strip()
-            df2['월_숫자'] = pd.to_numeric(df2['월'], errors='coerce')
+            dataset_key_f2 = source_cache_key(uploaded_file2)
+            if contracts_table is None:
+                stage_started = time.perf_counter()
+
+                # 실제로 없는 필수 컬럼 찾기
+                missing_cols = []
+                for required_col in CONTRACTS_REQUIRED_COLUMNS:
+                    if required_col not in df2.columns:
+                        missing_cols.append(required_col)
+                
+                if missing_cols:
+                    st.error(f"❌ 파일2에 필수 컬럼이 없습니다: {', '.join(missing_cols)}")
+                    st.stop()
+                
+                if diagnostics:
+                    st.success("✅ 모든 필수 컬럼이 확인되었습니다!")
+                run_timer.record('file2.mapping', stage_started)
+                stage_started = time.perf_counter()
+                
+                # 데이터 전처리 (파일당 한 번만 만들어 모든 세션이 읽기 전용으로 공유)
+                df2, nan_count = derive_dataset(dataset_key_f2, 'contracts', lambda: prepare_contracts_frame(df2))
+                run_timer.record('file2.clean', stage_started)
+                stage_started = time.perf_counter()
+                
+                # 필터 인덱스 (차원 값별 행 번호)와 제품명 검색 인덱스 (파일당 한 번 생성)
+                row_index_f2 = get_filter_index(dataset_key_f2, 'rows', df2, FILE2_FILTER_COLUMNS)
+                product_search_index = get_product_search_index(dataset_key_f2, df2['제품명'])
+                run_timer.record('file2.index', stage_started)
+            else:
+                # 저장소 사용 시 프레임/인덱스 없음 (월 변환에 실패해 제외한 행 수는 적재할 때 기록)
+                df2 = row_index_f2 = filtered_rows_f2 = filtered_df2 = None
+                nan_count = contracts_table.dropped_rows
             
             # NaN 체크
-            nan_count = df2['월_숫자'].isna().sum()
             if nan_count > 0:
                 st.warning(f"⚠️ 월 데이터 변환 중 {nan_count}개 행 제외됨")
             
-            df2 = df2.dropna(subset=['월_숫자'])
-            df2['월_숫자'] = df2['월_숫자'].astype(int)
-            
-            # 렌탈 건수 컬럼 숫자 변환
-            for col in ['총렌탈(건)', '렌탈(건)', '재렌탈(건)', '일시불 건']:
-                df2[col] = pd.to_numeric(df2[col], errors='coerce').fillna(0)
+            # 사이드바 필터 (파일2용, 파티션 저장소 사용 시 연도/월 필터는 파일을 읽기 전에 표시함, 저장소 사용 시 목록은 쿼리로 조회)
+            if not use_partitions_2:
+                st.sidebar.markdown("---")
+                st.sidebar.header("🔍 필터 설정 (파일2)")
             
-            # '지정되지 않음' 값 처리
-            for col in ['약정기간', '리스구분', '비용구분']:
-                df2[col] = df2[col].astype(str).str.strip()
-                df2[col] = df2[col].replace(['지정되지 않음', 'nan', 'NaN', 'None', ''], '미지정')
-            
-            # 사이드바 필터 (파일2용)
-            st.sidebar.markdown("---")
-            st.sidebar.header("🔍 필터 설정 (파일2)")
-            
-            # 연도 필터
-            years_f2 = sorted(df2['연도'].unique())
-            selected_year_f2 = st.sidebar.selectbox(
-                "연도 선택 (파일2)", 
-                years_f2,
-                index=len(years_f2)-1 if years_f2 else 0,
-                key="year_f2"
-            )
+                # 연도 필터
+                if contracts_table is not None:
+                    years_f2 = contracts_table.distinct('연도')
+                else:
+                    years_f2 = sorted(df2['연도'].unique())
+                selected_year_f2 = st.sidebar.selectbox(
+                    "연도 선택 (파일2)", 
+                    years_f2,
+                    index=len(years_f2)-1 if years_f2 else 0,
+                    key="year_f2"
+                )
             
-            # 월 필터
-            months_f2 = sorted(df2[df2['연도'] == selected_year_f2]['월_숫자'].unique())
-            selected_months_f2 = st.sidebar.multiselect(
-                "월 선택 (파일2)",
-                months_f2,
-                default=months_f2,
-                key="months_f2"
-            )
+                # 월 필터
+                if contracts_table is not None:
+                    months_f2 = contracts_table.distinct('월_숫자', {'연도': [selected_year_f2]})
+                else:
+                    months_f2 = sorted(df2['월_숫자'].iloc[row_index_f2.query({'연도': [selected_year_f2]})].unique())
+                selected_months_f2 = st.sidebar.multiselect(
+                    "월 선택 (파일2)",
+                    months_f2,
+                    default=months_f2,
+                    key="months_f2"
+                )
             
             # 제품계층구조1 필터
-            product1_f2 = sorted(df2['제품계층구조1'].unique())
+            if contracts_table is not None:
+                product1_f2 = contracts_table.distinct('제품계층구조1')
+            else:
+                product1_f2 = present_categories(df2['제품계층구조1'])
             selected_product1_f2 = st.sidebar.multiselect(
                 "제품계층구조1 선택 (파일2)",
                 product1_f2,
@@ -872,9 +992,12 @@ if uploaded_file2 is not None:
                 help="제품명의 일부를 입력하면 포함된 제품들을 선택할 수 있습니다."
             )
             
-            # 검색 결과에 따른 제품명 필터링
+            # 검색 결과에 따른 제품명 필터링 (저장소 사용 시 제품명 목록 쿼리로 검색)
             if search_query:
-                matching_products = sorted([p for p in df2['제품명'].unique() if search_query.lower() in str(p).lower()])
+                if contracts_table is not None:
+                    matching_products = contracts_table.search('제품명', search_query)
+                else:
+                    matching_products = product_search_index.search(search_query)
                 if matching_products:
                     st.sidebar.success(f"🔍 {len(matching_products)}개 제품 발견")
                     selected_products_f2 = st.sidebar.multiselect(
@@ -886,229 +1009,77 @@ if uploaded_file2 is not None:
                 else:
                     st.sidebar.warning("⚠️ 일치하는 제품이 없습니다.")
                     selected_products_f2 = []
+            elif contracts_table is not None:
+                # 검색어가 없으면 전체 선택
+                selected_products_f2 = contracts_table.distinct('제품명')
             else:
                 # 검색어가 없으면 전체 선택
-                selected_products_f2 = df2['제품명'].unique().tolist()
+                selected_products_f2 = product_search_index.names
             
-            # 데이터 필터링
-            filtered_df2 = df2[
-                (df2['연도'] == selected_year_f2) &
-                (df2['월_숫자'].isin(selected_months_f2)) &
-                (df2['제품계층구조1'].isin(selected_product1_f2)) &
-                (df2['제품명'].isin(selected_products_f2))
-            ].copy()
+            # 표시할 섹션 (숨긴 섹션은 집계/차트를 계산하지 않음)
+            st.sidebar.markdown("---")
+            visible_sections_f2 = st.sidebar.multiselect(
+                "표시할 섹션 (파일2)",
+                list(FILE2_SECTIONS),
+                default=list(FILE2_SECTIONS),
+                format_func=FILE2_SECTIONS.get,
+                key="sections_f2"
+            )
+            
+            # 데이터 필터링 (차원 내 OR, 차원 간 AND → 행 번호, 저장소 사용 시 조건에 맞는 행 수만 조회)
+            selection_f2 = {
+                '연도': [selected_year_f2],
+                '월_숫자': selected_months_f2,
+                '제품계층구조1': selected_product1_f2,
+                '제품명': selected_products_f2
+            }
+            logged_filters['file2'] = summarize_selection(selection_f2)
+            figure_scope = (dataset_key_f2, selection_key(selection_f2))
+            with run_timer.stage('file2.filter'):
+                if contracts_table is not None:
+                    filtered_empty = contracts_table.count(selection_f2) == 0
+                else:
+                    filtered_rows_f2 = row_index_f2.query(selection_f2)
+                    filtered_df2 = df2.iloc[filtered_rows_f2]
+                    filtered_empty = filtered_df2.empty
+            if filtered_df2 is not None:
+                track_frame('file2.filtered', filtered_df2, figure_scope)
             
-            if filtered_df2.empty:
+            if filtered_empty:
                 st.warning("⚠️ 선택한 필터 조건에 해당하는 데이터가 없습니다.")
             else:
-                # ========== 리스구분 × 약정기간 크로스 분석 (수정됨) ==========
-                st.markdown("## 📊 리스구분 × 약정기간 크로스 분석")
-                
-                col1, col2 = st.columns([1.2, 0.8])
-                
-                with col1:
-                    # 구분 필터 추가
-                    st.markdown("#### 📌 필터 옵션")
-                    
-                    # 리스구분 필터
-                    lease_types = sorted(filtered_df2['리스구분'].unique())
-                    selected_lease = st.multiselect(
-                        "리스구분 선택",
-                        lease_types,
-                        default=lease_types,
-                        key="lease_filter"
-                    )
-                    
-                    # 약정기간 필터
-                    contract_periods = sorted(filtered_df2['약정기간'].unique())
-                    selected_periods = st.multiselect(
-                        "약정기간 선택",
-                        contract_periods,
-                        default=contract_periods,
-                        key="period_filter"
-                    )
-                    
-                    # 필터링된 데이터
-                    filtered_cross = filtered_df2[
-                        (filtered_df2['리스구분'].isin(selected_lease)) &
-                        (filtered_df2['약정기간'].isin(selected_periods))
-                    ]
-                    
-                    # 월별 리스구분 x 약정기간 크로스 데이터
-                    cross_monthly = filtered_cross.groupby(['월_숫자', '리스구분', '약정기간'], as_index=False)['총렌탈(건)'].sum()
-                    cross_monthly = cross_monthly[cross_monthly['총렌탈(건)'] > 0]
-                    
-                    if not cross_monthly.empty:
-                        # 리스구분+약정기간 조합 컬럼 생성
-                        cross_monthly['구분'] = cross_monthly['리스구분'] + ' - ' + cross_monthly['약정기간']
-                        
-                        # 세로 누적 막대 그래프
-                        fig_cross = px.bar(
-                            cross_monthly,
-                            x='월_숫자',
-                            y='총렌탈(건)',
-                            color='구분',
-                            title="월별 리스구분 × 약정기간 실적 (누적)",
-                            labels={'월_숫자': '월', '총렌탈(건)': '총렌탈 건수'},
-                            text='총렌탈(건)',
-                            height=550,
-                            barmode='stack'  # 누적 모드
-                        )
-                        fig_cross.update_traces(
-                            texttemplate='%{text:,.0f}',
-                            textposition='inside'
-                        )
-                        fig_cross.update_layout(
-                            xaxis_type='category',
-                            xaxis_title="월",
-                            yaxis_title="총렌탈 건수"
-                        )
-                        st.plotly_chart(fig_cross, use_container_width=True)
-                    else:
-                        st.warning("크로스 데이터가 없습니다.")
-                
-                with col2:
-                    # 크로스 테이블 (리스구분 x 약정기간) - 백분율 포함
-                    cross_table = filtered_cross.groupby(['리스구분', '약정기간'], as_index=False)['총렌탈(건)'].sum()
-                    
-                    if not cross_table.empty:
-                        # 피벗 테이블 생성
-                        pivot_table = cross_table.pivot_table(
-                            index='리스구분',
-                            columns='약정기간',
-                            values='총렌탈(건)',
-                            fill_value=0,
-                            aggfunc='sum'
-                        )
-                        
-                        # 행 합계 추가
-                        pivot_table['행합계'] = pivot_table.sum(axis=1)
-                        
-                        # 열 합계 추가
-                        pivot_table.loc['열합계'] = pivot_table.sum()
-                        
-                        # 정수형으로 변환
-                        pivot_table_count = pivot_table.astype(int)
-                        
-                        # 백분율 테이블 생성
-                        total_sum = pivot_table.loc['열합계', '행합계']
-                        pivot_table_pct = (pivot_table / total_sum * 100).round(1)
-                        
-                        st.markdown("#### 📋 집계표 (건수)")
-                        st.dataframe(
-                            pivot_table_count.style.format("{:,}"),
-                            use_container_width=True,
-                            height=250
-                        )
-                        
-                        st.markdown("#### 📊 집계표 (비중 %)")
-                        st.dataframe(
-                            pivot_table_pct.style.format("{:.1f}%"),
-                            use_container_width=True,
-                            height=250
-                        )
-                    else:
-                        st.warning("크로스 테이블 데이터가 없습니다.")
-                
-                st.markdown("---")
-                
-                # ========== 비용구분별 분석 ==========
-                st.markdown("## 💰 비용구분별 분석")
+                # 섹션별 렌더링 (각 섹션은 독립적으로 다시 실행되는 fragment, 숨긴 섹션은 계산하지 않음)
+                if 'cross' in visible_sections_f2:
+                    render_cross_section(df2, row_index_f2, selection_f2, filtered_df2, figure_scope, contracts_table)
+                    st.markdown("---")
                 
-                col1, col2 = st.columns([1, 1])
-                
-                with col1:
-                    # 비용구분별 실적 (원형 그래프)
-                    cost_total = filtered_df2.groupby('비용구분', as_index=False)['총렌탈(건)'].sum()
-                    cost_total = cost_total[cost_total['총렌탈(건)'] > 0]
-                    
-                    if not cost_total.empty:
-                        cost_total['비중(%)'] = (cost_total['총렌탈(건)'] / cost_total['총렌탈(건)'].sum() * 100).round(1)
-                        cost_total = cost_total.sort_values('총렌탈(건)', ascending=False)
-                        
-                        fig_cost = px.pie(
-                            cost_total,
-                            values='총렌탈(건)',
-                            names='비용구분',
-                            title="비용구분별 실적 비중",
-                            hole=0.4,
-                            height=500
-                        )
-                        fig_cost.update_traces(
-                            textposition='inside',
-                            textinfo='percent+label'
-                        )
-                        st.plotly_chart(fig_cost, use_container_width=True)
-                    else:
-                        st.warning("비용구분 데이터가 없습니다.")
+                if 'cost' in visible_sections_f2:
+                    render_cost_section(filtered_df2, selection_f2, figure_scope, contracts_table)
+                    st.markdown("---")
                 
-                with col2:
-                    # 비용구분별 실적 테이블 (행합계, 열합계, 비중 포함)
-                    if not cost_total.empty:
-                        st.markdown("#### 📋 비용구분별 실적 비중표")
-                        
-                        # 테이블 생성
-                        cost_display = cost_total[['비용구분', '총렌탈(건)', '비중(%)']].copy()
-                        
-                        # 합계 행 추가
-                        total_row = pd.DataFrame({
-                            '비용구분': ['합계'],
-                            '총렌탈(건)': [cost_display['총렌탈(건)'].sum()],
-                            '비중(%)': [100.0]
-                        })
-                        cost_display = pd.concat([cost_display, total_row], ignore_index=True)
-                        
-                        # 스타일 적용
-                        st.dataframe(
-                            cost_display.style.format({
-                                '총렌탈(건)': '{:,.0f}',
-                                '비중(%)': '{:.1f}%'
-                            }),
-                            use_container_width=True,
-                            height=500
-                        )
+                if 'detail' in visible_sections_f2:
+                    if contracts_table is not None:
+                        detail_f2 = StoreRows(contracts_table, selection_f2, detail_sort_keys(DETAIL_COLUMNS_F2),
+                                              DETAIL_COLUMNS_F2)
                     else:
-                        st.warning("비용구분 데이터가 없습니다.")
-                
-                st.markdown("---")
-                
-                # ========== 상세 데이터 테이블 ==========
-                st.markdown("## 📋 상세 데이터 (파일2)")
-                
-                if not filtered_df2.empty:
-                    display_columns_f2 = ['연도', '월', '제품계층구조1', '제품계층구조2', '제품명',
-                                         '약정기간', '리스구분', '비용구분', '총렌탈(건)', '렌탈(건)', '재렌탈(건)']
-                    
-                    filtered_df2_display = filtered_df2.copy()
-                    filtered_df2_display['월'] = filtered_df2_display['월_숫자'].astype(str) + '월'
-                    
-                    filtered_df2_sorted = filtered_df2_display.sort_values(['월_숫자', '총렌탈(건)'], ascending=[True, False])
-                    
-                    st.dataframe(
-                        filtered_df2_sorted[display_columns_f2],
-                        use_container_width=True,
-                        height=400
-                    )
-                    
-                    # CSV 다운로드
-                    csv2 = filtered_df2_sorted[display_columns_f2].to_csv(index=False, encoding='utf-8-sig')
-                    st.download_button(
-                        label="⬇️ 필터링된 데이터 다운로드 (CSV)",
-                        data=csv2,
-                        file_name=f"약정기간_리스구분_필터링_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                        mime="text/csv",
-                        key="download_f2"
-                    )
-                else:
-                    st.warning("표시할 데이터가 없습니다.")
+                        sort_index_f2 = get_sort_index(dataset_key_f2, 'rows', df2, detail_sort_keys(DETAIL_COLUMNS_F2))
+                        detail_f2 = FrameRows(df2, filtered_rows_f2, sort_index_f2, DETAIL_COLUMNS_F2)
+                    render_detail_section_f2(detail_f2, figure_scope)
             
         except Exception as e:
             st.error(f"❌ 오류 발생: {str(e)}")
             import traceback
             st.code(traceback.format_exc())
-else:
+elif not use_partitions_2:
     st.info("👆 파일 2를 선택하거나 업로드하여 약정기간/리스구분 분석을 시작하세요.")
 
+# 이번 실행의 단계별 시간 기록 (fragment로 섹션만 다시 실행되면 섹션 단위로 따로 기록)
+finish_run(run_timer, logged_filters, session_memory())
+if timing_panel_enabled() or diagnostics:
+    render_timing_panel(run_timer)
+if diagnostics:
+    render_memory_panel()
+
 # 푸터
 st.markdown("---")
 st.markdown("""
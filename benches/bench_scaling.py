@@ -0,0 +1,293 @@
+"""데이터 크기별 대시보드 단계 시간 측정 (로드, 전처리, 인덱스, 필터, 섹션별 집계/차트, 테이블 직렬화)
+
+사용법:
+    python benches/bench_scaling.py                               # 10k, 100k, 1M, 10M행
+    python benches/bench_scaling.py --sizes 10000 100000 --repeat 3
+    python benches/bench_scaling.py --data-dir /tmp/bench --output report.json
+
+결과는 JSON(기본값: benches/results/scaling_<시각>.json)으로 저장하며,
+records 목록의 각 항목은 {dataset, rows, stage, seconds} 한 건입니다.
+파일1(sales)은 실제 입력처럼 Excel(.xlsx)로 만들어 측정하고, Excel 최대 행 수를 넘는 크기만 CSV로 만듭니다.
+"""
+import argparse
+import functools
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# 스크립트 직접 실행 시 저장소 루트의 모듈을 불러오도록 경로 추가
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import numpy as np
+import pandas as pd
+import streamlit  # noqa: F401  (아래 로거 설정 전에 Streamlit 로거를 먼저 만들어 둠)
+
+# Streamlit 런타임 밖에서 캐시 데코레이터를 불러올 때 나오는 경고 숨김
+logging.getLogger('streamlit').setLevel(logging.ERROR)
+logging.getLogger('streamlit.runtime.caching.cache_data_api').setLevel(logging.ERROR)
+
+from analytics import (DEFAULT_SORT, DETAIL_COLUMNS_F1, DETAIL_COLUMNS_F2, FILE1_FILTER_COLUMNS,
+                       FILE1_SECTION_GROUPINGS, FILE2_FILTER_COLUMNS, AggregationPlan, FilterIndex, SortIndex,
+                       build_sales_cube, detail_sort_keys, percent_of_total)
+from charts import SALES_FIGURES, build_cost_figure, build_cross_figure
+from data_loader import (CONTRACTS_CSV_SCHEMA, clean_column_names, normalize_object_columns,
+                         prepare_contracts_frame, prepare_sales_frame, present_categories, read_dataframe,
+                         read_sidecar, write_sidecar)
+from product_search import PRODUCT_SEARCH_JAMO, ProductSearchIndex
+from synthetic_data import write_dataset
+from table_export import iter_csv_chunks, to_display_frame
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+DATASETS = ('sales', 'contracts')
+
+# Excel(.xlsx) 시트 최대 데이터 행 수 (헤더 한 행 제외), 이보다 큰 파일1은 CSV로 생성
+EXCEL_MAX_ROWS = 1_048_575
+
+# 상세 테이블 한 페이지 행 수 (app.py 기본값)
+PAGE_ROWS = 100
+
+# 제품명 검색 측정용 검색어 (합성 제품명 '매트-0001' 형식)
+SEARCH_QUERY = '매트'
+
+
+class StageTimer:
+    """단계별 경과 시간을 {dataset, rows, stage, seconds} 기록으로 모음 (repeat회 중 최솟값)"""
+
+    def __init__(self, repeat=1):
+        self.repeat = repeat
+        self.records = []
+
+    @contextmanager
+    def once(self, dataset, rows, stage):
+        """반복하지 않는 단계 (파일 생성, 로드처럼 결과를 다음 단계가 사용하는 경우)"""
+        start = time.perf_counter()
+        yield
+        self._add(dataset, rows, stage, time.perf_counter() - start)
+
+    def run(self, dataset, rows, stage, func):
+        """func를 repeat회 실행해 최소 시간을 기록하고 마지막 결과 반환"""
+        best, result = None, None
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        self._add(dataset, rows, stage, best)
+        return result
+
+    def _add(self, dataset, rows, stage, seconds):
+        self.records.append({'dataset': dataset, 'rows': rows, 'stage': stage, 'seconds': round(seconds, 6)})
+        print(f"  {dataset:<9} {rows:>12,}  {stage:<28} {seconds:10.4f}s", file=sys.stderr)
+
+
+def prepare_sales(df):
+    """파일1 전처리 (합성 파일은 표준 컬럼명이므로 매핑 없이 app.py와 같은 전처리)"""
+    return prepare_sales_frame(clean_column_names(df), {})
+
+
+def prepare_contracts(df):
+    """파일2 전처리 (app.py와 같은 전처리)"""
+    return prepare_contracts_frame(clean_column_names(df))[0]
+
+
+def _all_values(df, columns):
+    """필터 기본값 (각 차원의 모든 값)"""
+    return {col: df[col].dropna().unique().tolist() for col in columns}
+
+
+def typical_selection(df, columns):
+    """대표 필터 상태: 마지막 연도, 상반기 6개월, 나머지 차원 전체 선택"""
+    selection = _all_values(df, columns)
+    selection['연도'] = [sorted(selection['연도'])[-1]]
+    selection['월_숫자'] = [month for month in selection['월_숫자'] if month <= 6]
+    return selection
+
+
+def cost_summary(filtered):
+    """app.py 비용구분 섹션과 같은 비용구분별 합계 (0건 제외, 비중 포함, 많은 순)"""
+    cost_total = filtered.groupby('비용구분', as_index=False, observed=True)['총렌탈(건)'].sum()
+    cost_total = cost_total[cost_total['총렌탈(건)'] > 0]
+    cost_total['비중(%)'] = percent_of_total(cost_total['총렌탈(건)'])
+    return cost_total.sort_values('총렌탈(건)', ascending=False)
+
+
+def bench_figures(timer, dataset, rows, figures):
+    """차트별 생성 시간(앱과 같은 charts 함수)과 차트 캐시에 넣는 JSON 직렬화 시간을 따로 기록 (데이터가 없는 차트는 생성만)"""
+    for name, build in figures.items():
+        fig = timer.run(dataset, rows, f"figure.{name}", build)
+        if fig is not None:
+            timer.run(dataset, rows, f"figure_json.{name}", fig.to_json)
+
+
+def bench_table(timer, dataset, rows, df, filtered_rows, display_columns):
+    """상세 테이블 인덱스 생성, 첫 페이지 표시, 전체 CSV 내보내기"""
+    sort_index = timer.run(dataset, rows, 'index.sort', lambda: SortIndex(df, detail_sort_keys(display_columns)))
+    timer.run(dataset, rows, 'table.page', lambda: to_display_frame(
+        df.iloc[sort_index.ordered_rows(filtered_rows, DEFAULT_SORT)[:PAGE_ROWS]], display_columns))
+    timer.run(dataset, rows, 'table.csv', lambda: sum(
+        len(chunk) for chunk in iter_csv_chunks(df, sort_index.ordered_rows(filtered_rows, DEFAULT_SORT),
+                                                display_columns)))
+
+
+def bench_load(timer, dataset, rows, path, prepare, schema=None):
+    """원본 로드(앱과 같은 CSV 스키마) → 전처리, 그리고 기본 파일 경로의 Parquet 스냅샷 저장/로드"""
+    with timer.once(dataset, rows, 'load'):
+        raw, encoding = read_dataframe(path, schema)
+    with timer.once(dataset, rows, 'clean'):
+        df = prepare(raw.copy())
+
+    normalized = normalize_object_columns(clean_column_names(raw))
+    timer.run(dataset, rows, 'snapshot.write', lambda: write_sidecar(path, normalized, encoding, schema))
+    timer.run(dataset, rows, 'snapshot.read', lambda: read_sidecar(path, schema))
+    return df
+
+
+def bench_sales(timer, rows, path):
+    """파일1: 로드부터 섹션별 집계/차트, 상세 테이블까지"""
+    dataset = 'sales'
+    df = bench_load(timer, dataset, rows, path, prepare_sales)
+
+    cube = timer.run(dataset, rows, 'index.cube', lambda: build_sales_cube(df))
+    cube_index = timer.run(dataset, rows, 'index.filter', lambda: FilterIndex(cube, FILE1_FILTER_COLUMNS))
+    row_index = FilterIndex(df, FILE1_FILTER_COLUMNS)
+
+    selection = typical_selection(df, FILE1_FILTER_COLUMNS)
+    filtered_cube = timer.run(dataset, rows, 'filter', lambda: cube.iloc[cube_index.query(selection)])
+    filtered_rows = timer.run(dataset, rows, 'filter.rows', lambda: row_index.query(selection))
+
+    # 섹션마다 따로 집계 계획을 세운 시간과 app.py처럼 한 번에 세운 시간
+    for section, groupings in FILE1_SECTION_GROUPINGS.items():
+        timer.run(dataset, rows, f"section.{section}", lambda: AggregationPlan(filtered_cube, groupings))
+    all_groupings = [keys for groupings in FILE1_SECTION_GROUPINGS.values() for keys in groupings]
+    plan = timer.run(dataset, rows, 'section.all', lambda: AggregationPlan(filtered_cube, all_groupings))
+
+    bench_figures(timer, dataset, rows, {name: functools.partial(build, plan) for name, build in SALES_FIGURES.items()})
+    bench_table(timer, dataset, rows, df, filtered_rows, DETAIL_COLUMNS_F1)
+    return df
+
+
+def bench_contracts(timer, rows, path):
+    """파일2: 로드부터 크로스/비용구분 섹션, 제품명 검색, 상세 테이블까지"""
+    dataset = 'contracts'
+    df = bench_load(timer, dataset, rows, path, prepare_contracts, CONTRACTS_CSV_SCHEMA)
+
+    row_index = timer.run(dataset, rows, 'index.filter', lambda: FilterIndex(df, FILE2_FILTER_COLUMNS))
+    # 앱과 같은 검색 설정 (제품명 목록, 자모 검색은 DASHBOARD_SEARCH_JAMO)
+    search_index = timer.run(dataset, rows, 'index.search',
+                             lambda: ProductSearchIndex(present_categories(df['제품명']), jamo=PRODUCT_SEARCH_JAMO))
+    timer.run(dataset, rows, 'search', lambda: search_index.search(SEARCH_QUERY))
+
+    selection = typical_selection(df, FILE2_FILTER_COLUMNS)
+    filtered_rows = timer.run(dataset, rows, 'filter', lambda: row_index.query(selection))
+    filtered = df.iloc[filtered_rows]
+
+    cross_groupings = [('월_숫자', '리스구분', '약정기간'), ('리스구분', '약정기간')]
+    cross_plan = timer.run(dataset, rows, 'section.cross',
+                           lambda: AggregationPlan(filtered, cross_groupings, ['총렌탈(건)']))
+    cost_total = timer.run(dataset, rows, 'section.cost', lambda: cost_summary(filtered))
+
+    bench_figures(timer, dataset, rows, {'cross': lambda: build_cross_figure(cross_plan),
+                                         'cost': lambda: build_cost_figure(cost_total)})
+    bench_table(timer, dataset, rows, df, filtered_rows, DETAIL_COLUMNS_F2)
+    return df
+
+
+BENCHES = {'sales': bench_sales, 'contracts': bench_contracts}
+
+
+def peak_rss_mb():
+    """프로세스 최대 상주 메모리 (MB, 실행 시작 이후 누적 최댓값, 측정할 수 없으면 None)"""
+    if resource is None:
+        # Windows: psutil이 설치되어 있으면 최대 작업 집합(peak_wset) 사용
+        try:
+            import psutil
+        except ImportError:
+            return None
+        info = psutil.Process().memory_info()
+        return round(getattr(info, 'peak_wset', info.rss) / (1024 * 1024), 1)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux는 KB, macOS는 바이트 단위
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def dataset_path(data_dir, dataset, rows, seed):
+    """합성 파일 경로 (파일1은 Excel 최대 행 수 이하면 .xlsx, 나머지는 .csv)"""
+    extension = '.xlsx' if dataset == 'sales' and rows <= EXCEL_MAX_ROWS else '.csv'
+    return os.path.join(data_dir, f"{dataset}_{rows}_{seed}{extension}")
+
+
+def environment():
+    """결과 비교용 실행 환경 정보"""
+    import plotly
+    import pyarrow
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'plotly': plotly.__version__,
+        'pyarrow': pyarrow.__version__,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="합성 데이터 크기별 대시보드 단계 시간 측정")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="측정할 행 수 목록")
+    parser.add_argument('--datasets', nargs='+', choices=DATASETS, default=list(DATASETS))
+    parser.add_argument('--repeat', type=int, default=1, help="반복 측정 횟수 (최솟값 기록, 로드/전처리 제외)")
+    parser.add_argument('--data-dir', default=os.path.join(ROOT, 'benches', 'data'),
+                        help="합성 파일 저장 위치 (같은 크기의 파일이 있으면 재사용)")
+    parser.add_argument('--output', help="결과 JSON 경로 (기본값: benches/results/scaling_<시각>.json)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    timer = StageTimer(args.repeat)
+    memory = []
+    for rows in args.sizes:
+        for dataset in args.datasets:
+            path = dataset_path(args.data_dir, dataset, rows, args.seed)
+            if not os.path.exists(path):
+                with timer.once(dataset, rows, 'generate'):
+                    write_dataset(dataset, rows, path, args.seed)
+            df = BENCHES[dataset](timer, rows, path)
+            memory.append({
+                'dataset': dataset,
+                'rows': rows,
+                'file': os.path.basename(path),
+                'frame_mb': round(df.memory_usage(deep=True).sum() / 1024 ** 2, 1),
+                'peak_rss_mb': peak_rss_mb(),
+            })
+            del df
+
+    output = args.output or os.path.join(
+        ROOT, 'benches', 'results', f"scaling_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'environment': environment(),
+        'sizes': args.sizes,
+        'repeat': args.repeat,
+        'records': timer.records,
+        'memory': memory,
+    }
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"결과 저장: {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+"""대시보드 입력 파일과 같은 스키마의 합성 데이터 생성 (파일1 영업실적, 파일2 비용약정)
+
+사용법:
+    python benches/synthetic_data.py sales 1000000 /tmp/sales_1m.csv
+    python benches/synthetic_data.py contracts 1000000 /tmp/contracts_1m.csv
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# 실제 파일의 값 분포를 따른 차원 값과 비율
+CHANNELS = {'DS': 0.26, 'CL': 0.21, '온라인': 0.20, '홈케어': 0.15, '기타': 0.085, '갤러리': 0.075, '법인': 0.02}
+CHANNEL_DIVISIONS = {
+    'DS': ['DS대리점', 'DS-온라인총판', 'DS-BB'],
+    'CL': ['CL사업팀'],
+    '온라인': ['온라인-직영', 'E-마트'],
+    '홈케어': ['홈케어사업팀'],
+    '기타': ['기타', '콜센터'],
+    '갤러리': ['갤러리본부'],
+    '법인': ['법인영업팀'],
+}
+PRODUCT_GROUPS = {'매트리스': 0.38, '정수기': 0.28, '기타': 0.13, '청정기': 0.13, '비데': 0.06, '연수기': 0.01, '의류청정기': 0.01}
+CONTRACT_PERIODS = {'5': 0.42, '7': 0.24, '6': 0.15, '9': 0.10, '지정되지 않음': 0.083, '3': 0.004, '4': 0.003}
+LEASE_TYPES = {'금융리스': 0.85, '렌탈': 0.15}
+COST_TYPES = {
+    '서비스프리': 0.304, '4M': 0.235, '자가': 0.136, '2M': 0.10, '6M': 0.089, '1회서비스': 0.085,
+    '베이직케어4M': 0.028, '12M': 0.011, '3M': 0.005, '1M': 0.0025, '방문관리(선택)': 0.0016,
+    '기본형': 0.0011, '베이직케어6M': 0.0008, '자가관리': 0.0003, '강화형': 0.0002,
+}
+
+# 제품 수 (실제 파일 약 620개), 조직 수, 측정값 결측 비율
+DEFAULT_PRODUCTS = 650
+HR_ORGANIZATIONS = 13
+MISSING_RATE = 0.04
+
+
+def _pick(rng, weights, size):
+    """weights 비율로 값 코드 추출"""
+    p = np.array(list(weights.values()), dtype=float)
+    return rng.choice(len(p), size=size, p=p / p.sum())
+
+
+def _categorical(codes, values):
+    """정수 코드 배열 → 범주형 컬럼 (대량 행도 문자열 복사 없이 생성)"""
+    return pd.Categorical.from_codes(codes, categories=pd.Index(values))
+
+
+def product_catalog(n_products=DEFAULT_PRODUCTS, seed=0):
+    """제품 목록 (제품명, 제품코드, 제품계층구조1~3) 생성"""
+    rng = np.random.default_rng(seed)
+    groups = list(PRODUCT_GROUPS)
+    group_codes = _pick(rng, PRODUCT_GROUPS, n_products)
+    names = [f"{groups[code][:2]}-{idx:04d}" for idx, code in enumerate(group_codes)]
+    return pd.DataFrame({
+        '제품계층구조1': [groups[code] for code in group_codes],
+        # 계층구조1마다 3개의 하위 분류 (실제 파일 약 20개)
+        '제품계층구조2': [f"{groups[code]} {rng.integers(1, 4)}형" for code in group_codes],
+        '제품계층구조3': names,
+        '제품코드': 100000 + rng.permutation(n_products * 10)[:n_products],
+        '제품명': names,
+    })
+
+
+def _products_for_rows(rng, catalog, size):
+    """제품별 판매량 편차(상위 제품 집중)를 반영해 행마다 제품 번호 선택"""
+    popularity = 1.0 / rng.permutation(np.arange(1, len(catalog) + 1)) ** 0.8
+    return rng.choice(len(catalog), size=size, p=popularity / popularity.sum())
+
+
+def _measures(rng, size):
+    """총렌탈 = 신규 + 재렌탈 (긴 꼬리 분포, 일부 결측)"""
+    new = np.floor(rng.lognormal(1.2, 1.5, size))
+    re_rental = np.floor(new * rng.uniform(0, 0.6, size))
+    total = new + re_rental
+    missing = rng.random(size) < MISSING_RATE
+    for values in (new, re_rental, total):
+        values[missing] = np.nan
+    return total, new, re_rental
+
+
+def _months(rng, size, years):
+    """연도/월 (월별 행 수가 연말로 갈수록 늘어나는 추세)"""
+    month_weights = np.linspace(0.8, 1.2, 12)
+    months = rng.choice(12, size=size, p=month_weights / month_weights.sum()) + 1
+    year_values = rng.choice(years, size=size)
+    order = np.lexsort((months, year_values))
+    return year_values[order], months[order]
+
+
+def _year_labels(year_values):
+    """2025 → '2025년' (파일1 형식, 고유 연도만 문자열로 만들고 코드로 펼침)"""
+    years, codes = np.unique(year_values, return_inverse=True)
+    return _categorical(codes, [f"{year}년" for year in years])
+
+
+def generate_sales(n_rows, seed=0, n_products=DEFAULT_PRODUCTS, years=(2025,)):
+    """파일1(영업실적) 스키마의 합성 데이터"""
+    rng = np.random.default_rng(seed)
+    catalog = product_catalog(n_products, seed)
+    year_values, months = _months(rng, n_rows, np.array(years))
+    channel_codes = _pick(rng, CHANNELS, n_rows)
+    channels = list(CHANNELS)
+    divisions = sorted({division for values in CHANNEL_DIVISIONS.values() for division in values})
+    # 채널마다 소속 본부 중 하나 (본부가 1~3개인 채널을 같은 표로 조회하도록 3칸으로 맞춤)
+    division_lookup = np.array([
+        [divisions.index(CHANNEL_DIVISIONS[channel][idx % len(CHANNEL_DIVISIONS[channel])]) for idx in range(3)]
+        for channel in channels
+    ])
+    division_codes = division_lookup[channel_codes, rng.integers(0, 3, n_rows)]
+    product_rows = catalog.iloc[_products_for_rows(rng, catalog, n_rows)].reset_index(drop=True)
+    total, new, re_rental = _measures(rng, n_rows)
+
+    return pd.DataFrame({
+        '연도': _year_labels(year_values),
+        '월': months,
+        '순주문 구분': _categorical(np.zeros(n_rows, dtype=int), ['순주문']),
+        '영업채널': _categorical(channel_codes, channels),
+        'SD 본부': _categorical(division_codes, divisions),
+        'HR조직 000': _categorical(rng.integers(0, HR_ORGANIZATIONS, n_rows),
+                                  [f"조직{idx:02d}" for idx in range(HR_ORGANIZATIONS)]),
+        '제품계층구조1': product_rows['제품계층구조1'].astype('category'),
+        '제품계층구조2': product_rows['제품계층구조2'].astype('category'),
+        '제품계층구조3': product_rows['제품계층구조3'].astype('category'),
+        '제품코드': product_rows['제품코드'],
+        '제품명': product_rows['제품명'].astype('category'),
+        '총렌탈(건)': total,
+        '렌탈(건)': new,
+        '재렌탈(건)': re_rental,
+        '일시불 건': np.floor(rng.lognormal(0.5, 1.0, n_rows)),
+    })
+
+
+def generate_contracts(n_rows, seed=0, n_products=DEFAULT_PRODUCTS, years=(2025,)):
+    """파일2(비용약정) 스키마의 합성 데이터"""
+    rng = np.random.default_rng(seed + 1)
+    catalog = product_catalog(n_products, seed)
+    year_values, months = _months(rng, n_rows, np.array(years))
+    product_rows = catalog.iloc[_products_for_rows(rng, catalog, n_rows)].reset_index(drop=True)
+    period_codes = _pick(rng, CONTRACT_PERIODS, n_rows)
+    periods = list(CONTRACT_PERIODS)
+    # 약정기간이 '지정되지 않음'이면 리스구분도 '지정되지 않음'
+    leases = list(LEASE_TYPES) + ['지정되지 않음']
+    lease_codes = _pick(rng, LEASE_TYPES, n_rows)
+    lease_codes[period_codes == periods.index('지정되지 않음')] = len(leases) - 1
+    total, new, re_rental = _measures(rng, n_rows)
+
+    return pd.DataFrame({
+        '연도': year_values,
+        '월': months,
+        '달력연도/월': np.round(year_values + months / 100, 2),
+        '순주문 구분': _categorical(np.zeros(n_rows, dtype=int), ['순주문']),
+        '제품계층구조1': product_rows['제품계층구조1'].astype('category'),
+        '제품계층구조2': product_rows['제품계층구조2'].astype('category'),
+        '제품계층구조3': product_rows['제품계층구조3'].astype('category'),
+        '제품코드': product_rows['제품코드'],
+        '제품명': product_rows['제품명'].astype('category'),
+        '약정기간': _categorical(period_codes, periods),
+        '리스구분': _categorical(lease_codes, leases),
+        '비용구분': _categorical(_pick(rng, COST_TYPES, n_rows), list(COST_TYPES)),
+        '총렌탈(건)': total,
+        '렌탈(건)': new,
+        '재렌탈(건)': re_rental,
+        '일시불 건': np.floor(rng.lognormal(0.5, 1.0, n_rows)),
+    })
+
+
+GENERATORS = {'sales': generate_sales, 'contracts': generate_contracts}
+
+
+def write_dataset(kind, n_rows, path, seed=0):
+    """합성 데이터를 CSV(utf-8-sig) 또는 Excel(.xlsx, 1,048,575행 이하)로 저장"""
+    df = GENERATORS[kind](n_rows, seed)
+    if path.endswith('.xlsx'):
+        df.to_excel(path, index=False, engine='openpyxl')
+    else:
+        df.to_csv(path, index=False, encoding='utf-8-sig')
+    return df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="대시보드 입력 스키마의 합성 데이터 파일 생성")
+    parser.add_argument('kind', choices=list(GENERATORS), help="sales: 파일1(영업실적), contracts: 파일2(비용약정)")
+    parser.add_argument('rows', type=int, help="행 수")
+    parser.add_argument('path', help="저장 경로 (.csv 또는 .xlsx)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    write_dataset(args.kind, args.rows, args.path, args.seed)
+    print(f"{args.path}: {args.rows:,}행 저장")
+
+
+if __name__ == '__main__':
+    main()
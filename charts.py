@@ -0,0 +1,370 @@
+"""섹션별 차트(Plotly Figure) 생성 (앱과 벤치마크가 같은 함수 사용, 데이터가 없으면 None 반환)"""
+from analytics import CHART_TOP_K, limit_top_k, percent, percent_of_total, share_within_group
+from startup import lazy_import
+
+# 차트 라이브러리는 첫 차트를 그릴 때 import (파일 선택 화면이 먼저 뜨도록)
+px = lazy_import('plotly.express')
+go = lazy_import('plotly.graph_objects')
+
+
+# ========== 파일1 (집계 계획 plan에서 생성) ==========
+def build_monthly_channel_figure(plan):
+    """월별 영업채널별 총렌탈 건수 (누적 막대)"""
+    monthly_channel = plan.get(['월_숫자', '영업채널'], ['총렌탈(건)'])
+    if monthly_channel.empty:
+        return None
+    monthly_channel = limit_top_k(monthly_channel, '영업채널', ['총렌탈(건)'],
+                                  CHART_TOP_K['monthly_channel'], group_cols=['월_숫자'])
+
+    # 월별 전체 합계 대비 비중
+    monthly_channel['비중(%)'] = share_within_group(monthly_channel, '총렌탈(건)', '월_숫자')
+    monthly_channel = monthly_channel.sort_values('월_숫자')
+
+    fig1 = px.bar(
+        monthly_channel,
+        x='월_숫자',
+        y='총렌탈(건)',
+        color='영업채널',
+        title="월별 영업채널별 총렌탈 건수",
+        labels={'월_숫자': '월', '총렌탈(건)': '총렌탈 건수'},
+        text='총렌탈(건)',
+        height=400,
+        hover_data={
+            '총렌탈(건)': ':,',
+            '비중(%)': ':.1f',
+            '월_숫자': False
+        }
+    )
+    fig1.update_traces(
+        texttemplate='%{text:,.0f}',
+        textposition='inside',
+        hovertemplate='<b>%{fullData.name}</b><br>' +
+                      '월: %{x}월<br>' +
+                      '총렌탈: %{y:,}건<br>' +
+                      '비중: %{customdata[0]:.1f}%<br>' +
+                      '<extra></extra>'
+    )
+    fig1.update_layout(
+        xaxis_type='category',
+        xaxis_title="월",
+        yaxis_title="총렌탈 건수"
+    )
+    return fig1
+
+
+def build_monthly_type_figure(plan):
+    """월별 렌탈 유형별 건수 (신규 vs 재렌탈)"""
+    monthly_type = plan.get(['월_숫자'], ['렌탈(건)', '재렌탈(건)'])
+    if monthly_type.empty:
+        return None
+
+    monthly_type['총렌탈'] = monthly_type['렌탈(건)'] + monthly_type['재렌탈(건)']
+    monthly_type['신규비중(%)'] = percent(monthly_type['렌탈(건)'], monthly_type['총렌탈'])
+    monthly_type['재렌탈비중(%)'] = percent(monthly_type['재렌탈(건)'], monthly_type['총렌탈'])
+    monthly_type = monthly_type.sort_values('월_숫자')
+
+    fig2 = go.Figure()
+    fig2.add_trace(go.Bar(
+        x=monthly_type['월_숫자'],
+        y=monthly_type['렌탈(건)'],
+        name='신규 렌탈',
+        text=monthly_type['렌탈(건)'],
+        texttemplate='%{text:,.0f}',
+        textposition='inside',
+        customdata=monthly_type[['신규비중(%)']],
+        hovertemplate='<b>신규 렌탈</b><br>' +
+                      '월: %{x}월<br>' +
+                      '건수: %{y:,}건<br>' +
+                      '비중: %{customdata[0]:.1f}%<br>' +
+                      '<extra></extra>'
+    ))
+    fig2.add_trace(go.Bar(
+        x=monthly_type['월_숫자'],
+        y=monthly_type['재렌탈(건)'],
+        name='재렌탈',
+        text=monthly_type['재렌탈(건)'],
+        texttemplate='%{text:,.0f}',
+        textposition='inside',
+        customdata=monthly_type[['재렌탈비중(%)']],
+        hovertemplate='<b>재렌탈</b><br>' +
+                      '월: %{x}월<br>' +
+                      '건수: %{y:,}건<br>' +
+                      '비중: %{customdata[0]:.1f}%<br>' +
+                      '<extra></extra>'
+    ))
+
+    fig2.update_layout(
+        title="월별 렌탈 유형별 건수 (신규 vs 재렌탈)",
+        xaxis_title="월",
+        yaxis_title="건수",
+        barmode='group',
+        height=400,
+        xaxis_type='category'
+    )
+    return fig2
+
+
+def build_channel_share_figure(plan):
+    """영업채널별 실적 비중 (도넛)"""
+    channel_total = plan.get(['영업채널'], ['총렌탈(건)'])
+    if channel_total.empty or channel_total['총렌탈(건)'].sum() <= 0:
+        return None
+    channel_total = limit_top_k(channel_total, '영업채널', ['총렌탈(건)'], CHART_TOP_K['channel_share'])
+
+    channel_total['비중(%)'] = percent_of_total(channel_total['총렌탈(건)'])
+    channel_total = channel_total.sort_values('총렌탈(건)', ascending=False)
+
+    fig3 = px.pie(
+        channel_total,
+        values='총렌탈(건)',
+        names='영업채널',
+        title="영업채널별 실적 비중",
+        hole=0.4,
+        height=400
+    )
+    fig3.update_traces(
+        textposition='inside',
+        textinfo='percent+label',
+        hovertemplate='<b>%{label}</b><br>' +
+                      '건수: %{value:,}건<br>' +
+                      '비중: %{percent}<br>' +
+                      '<extra></extra>'
+    )
+    return fig3
+
+
+def build_channel_growth_figure(plan):
+    """영업채널별 월별 성장 추세 (선)"""
+    monthly_channel_growth = plan.get(['월_숫자', '영업채널'], ['총렌탈(건)'])
+    if monthly_channel_growth.empty:
+        return None
+    monthly_channel_growth = limit_top_k(monthly_channel_growth, '영업채널', ['총렌탈(건)'],
+                                         CHART_TOP_K['channel_growth'], group_cols=['월_숫자'])
+
+    # 각 채널별 월별 비중 계산
+    monthly_channel_growth['비중(%)'] = share_within_group(monthly_channel_growth, '총렌탈(건)', '월_숫자')
+    monthly_channel_growth = monthly_channel_growth.sort_values('월_숫자')
+
+    fig4 = px.line(
+        monthly_channel_growth,
+        x='월_숫자',
+        y='총렌탈(건)',
+        color='영업채널',
+        title="영업채널별 월별 성장 추세",
+        markers=True,
+        labels={'월_숫자': '월', '총렌탈(건)': '총렌탈 건수'},
+        height=400,
+        hover_data={
+            '총렌탈(건)': ':,',
+            '비중(%)': ':.1f',
+            '월_숫자': False
+        }
+    )
+    fig4.update_traces(
+        hovertemplate='<b>%{fullData.name}</b><br>' +
+                      '월: %{x}월<br>' +
+                      '총렌탈: %{y:,}건<br>' +
+                      '비중: %{customdata[0]:.1f}%<br>' +
+                      '<extra></extra>'
+    )
+    fig4.update_layout(
+        xaxis_type='category',
+        xaxis_title="월",
+        yaxis_title="총렌탈 건수"
+    )
+    return fig4
+
+
+def build_product1_figure(plan):
+    """제품계층구조1별 실적 (가로 막대)"""
+    product1_total = plan.get(['제품계층구조1'], ['총렌탈(건)'])
+    if product1_total.empty or product1_total['총렌탈(건)'].sum() <= 0:
+        return None
+    product1_total = limit_top_k(product1_total, '제품계층구조1', ['총렌탈(건)'], CHART_TOP_K['product1'])
+
+    product1_total['비중(%)'] = percent_of_total(product1_total['총렌탈(건)'])
+    product1_total = product1_total.sort_values('총렌탈(건)', ascending=True)
+
+    fig5 = px.bar(
+        product1_total,
+        x='총렌탈(건)',
+        y='제품계층구조1',
+        orientation='h',
+        title="제품계층구조1별 실적",
+        text='총렌탈(건)',
+        height=400,
+        hover_data={
+            '총렌탈(건)': ':,',
+            '비중(%)': ':.1f'
+        }
+    )
+    fig5.update_traces(
+        texttemplate='%{text:,.0f}',
+        textposition='outside',
+        hovertemplate='<b>%{y}</b><br>' +
+                      '건수: %{x:,}건<br>' +
+                      '비중: %{customdata[0]:.1f}%<br>' +
+                      '<extra></extra>'
+    )
+    fig5.update_layout(
+        xaxis_title="총렌탈 건수",
+        yaxis_title="제품계층구조1"
+    )
+    return fig5
+
+
+def build_top_products_figure(plan):
+    """Top 10 제품명 실적 (가로 막대, 비중은 필터 전체 합계 기준)"""
+    top_products = plan.get(['제품명'], ['총렌탈(건)'])
+    top_products['비중(%)'] = percent(top_products['총렌탈(건)'], plan.totals()['총렌탈(건)'])
+    top_products = top_products.sort_values('총렌탈(건)', ascending=False).head(10)
+    top_products = top_products.sort_values('총렌탈(건)', ascending=True)
+    if top_products.empty:
+        return None
+
+    fig6 = px.bar(
+        top_products,
+        x='총렌탈(건)',
+        y='제품명',
+        orientation='h',
+        title="Top 10 제품명 실적",
+        text='총렌탈(건)',
+        height=400,
+        hover_data={
+            '총렌탈(건)': ':,',
+            '비중(%)': ':.1f'
+        }
+    )
+    fig6.update_traces(
+        texttemplate='%{text:,.0f}',
+        textposition='outside',
+        hovertemplate='<b>%{y}</b><br>' +
+                      '건수: %{x:,}건<br>' +
+                      '비중: %{customdata[0]:.1f}%<br>' +
+                      '<extra></extra>'
+    )
+    fig6.update_layout(
+        xaxis_title="총렌탈 건수",
+        yaxis_title="제품명"
+    )
+    return fig6
+
+
+def build_rental_type_figure(plan):
+    """영업채널별 렌탈 유형 비중 (누적 막대, 상위 채널 외에는 '기타'로 합산)"""
+    channel_type = plan.get(['영업채널'])
+    if channel_type.empty:
+        return None
+    chart_data = limit_top_k(channel_type, '영업채널', ['총렌탈(건)', '렌탈(건)', '재렌탈(건)'],
+                             CHART_TOP_K['rental_type'])
+    chart_data = chart_data.assign(
+        **{'신규비중(%)': percent(chart_data['렌탈(건)'], chart_data['총렌탈(건)']),
+           '재렌탈비중(%)': percent(chart_data['재렌탈(건)'], chart_data['총렌탈(건)'])}
+    )
+
+    # 세로 누적 막대 차트
+    fig7 = go.Figure()
+    fig7.add_trace(go.Bar(
+        x=chart_data['영업채널'],
+        y=chart_data['렌탈(건)'],
+        name='신규 렌탈',
+        text=chart_data['렌탈(건)'],
+        texttemplate='%{text:,.0f}',
+        textposition='inside',
+        customdata=chart_data[['신규비중(%)']],
+        hovertemplate='<b>신규 렌탈</b><br>' +
+                      '채널: %{x}<br>' +
+                      '건수: %{y:,}건<br>' +
+                      '비중: %{customdata[0]:.1f}%<br>' +
+                      '<extra></extra>'
+    ))
+    fig7.add_trace(go.Bar(
+        x=chart_data['영업채널'],
+        y=chart_data['재렌탈(건)'],
+        name='재렌탈',
+        text=chart_data['재렌탈(건)'],
+        texttemplate='%{text:,.0f}',
+        textposition='inside',
+        customdata=chart_data[['재렌탈비중(%)']],
+        hovertemplate='<b>재렌탈</b><br>' +
+                      '채널: %{x}<br>' +
+                      '건수: %{y:,}건<br>' +
+                      '비중: %{customdata[0]:.1f}%<br>' +
+                      '<extra></extra>'
+    ))
+
+    fig7.update_layout(
+        title="영업채널별 렌탈 유형 비중 (신규 vs 재렌탈)",
+        xaxis_title="영업채널",
+        yaxis_title="건수",
+        barmode='stack',
+        height=500
+    )
+    return fig7
+
+
+# 파일1 차트 이름 → 생성 함수 (모두 집계 계획 plan 하나를 받음, 이름은 차트 캐시/시간 로그 키)
+SALES_FIGURES = {
+    'monthly_channel': build_monthly_channel_figure,
+    'monthly_type': build_monthly_type_figure,
+    'channel_share': build_channel_share_figure,
+    'channel_growth': build_channel_growth_figure,
+    'product1': build_product1_figure,
+    'top_products': build_top_products_figure,
+    'rental_type': build_rental_type_figure,
+}
+
+
+# ========== 파일2 ==========
+def build_cross_figure(cross_plan):
+    """월별 리스구분 × 약정기간 실적 (누적 막대, cross_plan은 월/리스구분/약정기간 집계 계획)"""
+    cross_monthly = cross_plan.get(['월_숫자', '리스구분', '약정기간'])
+    cross_monthly = cross_monthly[cross_monthly['총렌탈(건)'] > 0]
+    if cross_monthly.empty:
+        return None
+
+    # 리스구분+약정기간 조합 컬럼 생성
+    cross_monthly['구분'] = cross_monthly['리스구분'].astype(str) + ' - ' + cross_monthly['약정기간'].astype(str)
+    cross_monthly = limit_top_k(cross_monthly, '구분', ['총렌탈(건)'], CHART_TOP_K['cross'], group_cols=['월_숫자'])
+
+    # 세로 누적 막대 그래프
+    fig_cross = px.bar(
+        cross_monthly,
+        x='월_숫자',
+        y='총렌탈(건)',
+        color='구분',
+        title="월별 리스구분 × 약정기간 실적 (누적)",
+        labels={'월_숫자': '월', '총렌탈(건)': '총렌탈 건수'},
+        text='총렌탈(건)',
+        height=550,
+        barmode='stack'  # 누적 모드
+    )
+    fig_cross.update_traces(
+        texttemplate='%{text:,.0f}',
+        textposition='inside'
+    )
+    fig_cross.update_layout(
+        xaxis_type='category',
+        xaxis_title="월",
+        yaxis_title="총렌탈 건수"
+    )
+    return fig_cross
+
+
+def build_cost_figure(cost_total):
+    """비용구분별 실적 비중 (도넛, cost_total은 비용구분별 총렌탈 합계)"""
+    if cost_total.empty:
+        return None
+    fig_cost = px.pie(
+        cost_total,
+        values='총렌탈(건)',
+        names='비용구분',
+        title="비용구분별 실적 비중",
+        hole=0.4,
+        height=500
+    )
+    fig_cost.update_traces(
+        textposition='inside',
+        textinfo='percent+label'
+    )
+    return fig_cost
@@ -0,0 +1,712 @@
+"""대시보드 데이터 파일 로딩 및 캐시 유틸리티"""
+import codecs
+import csv
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import threading
+import zipfile
+from collections import OrderedDict
+from xml.etree import ElementTree
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+import streamlit as st
+from pandas.io.parsers import TextParser
+
+
+def _env_int(name, default):
+    """환경 변수를 정수로 읽음 (미설정 시 기본값, 0 이하이면 None = 제한 없음)"""
+    value = os.environ.get(name, '').strip()
+    if not value:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        return default
+    return value if value > 0 else None
+
+
+# 캐시 설정 (환경 변수로 변경 가능, 0이면 제한 없음)
+CACHE_TTL_SECONDS = _env_int('DASHBOARD_CACHE_TTL', 3600)
+CACHE_MAX_ENTRIES = _env_int('DASHBOARD_CACHE_MAX_ENTRIES', 8)
+FIGURE_CACHE_MAX_MB = _env_int('DASHBOARD_FIGURE_CACHE_MB', 64)
+EXPORT_CACHE_MAX_MB = _env_int('DASHBOARD_EXPORT_CACHE_MB', 64)
+# 업로드 파일 내용 해시를 기억하는 개수 (재실행마다 다시 해시하지 않음)
+UPLOAD_KEY_MEMO_ENTRIES = 64
+
+# 로드된 데이터셋 메모리 한도 (MB, 전체/세션별, 0이면 제한 없음)
+# 50MB 영업실적 xlsx(약 43만 행)는 정리된 데이터/큐브/인덱스를 포함해 약 180MB이므로
+# 세션 한도는 이 크기의 파일1과 파일2를 함께 올릴 수 있는 크기로 설정
+MEMORY_BUDGET_MB = _env_int('DASHBOARD_MEMORY_MB', 1024)
+SESSION_MEMORY_BUDGET_MB = _env_int('DASHBOARD_SESSION_MEMORY_MB', 512)
+# 세션이 이 시간(초) 동안 데이터셋을 사용하지 않으면 사용 세션에서 제외 (닫힌 브라우저 탭 정리)
+SESSION_IDLE_SECONDS = _env_int('DASHBOARD_SESSION_IDLE', 1800)
+
+# 파일 읽기/전처리를 동시에 실행하는 스레드 수 (프로세스 전체 공유, 0이면 CPU 수 기준 기본값)
+LOAD_WORKERS = _env_int('DASHBOARD_LOAD_WORKERS', 4)
+# Excel 파싱을 실행하는 별도 프로세스 수 (0이면 프로세스를 쓰지 않고 로드 스레드에서 파싱)
+PARSE_PROCESSES = _env_int('DASHBOARD_PARSE_PROCESSES', 2)
+
+# CSV 인코딩 판단 후보 (앞에서부터 시도, UTF-8은 BOM 유무 모두 utf-8-sig로 읽음)
+# euc-kr은 cp949에 포함되므로 cp949로 읽음
+CSV_ENCODINGS = ['utf-8-sig', 'cp949']
+# 인코딩 판단에 읽는 파일 앞부분 크기 (바이트)
+ENCODING_SAMPLE_BYTES = 64 * 1024
+
+# 기본 파일 옆에 저장하는 컬럼형 스냅샷(Parquet) 설정
+SIDECAR_SUFFIX = '.parquet'
+SIDECAR_SOURCE_KEY = b'dashboard_source'
+SIDECAR_ENCODING_KEY = b'dashboard_encoding'
+SIDECAR_SCHEMA_KEY = b'dashboard_schema'
+
+# 기본 데이터 파일 (파일1: 영업실적, 파일2: 비용약정)
+DEFAULT_FILE1 = "data/2025년_영업실적.xlsx"
+DEFAULT_FILE2 = "data/2025년_비용약정2.csv"
+
+# 파일1 필수 컬럼 (표준 컬럼명)
+SALES_REQUIRED_COLUMNS = ['연도', '월', '영업채널', '제품계층구조1', '제품계층구조2', '제품명',
+                          '총렌탈(건)', '렌탈(건)', '재렌탈(건)']
+
+# 파일2(비용약정) CSV 스키마: 대시보드에서 사용하는 컬럼과 읽을 때의 타입 (나머지 컬럼은 읽지 않음)
+# None은 타입 추론, COUNT_DTYPE은 nullable 정수(Int64) 건수 컬럼 (숫자로 변환할 수 없는 값은 결측)
+# 값 해석 방식이 바뀌면 스냅샷을 다시 만들도록 이름에 해석 방식을 포함 (스냅샷 스키마 식별값에 기록됨)
+COUNT_DTYPE = 'count:numeric'
+CONTRACTS_COUNT_COLUMNS = ['총렌탈(건)', '렌탈(건)', '재렌탈(건)', '일시불 건']
+CONTRACTS_CSV_SCHEMA = {
+    '연도': 'string', '월': 'string',
+    '제품계층구조1': 'category', '제품계층구조2': 'category', '제품계층구조3': 'category',
+    '제품코드': None, '제품명': 'category',
+    '약정기간': 'category', '리스구분': 'category', '비용구분': 'category',
+    **{col: COUNT_DTYPE for col in CONTRACTS_COUNT_COLUMNS},
+}
+CONTRACTS_REQUIRED_COLUMNS = list(CONTRACTS_CSV_SCHEMA)
+
+# 스키마가 있는 CSV를 읽는 엔진 (pyarrow: 멀티스레드, 처리하지 못하는 파일은 기본 엔진으로 다시 읽음)
+CSV_ENGINE = 'pyarrow'
+# 스키마 타입 → pyarrow CSV 변환 타입 (그 외 타입은 pyarrow가 추론)
+_ARROW_TYPES = {'category': pa.dictionary(pa.int32(), pa.string()), 'string': pa.string()}
+
+# Excel 읽기 엔진 (환경 변수 DASHBOARD_EXCEL_ENGINE: auto면 python-calamine이 설치되어 있으면 사용, 아니면 openpyxl)
+EXCEL_ENGINE = os.environ.get('DASHBOARD_EXCEL_ENGINE', '').strip().lower() or 'auto'
+# Excel 행을 타입이 정해진 컬럼으로 변환하는 단위 (행 수)
+EXCEL_CHUNK_ROWS = 50_000
+
+_XLSX_NAMESPACE = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+
+# 필터/그룹 기준이 되는 차원 컬럼 (범주형으로 변환)
+DIMENSION_COLUMNS = [
+    '영업채널', '제품계층구조1', '제품계층구조2', '제품계층구조3',
+    '제품명', '제품코드', '약정기간', '리스구분', '비용구분'
+]
+
+
+def get_file_name(source):
+    """경로 문자열 또는 업로드 파일 객체에서 파일명 반환"""
+    return source if isinstance(source, str) else source.name
+
+
+# 업로드 file_id → 캐시 키(내용 해시), 오래 사용하지 않은 것부터 제거
+_upload_keys = OrderedDict()
+_upload_keys_lock = threading.Lock()
+
+
+def get_file_kind(source):
+    """화면/로그에 표시하는 파일 종류 ('CSV', 'Excel', 파티션 선택 등은 자체 file_kind)"""
+    return getattr(source, 'file_kind', 'CSV' if get_file_name(source).endswith('.csv') else 'Excel')
+
+
+def source_cache_key(source):
+    """캐시 키 생성: 기본 파일은 경로+수정시각, 업로드 파일은 내용 해시 (파티션 선택 등은 자체 키)
+
+    업로드 파일의 해시는 file_id별로 한 번만 계산 (재실행마다 같은 업로드를 다시 해시하지 않음)
+    """
+    if isinstance(source, str):
+        stat = os.stat(source)
+        return f"path:{os.path.abspath(source)}:{stat.st_mtime_ns}:{stat.st_size}"
+
+    if hasattr(source, 'cache_key'):
+        return source.cache_key()
+
+    file_id = getattr(source, 'file_id', None)
+    if file_id is None:
+        return _upload_cache_key(source)
+    with _upload_keys_lock:
+        key = _upload_keys.get(file_id)
+        if key is not None:
+            _upload_keys.move_to_end(file_id)
+            return key
+    key = _upload_cache_key(source)
+    with _upload_keys_lock:
+        _upload_keys[file_id] = key
+        while len(_upload_keys) > UPLOAD_KEY_MEMO_ENTRIES:
+            _upload_keys.popitem(last=False)
+    return key
+
+
+def _upload_cache_key(source):
+    """업로드 파일 내용 해시로 캐시 키 생성"""
+    if hasattr(source, 'getvalue'):
+        content = source.getvalue()
+    else:
+        source.seek(0)
+        content = source.read()
+        source.seek(0)
+    digest = hashlib.sha256(content).hexdigest()
+    return f"upload:{get_file_name(source)}:{digest}"
+
+
+def detect_encoding(sample, final=False):
+    """바이트 앞부분(sample)으로 CSV 인코딩 판단 (BOM → UTF-8 → CP949 순, ASCII뿐이거나 판단 불가면 None)
+
+    final=False이면 sample 끝에서 잘린 멀티바이트 문자는 오류로 보지 않음
+    """
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if sample.isascii():
+        return None
+    for encoding in CSV_ENCODINGS:
+        try:
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=final)
+        except UnicodeDecodeError:
+            continue
+        return encoding
+    return None
+
+
+class SniffingTextReader(io.TextIOBase):
+    """앞부분이 ASCII뿐인 CSV용: ASCII 구간은 그대로 읽고, 처음 나온 비ASCII 구간으로 인코딩을 정해 이어서 디코딩
+
+    ASCII는 UTF-8/CP949에서 같으므로 인코딩을 늦게 정해도 처음부터 다시 읽을 필요가 없음
+    """
+
+    def __init__(self, raw, chunk_bytes=ENCODING_SAMPLE_BYTES):
+        self.raw = raw
+        self.chunk_bytes = chunk_bytes
+        self.detected = None
+        self._decoder = None
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while True:
+            data = self.raw.read(self.chunk_bytes if size is None or size < 0 else max(size, 1))
+            if self._decoder is None:
+                if not data or data.isascii():
+                    return data.decode('ascii')
+                self.detected = detect_encoding(data, final=len(data) < self.chunk_bytes) or CSV_ENCODINGS[-1]
+                self._decoder = codecs.getincrementaldecoder(self.detected)()
+            text = self._decoder.decode(data, final=not data)
+            # 잘린 멀티바이트 문자만 남은 경우 빈 문자열(EOF)을 반환하지 않도록 더 읽음
+            if text or not data:
+                return text
+
+
+def parse_counts(values):
+    """건수 컬럼 숫자 변환 (변환할 수 없는 값은 결측)"""
+    return pd.to_numeric(values, errors='coerce')
+
+
+def _count_column(values):
+    """건수 컬럼을 nullable 정수(Int64)로 (소수가 있으면 실수 유지)"""
+    numbers = parse_counts(values)
+    try:
+        return numbers.astype('Int64')
+    except (TypeError, ValueError):
+        return numbers
+
+
+def _schema_options(sample, encoding, schema):
+    """CSV 헤더(sample 첫 줄)에서 스키마 컬럼만 골라 (usecols, dtype, 건수 컬럼) 반환 (원래 컬럼명 기준)
+
+    헤더가 sample 안에 끝나지 않거나 스키마 컬럼이 하나도 없으면 None (전체 컬럼을 타입 추론으로 읽음)
+    """
+    text = sample.decode(encoding or 'ascii', errors='ignore')
+    if '\n' not in text and len(sample) >= ENCODING_SAMPLE_BYTES:
+        return None
+    header = next(csv.reader(io.StringIO(text)), [])
+    usecols, dtype, counts = [], {}, []
+    for raw_name in header:
+        name = clean_column_name(raw_name)
+        if name not in schema or raw_name in usecols:
+            continue
+        usecols.append(raw_name)
+        if schema[name] == COUNT_DTYPE:
+            dtype[raw_name] = 'string'
+            counts.append(raw_name)
+        elif schema[name] is not None:
+            dtype[raw_name] = schema[name]
+    return (usecols, dtype, counts) if usecols else None
+
+
+def _arrow_counts(column):
+    """pyarrow 문자열 건수 컬럼을 정수(안 되면 실수)로 변환 (숫자가 아닌 값이 있으면 그대로 두고 읽은 뒤 변환)"""
+    for target in (pa.int64(), pa.float64()):
+        try:
+            return pc.cast(column, target)
+        except pa.ArrowInvalid:
+            continue
+    return column
+
+
+def _read_csv_arrow(source, encoding, options):
+    """pyarrow CSV 리더(멀티스레드)로 스키마 컬럼만 타입을 지정해 읽음 (범주형은 사전 인코딩)"""
+    usecols, dtype, counts = options
+    column_types = {col: _ARROW_TYPES[kind] for col, kind in dtype.items() if kind in _ARROW_TYPES}
+    table = pa_csv.read_csv(
+        source,
+        # UTF-8은 변환 없이 읽음 (BOM은 pyarrow가 건너뜀)
+        read_options=pa_csv.ReadOptions(encoding='utf8' if encoding in (None, 'utf-8-sig') else encoding),
+        # 빈 값은 기본 엔진처럼 결측으로
+        convert_options=pa_csv.ConvertOptions(include_columns=usecols, column_types=column_types,
+                                              strings_can_be_null=True),
+    )
+    for col in counts:
+        table = table.set_column(table.column_names.index(col), col, _arrow_counts(table.column(col)))
+    df = table.to_pandas()
+    # pyarrow가 지원하지 않는 타입은 읽은 뒤 변환
+    for col, kind in dtype.items():
+        if kind not in _ARROW_TYPES and col not in counts:
+            df[col] = df[col].astype(kind)
+    return df
+
+
+def _parse_csv(source, encoding=None, options=None, engine=CSV_ENGINE):
+    """CSV 파싱: 스키마 옵션이 있으면 필요한 컬럼만 타입을 지정해 engine으로, 없으면 기본 엔진으로 전체 컬럼"""
+    if options is None:
+        return pd.read_csv(source, encoding=encoding)
+
+    usecols, dtype, counts = options
+    df = None
+    if engine == 'pyarrow':
+        try:
+            df = _read_csv_arrow(source, encoding, options)
+        except pa.ArrowInvalid:
+            # pyarrow가 처리하지 못하는 형식(열 개수가 다른 행, 잘못된 UTF-8 등)은 기본 엔진으로 다시 읽음
+            source.seek(0)
+    if df is None:
+        df = pd.read_csv(source, encoding=encoding, usecols=usecols, dtype=dtype)
+    for col in counts:
+        df[col] = _count_column(df[col])
+    return df
+
+
+def _read_csv(source, schema=None):
+    """CSV를 (DataFrame, 인코딩)으로 읽음: 앞부분 바이트로 인코딩과 (스키마가 있으면) 읽을 컬럼을 정하고,
+    인코딩이 틀린 경우에만 다른 인코딩으로 다시 읽음"""
+    sample = source.read(ENCODING_SAMPLE_BYTES)
+    source.seek(0)
+    encoding = detect_encoding(sample, final=len(sample) < ENCODING_SAMPLE_BYTES)
+    options = _schema_options(sample, encoding, schema) if schema else None
+    reader = SniffingTextReader(source)
+    try:
+        if encoding is not None:
+            return _parse_csv(source, encoding, options), encoding
+        # 앞부분이 ASCII뿐이면 읽으면서 처음 나온 한글 구간으로 인코딩 결정 (텍스트 스트림이므로 기본 엔진)
+        df = _parse_csv(reader, options=options, engine='c')
+        return df, reader.detected or CSV_ENCODINGS[0]
+    except UnicodeDecodeError:
+        # 앞부분과 뒷부분의 인코딩이 다른 파일: 남은 후보로 처음부터 다시 읽음
+        for fallback in CSV_ENCODINGS:
+            if fallback in (encoding, reader.detected):
+                continue
+            source.seek(0)
+            try:
+                return _parse_csv(source, fallback, options), fallback
+            except UnicodeDecodeError:
+                continue
+        raise
+
+
+def excel_engine():
+    """사용할 Excel 읽기 엔진 ('calamine' 또는 'openpyxl')"""
+    if EXCEL_ENGINE != 'auto':
+        return EXCEL_ENGINE
+    return 'calamine' if importlib.util.find_spec('python_calamine') is not None else 'openpyxl'
+
+
+def list_excel_sheets(source):
+    """xlsx 파일의 시트 이름 목록 (통합 문서 정보만 읽음, CSV이거나 읽을 수 없으면 빈 목록)"""
+    if get_file_name(source).endswith('.csv'):
+        return []
+    try:
+        with zipfile.ZipFile(source) as archive:
+            root = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+    except (zipfile.BadZipFile, KeyError, ElementTree.ParseError, OSError):
+        return []
+    finally:
+        if hasattr(source, 'seek'):
+            source.seek(0)
+    return [sheet.get('name') for sheet in root.iter(f'{_XLSX_NAMESPACE}sheet')]
+
+
+def _openpyxl_rows(source, sheet_name):
+    """openpyxl 읽기 전용 모드로 시트 행을 하나씩 읽음 → (행 iterator, 시트 정보의 행 수 또는 None)
+
+    셀 값 변환은 pd.read_excel과 같음 (빈 셀 '', 오류 셀 NaN, 정수인 실수는 int)
+    """
+    import openpyxl
+    from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+
+    def convert(cell):
+        if cell.value is None:
+            return ''
+        if cell.data_type == TYPE_ERROR:
+            return float('nan')
+        if cell.data_type == TYPE_NUMERIC and int(cell.value) == cell.value:
+            return int(cell.value)
+        return cell.value
+
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True, keep_links=False)
+    sheet = workbook[sheet_name] if sheet_name is not None else workbook.worksheets[0]
+    total = sheet.max_row
+    # 시트에 기록된 크기 정보가 틀린 파일도 끝까지 읽도록 초기화
+    sheet.reset_dimensions()
+
+    def rows():
+        try:
+            for row in sheet.iter_rows():
+                yield [convert(cell) for cell in row]
+        finally:
+            workbook.close()
+    return rows(), total
+
+
+def _calamine_rows(source, sheet_name):
+    """python-calamine(네이티브 리더)으로 시트 행을 하나씩 읽음 → (행 iterator, 행 수)"""
+    from python_calamine import CalamineWorkbook
+
+    def convert(value):
+        if isinstance(value, float) and int(value) == value:
+            return int(value)
+        return value
+
+    if isinstance(source, str):
+        workbook = CalamineWorkbook.from_path(source)
+    else:
+        workbook = CalamineWorkbook.from_filelike(source)
+    sheet = workbook.get_sheet_by_name(sheet_name) if sheet_name is not None else workbook.get_sheet_by_index(0)
+    # iter_rows는 데이터 앞의 빈 열을 건너뛰므로 pd.read_excel처럼 A열부터 오도록 채움
+    start_row, start_col = sheet.start or (0, 0)
+    leading = [''] * start_col
+    rows = (leading + [convert(value) for value in row] for row in sheet.iter_rows())
+    return rows, start_row + sheet.height
+
+
+def _rows_to_frame(header, rows):
+    """헤더 + 행 목록을 pd.read_excel과 같은 타입 추론으로 DataFrame 변환 (짧은 행은 빈 값으로 채움)"""
+    width = max([len(header)] + [len(row) for row in rows])
+    data = [header + [''] * (width - len(header))]
+    data.extend(row + [''] * (width - len(row)) for row in rows)
+    return TextParser(data, header=0).read()
+
+
+def read_excel_chunks(source, sheet_name=None, chunk_rows=EXCEL_CHUNK_ROWS, progress=None):
+    """Excel 시트를 행 단위로 스트리밍해 chunk_rows행마다 타입이 정해진 컬럼으로 변환 (전체 행을 파이썬 객체로 들고 있지 않음)
+
+    sheet_name이 None이면 첫 시트, progress(읽은 행 수, 전체 행 수 또는 None)는 chunk마다 호출
+    """
+    read_rows = _calamine_rows if excel_engine() == 'calamine' else _openpyxl_rows
+    rows, total = read_rows(source, sheet_name)
+
+    frames, chunk, blank_rows, done = [], [], [], 0
+    header = None
+    for row in rows:
+        # 행 끝의 빈 셀 제거, 빈 행은 뒤에 데이터가 있을 때만 포함 (파일 끝의 빈 행 제외)
+        while row and row[-1] == '':
+            row.pop()
+        if header is None:
+            header = row
+            continue
+        if not row:
+            blank_rows.append(row)
+            continue
+        chunk.extend(blank_rows)
+        blank_rows = []
+        chunk.append(row)
+        if len(chunk) >= chunk_rows:
+            frames.append(_rows_to_frame(header, chunk))
+            done += len(chunk)
+            chunk = []
+            if progress is not None:
+                progress(done, total)
+
+    if header is None:
+        return pd.DataFrame()
+    if chunk or not frames:
+        frames.append(_rows_to_frame(header, chunk))
+        done += len(chunk)
+    if progress is not None:
+        progress(done, total)
+    # 컬럼명(빈 헤더는 'Unnamed: 위치')으로 맞춰 합침 (chunk마다 폭이 달라도 같은 위치는 같은 컬럼)
+    return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+
+def read_dataframe(source, schema=None, sheet_name=None, progress=None):
+    """CSV/Excel 파일을 읽어 (DataFrame, 인코딩) 반환 (Excel은 인코딩 None)
+
+    schema({정리된 컬럼명: 타입})가 있으면 CSV는 스키마 컬럼만 지정한 타입으로 읽음,
+    Excel은 sheet_name 시트(없으면 첫 시트)를 스트리밍으로 읽으며 progress에 진행률 보고
+    """
+    if hasattr(source, 'seek'):
+        source.seek(0)
+
+    if get_file_name(source).endswith('.csv'):
+        if isinstance(source, str):
+            with open(source, 'rb') as f:
+                return _read_csv(f, schema)
+        return _read_csv(source, schema)
+
+    if get_file_name(source).endswith('.xls') and excel_engine() != 'calamine':
+        # 예전 .xls 형식은 openpyxl로 스트리밍할 수 없으므로 한 번에 읽음
+        return pd.read_excel(source, sheet_name=sheet_name or 0), None
+    return read_excel_chunks(source, sheet_name, progress=progress), None
+
+
+class ExcelSheet:
+    """Excel 파일의 특정 시트 (첫 시트가 아닌 시트를 고른 경우 load_dataframe에 파일 대신 전달)"""
+
+    file_kind = 'Excel'
+
+    def __init__(self, source, sheet_name):
+        self.source = source
+        self.sheet_name = sheet_name
+        self.name = f"{get_file_name(source)} [{sheet_name}]"
+
+    def cache_key(self):
+        """원본 파일 캐시 키 + 시트 이름"""
+        return f"{source_cache_key(self.source)}:sheet:{self.sheet_name}"
+
+    def load(self, progress=None):
+        """선택한 시트를 읽어 컬럼명을 정리한 (DataFrame, 인코딩 None) 반환"""
+        df, _ = read_dataframe(self.source, sheet_name=self.sheet_name, progress=progress)
+        return clean_column_names(df), None
+
+
+def clean_column_name(name):
+    """컬럼명 하나 정리: 앞뒤 공백, 줄바꿈 제거"""
+    return str(name).strip().replace('\n', '').replace('\r', '')
+
+
+def clean_column_names(df):
+    """컬럼명 정리: 공백, 줄바꿈, 특수문자 제거"""
+    df.columns = [clean_column_name(col) for col in df.columns]
+    return df
+
+
+def sidecar_path(path):
+    """원본 파일에 대응하는 Parquet 스냅샷 경로"""
+    return path + SIDECAR_SUFFIX
+
+
+def _source_signature(path):
+    """스냅샷 유효성 확인용 원본 파일 서명 (수정시각 + 크기)"""
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}:{stat.st_size}".encode()
+
+
+def normalize_object_columns(df):
+    """숫자/문자가 섞인 object 컬럼을 문자열로 통일 (Parquet 저장용)"""
+    for col in df.columns[df.dtypes == object]:
+        values = df[col]
+        df[col] = values.where(values.isna(), values.astype(str))
+    return df
+
+
+def _schema_tag(schema):
+    """스냅샷 메타데이터에 기록하는 스키마 식별값 (스키마가 바뀌면 스냅샷을 다시 만듦)"""
+    return json.dumps(schema, ensure_ascii=False, sort_keys=True).encode() if schema else b''
+
+
+def _current_sidecar_metadata(path, schema=None):
+    """원본과 스키마가 바뀌지 않은 스냅샷이 있으면 그 메타데이터, 아니면 None"""
+    snapshot = sidecar_path(path)
+    if not os.path.exists(snapshot):
+        return None
+    try:
+        metadata = pq.read_schema(snapshot).metadata or {}
+    except Exception:
+        return None
+    if metadata.get(SIDECAR_SOURCE_KEY) != _source_signature(path):
+        return None
+    if metadata.get(SIDECAR_SCHEMA_KEY, b'') != _schema_tag(schema):
+        return None
+    return metadata
+
+
+def sidecar_is_current(path, schema=None):
+    """유효한 스냅샷이 있는지 (스냅샷 데이터는 읽지 않음)"""
+    return _current_sidecar_metadata(path, schema) is not None
+
+
+def read_sidecar(path, schema=None):
+    """원본과 스키마가 바뀌지 않았으면 스냅샷에서 (DataFrame, 인코딩) 반환, 아니면 None"""
+    metadata = _current_sidecar_metadata(path, schema)
+    if metadata is None:
+        return None
+    try:
+        df = pq.read_table(sidecar_path(path)).to_pandas()
+    except Exception:
+        return None
+    encoding = metadata.get(SIDECAR_ENCODING_KEY, b'').decode() or None
+    return df, encoding
+
+
+def write_sidecar(path, df, encoding, schema=None):
+    """정리된 DataFrame을 원본 옆에 Parquet 스냅샷으로 저장 (실패 시 무시)"""
+    snapshot = sidecar_path(path)
+    tmp_path = f"{snapshot}.{os.getpid()}.tmp"
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[SIDECAR_SOURCE_KEY] = _source_signature(path)
+        metadata[SIDECAR_ENCODING_KEY] = (encoding or '').encode()
+        metadata[SIDECAR_SCHEMA_KEY] = _schema_tag(schema)
+        pq.write_table(table.replace_schema_metadata(metadata), tmp_path)
+        os.replace(tmp_path, snapshot)
+    except Exception:
+        # 읽기 전용 배포 환경 등에서는 스냅샷 없이 동작
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_default_file(path, schema=None, progress=None):
+    """기본 파일 로드: 유효한 스냅샷이 있으면 사용하고, 없으면 원본을 읽어 스냅샷 생성"""
+    cached = read_sidecar(path, schema)
+    if cached is not None:
+        return cached
+
+    df, encoding = read_dataframe(path, schema, progress=progress)
+    if df is not None and not df.empty:
+        df = normalize_object_columns(clean_column_names(df))
+        write_sidecar(path, df, encoding, schema)
+    return df, encoding
+
+
+def convert_dimensions_to_categorical(df, columns=DIMENSION_COLUMNS):
+    """차원 컬럼을 정렬된 범주형(Categorical)으로 변환 (사이드바 정렬 순서와 동일)"""
+    for col in columns:
+        if col not in df.columns:
+            continue
+        values = df[col]
+        try:
+            categories = sorted(values.dropna().unique())
+        except TypeError:
+            categories = sorted(values.dropna().unique(), key=str)
+        df[col] = pd.Categorical(values, categories=categories)
+    return df
+
+
+def find_sales_columns(columns):
+    """파일1 표준 컬럼명 → 실제 컬럼명 매핑 (공백/접두어가 다른 컬럼명도 인식, 찾지 못한 컬럼은 빠짐)"""
+    column_mapping = {}
+    for col in ['연도', '월', '영업채널']:
+        if col in columns:
+            column_mapping[col] = col
+
+    # 제품 컬럼 찾기
+    for col in columns:
+        if '제품계층구조1' in col or '제품계층구조 1' in col:
+            column_mapping['제품계층구조1'] = col
+        if '제품계층구조2' in col or '제품계층구조 2' in col:
+            column_mapping['제품계층구조2'] = col
+        if '제품명' in col:
+            column_mapping['제품명'] = col
+
+    # 렌탈 건수 컬럼 찾기
+    for col in columns:
+        if '총렌탈' in col and '건' in col:
+            column_mapping['총렌탈(건)'] = col
+        elif col == '렌탈(건)' or (('렌탈' in col or '신규' in col) and '건' in col and '총' not in col and '재' not in col):
+            column_mapping['렌탈(건)'] = col
+        elif '재렌탈' in col and '건' in col:
+            column_mapping['재렌탈(건)'] = col
+    return column_mapping
+
+
+def _parse_year_month(df):
+    """'2025년' → '2025', '1월' → '1' 정리 후 월_숫자 생성 (변환할 수 없는 행 제외) → (df, 제외 행 수)"""
+    df['연도'] = df['연도'].astype(str).str.replace('년', '').str.strip()
+    df['월'] = df['월'].astype(str).str.replace('월', '').str.strip()
+    df['월_숫자'] = pd.to_numeric(df['월'], errors='coerce')
+    dropped = int(df['월_숫자'].isna().sum())
+    df = df.dropna(subset=['월_숫자'])
+    df['월_숫자'] = df['월_숫자'].astype(int)
+    return df, dropped
+
+
+def prepare_sales_frame(df, column_mapping):
+    """파일1 전처리: 컬럼명 표준화, 연도/월 정리, 렌탈 건수 숫자 변환, 차원 컬럼 범주형 변환"""
+    df = df.rename(columns={v: k for k, v in column_mapping.items()})
+    df, _ = _parse_year_month(df)
+    for col in ['총렌탈(건)', '렌탈(건)', '재렌탈(건)']:
+        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+    return convert_dimensions_to_categorical(df)
+
+
+def prepare_contracts_frame(df):
+    """파일2 전처리 → (DataFrame, 월 변환 실패로 제외한 행 수) ('지정되지 않음' 등은 '미지정'으로 통일)"""
+    df, dropped = _parse_year_month(df.copy(deep=False))
+    for col in CONTRACTS_COUNT_COLUMNS:
+        df[col] = parse_counts(df[col]).fillna(0)
+    for col in ['약정기간', '리스구분', '비용구분']:
+        df[col] = df[col].astype(str).str.strip()
+        df[col] = df[col].replace(['지정되지 않음', 'nan', 'NaN', 'None', ''], '미지정')
+    return convert_dimensions_to_categorical(df), dropped
+
+
+def present_categories(series):
+    """범주형 컬럼에서 실제 존재하는 값만 범주 순서대로 반환"""
+    return series.cat.remove_unused_categories().cat.categories.tolist()
+
+
+def diagnostics_enabled():
+    """진단 모드 여부: URL 쿼리 ?diagnostics=1 또는 환경 변수 DASHBOARD_DIAGNOSTICS=1"""
+    flag = st.query_params.get('diagnostics') or os.environ.get('DASHBOARD_DIAGNOSTICS', '')
+    return str(flag).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def build_schema_report(df):
+    """컬럼별 이름 길이/repr, 타입, 결측 수, 샘플값을 한 표로 정리"""
+    rows = []
+    for col in df.columns:
+        values = df[col]
+        non_null = values.dropna()
+        rows.append({
+            '컬럼': col,
+            '길이': len(col),
+            'repr': repr(col),
+            '타입': str(values.dtype),
+            '결측': int(values.isna().sum()),
+            '샘플값': str(non_null.iloc[0]) if len(non_null) else ''
+        })
+    return pd.DataFrame(rows, index=pd.RangeIndex(1, len(rows) + 1))
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def get_schema_report(cache_key, _df):
+    """로드된 파일(cache_key)마다 한 번만 컬럼 진단표를 생성"""
+    return build_schema_report(_df)
+
+
+def load_source(source, schema=None, progress=None):
+    """파일을 읽고 컬럼명을 정리하여 (DataFrame, 인코딩) 반환 (캐시 없음, dataset_cache.load_dataframe에서 사용)
+
+    progress(읽은 양, 전체 또는 None)는 Excel/파티션처럼 나눠 읽는 경우에 호출
+    """
+    if isinstance(source, str):
+        return load_default_file(source, schema, progress)
+
+    if hasattr(source, 'load'):
+        return source.load(progress)
+
+    df, encoding = read_dataframe(source, schema, progress=progress)
+    if df is not None and not df.empty:
+        df = clean_column_names(df)
+    return df, encoding
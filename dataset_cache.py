@@ -0,0 +1,306 @@
+"""로드된 데이터셋 캐시와 메모리 사용량 계산 (세션별/전체 메모리 한도, 가장 오래 사용하지 않은 데이터셋부터 제거)"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_loader import (CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS, MEMORY_BUDGET_MB, SESSION_IDLE_SECONDS,
+                         SESSION_MEMORY_BUDGET_MB, get_file_name, load_source, source_cache_key)
+from timing import session_id
+
+_MB = 1024 * 1024
+_FRAMES_KEY = '_memory_frames'
+# 메모리 한도를 넘어 거절한 파일을 기억하는 개수 (재실행마다 다시 읽지 않음)
+_REJECTED_ENTRIES = 64
+
+
+class MemoryBudgetError(MemoryError):
+    """데이터셋 하나가 메모리 한도보다 커서 캐시에 올릴 수 없음"""
+
+
+def deep_memory_bytes(obj, _depth=0):
+    """DataFrame/Series는 문자열 등 객체 내용까지 포함한 메모리, 배열은 nbytes, 인덱스 객체 등은 속성 합계 (근삿값)"""
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True, index=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if _depth >= 5:
+        return sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(deep_memory_bytes(value, _depth + 1) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sys.getsizeof(obj) + sum(deep_memory_bytes(value, _depth + 1) for value in obj)
+    if hasattr(obj, '__dict__'):
+        return deep_memory_bytes(vars(obj), _depth + 1)
+    return sys.getsizeof(obj)
+
+
+def to_mb(nbytes):
+    """바이트 → MB (소수 첫째 자리)"""
+    return round(nbytes / _MB, 1)
+
+
+class DatasetCache:
+    """파일 캐시 키별 로드 결과를 메모리 크기 기준 LRU로 보관 (세션 간 공유, 스레드 안전)
+
+    세션 한도는 그 세션만 사용하는 데이터셋에만 적용하고, session_ttl 동안 사용하지 않은 세션은 사용 세션에서 제외
+    """
+
+    def __init__(self, max_bytes=None, session_max_bytes=None, max_entries=None, ttl=None, session_ttl=None):
+        self.max_bytes = max_bytes
+        self.session_max_bytes = session_max_bytes
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.session_ttl = session_ttl
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading = {}
+        self._rejected = OrderedDict()
+
+    def get_or_load(self, key, load, session, name=''):
+        """key의 (DataFrame, 인코딩) 반환 (없으면 load()로 읽고 한도를 넘는 만큼 오래된 데이터셋 제거)"""
+        cached = self._get(key, session)
+        if cached is not None:
+            return cached
+
+        # 같은 파일을 여러 세션(또는 미리 로드 스레드)이 동시에 요청하면 한 번만 읽고 나머지는 기다림
+        with self._lock:
+            loading = self._loading.setdefault(key, threading.Lock())
+        with loading:
+            cached = self._get(key, session)
+            if cached is not None:
+                return cached
+            try:
+                return self._load(key, load, session, name)
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+
+    def get(self, key, session):
+        """이미 캐시된 (DataFrame, 인코딩) 또는 None (읽지 않음, 한도를 넘어 거절한 파일은 MemoryBudgetError)"""
+        return self._get(key, session)
+
+    def _get(self, key, session):
+        """캐시된 (DataFrame, 인코딩) 또는 None (사용 시각/세션 갱신, 한도를 넘어 거절한 파일은 MemoryBudgetError)"""
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(key)
+            if entry is None:
+                if key in self._rejected:
+                    raise MemoryBudgetError(self._rejected[key])
+                return None
+            self._entries.move_to_end(key)
+            entry['last_used'] = time.monotonic()
+            entry['sessions'][session] = entry['last_used']
+            return entry['value']
+
+    def _load(self, key, load, session, name):
+        """load()로 읽어 메모리 한도 확인 후 캐시에 추가"""
+        df, encoding = load()
+        size = deep_memory_bytes(df) if df is not None else 0
+        self._check_budget(key, size, '데이터')
+
+        with self._lock:
+            if key in self._entries:
+                self.total_bytes -= self._entries.pop(key)['bytes']
+            now = time.monotonic()
+            self._entries[key] = {
+                'value': (df, encoding), 'bytes': size, 'name': name, 'derived': {},
+                'sessions': {session: now}, 'last_used': now, 'lock': threading.Lock(),
+            }
+            self.total_bytes += size
+            self._evict(key, session)
+        return df, encoding
+
+    def _check_budget(self, key, size, what):
+        """데이터셋 하나의 크기가 세션/전체 한도를 넘으면 거절 목록에 기록하고 MemoryBudgetError"""
+        for limit, label in [(self.session_max_bytes, '세션'), (self.max_bytes, '전체')]:
+            if limit is not None and size > limit:
+                message = f"{what} 크기 {to_mb(size)}MB가 {label} 메모리 한도 {to_mb(limit)}MB를 넘습니다"
+                with self._lock:
+                    self._rejected[key] = message
+                    while len(self._rejected) > _REJECTED_ENTRIES:
+                        self._rejected.popitem(last=False)
+                raise MemoryBudgetError(message)
+
+    def derive(self, key, name, build, session=None):
+        """key 데이터셋에서 만든 구조(정리된 프레임, 큐브, 인덱스 등)를 데이터셋당 한 번만 생성해 공유 (읽기 전용)
+
+        원본과 파생 구조를 합한 크기가 한도를 넘으면 데이터셋을 캐시에서 내리고 MemoryBudgetError
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            rejected = self._rejected.get(key)
+        if entry is None:
+            if rejected is not None:
+                raise MemoryBudgetError(rejected)
+            # 데이터셋이 캐시에서 제거된 경우 공유하지 않고 이번 실행용으로만 생성
+            return build()
+
+        # 같은 데이터셋의 구조는 한 세션만 만들고 나머지 세션은 기다렸다가 결과를 사용
+        with entry['lock']:
+            if name not in entry['derived']:
+                value = build()
+                size = deep_memory_bytes(value)
+                try:
+                    self._check_budget(key, entry['bytes'] + size, '데이터와 파생 구조')
+                except MemoryBudgetError:
+                    with self._lock:
+                        if self._entries.get(key) is entry:
+                            self.total_bytes -= self._entries.pop(key)['bytes']
+                    raise
+                with self._lock:
+                    entry['derived'][name] = (value, size)
+                    if self._entries.get(key) is entry:
+                        entry['bytes'] += size
+                        self.total_bytes += size
+                        self._evict(key, session)
+            return entry['derived'][name][0]
+
+    def _expire(self):
+        """session_ttl 동안 사용하지 않은 세션을 사용 세션에서 제외하고, ttl 동안 사용하지 않은 데이터셋 제거"""
+        now = time.monotonic()
+        if self.session_ttl is not None:
+            for entry in self._entries.values():
+                for session in [s for s, last_used in entry['sessions'].items() if now - last_used > self.session_ttl]:
+                    del entry['sessions'][session]
+        if self.ttl is None:
+            return
+        for key in [key for key, entry in self._entries.items() if now - entry['last_used'] > self.ttl]:
+            self.total_bytes -= self._entries.pop(key)['bytes']
+
+    def _evict(self, keep, session):
+        """세션 한도 → 전체 한도/개수 순으로, 오래 사용하지 않은 데이터셋부터 제거 (방금 넣은 keep은 유지)"""
+        if self.session_max_bytes is not None:
+            # 이 세션만 사용하는 데이터셋 중 오래된 것부터 (다른 세션도 쓰는 데이터셋은 한도에 포함하지 않고 제거하지 않음)
+            for key in [key for key, entry in self._entries.items() if entry['sessions'].keys() == {session}]:
+                if self._session_bytes(session) <= self.session_max_bytes:
+                    break
+                if key != keep:
+                    self.total_bytes -= self._entries.pop(key)['bytes']
+
+        for key in list(self._entries):
+            over_bytes = self.max_bytes is not None and self.total_bytes > self.max_bytes
+            over_count = self.max_entries is not None and len(self._entries) > self.max_entries
+            if not (over_bytes or over_count):
+                break
+            if key != keep:
+                self.total_bytes -= self._entries.pop(key)['bytes']
+
+    def _session_bytes(self, session):
+        """session만 사용하는 데이터셋 메모리 합계 (잠금 안에서 호출)"""
+        return sum(entry['bytes'] for entry in self._entries.values() if entry['sessions'].keys() == {session})
+
+    def session_bytes(self, session):
+        """session만 사용하는 데이터셋 메모리 합계 (여러 세션이 공유하는 데이터셋은 제외)"""
+        with self._lock:
+            self._expire()
+            return self._session_bytes(session)
+
+    def report(self, session=None):
+        """캐시된 데이터셋 목록 (오래 사용하지 않은 순)"""
+        now = time.monotonic()
+        with self._lock:
+            self._expire()
+            rows = [{
+                '파일': entry['name'],
+                '메모리(MB)': to_mb(entry['bytes']),
+                '사용 세션 수': len(entry['sessions']),
+                '이 세션': session in entry['sessions'],
+                '마지막 사용(초 전)': int(now - entry['last_used']),
+            } for entry in self._entries.values()]
+        return pd.DataFrame(rows, columns=['파일', '메모리(MB)', '사용 세션 수', '이 세션', '마지막 사용(초 전)'])
+
+    def __len__(self):
+        return len(self._entries)
+
+
+@st.cache_resource(show_spinner=False)
+def get_dataset_cache():
+    """프로세스 전체에서 공유하는 데이터셋 캐시 (DASHBOARD_MEMORY_MB, DASHBOARD_SESSION_MEMORY_MB, DASHBOARD_SESSION_IDLE)"""
+    return DatasetCache(
+        MEMORY_BUDGET_MB * _MB if MEMORY_BUDGET_MB is not None else None,
+        SESSION_MEMORY_BUDGET_MB * _MB if SESSION_MEMORY_BUDGET_MB is not None else None,
+        CACHE_MAX_ENTRIES,
+        CACHE_TTL_SECONDS,
+        SESSION_IDLE_SECONDS,
+    )
+
+
+def load_dataframe(source, schema=None, progress=None, parse=load_source):
+    """파일을 읽고 컬럼명을 정리하여 (DataFrame, 인코딩) 반환 (재실행/다른 세션은 캐시 사용, schema는 CSV 읽기 스키마)
+
+    캐시에 없으면 parse(source, schema, progress)로 읽음 (progress는 이때만 호출됨)
+    """
+    df, encoding = get_dataset_cache().get_or_load(
+        source_cache_key(source), lambda: parse(source, schema, progress), session_id(), get_file_name(source)
+    )
+    # 얕은 복사: 컬럼 교체/추가가 캐시된 원본에 반영되지 않도록 (데이터 배열은 공유)
+    return (df.copy(deep=False) if df is not None else None), encoding
+
+
+def cached_dataframe(source):
+    """이미 캐시된 파일이면 load_dataframe과 같은 (DataFrame, 인코딩), 아니면 None (파일을 읽지 않음)"""
+    cached = get_dataset_cache().get(source_cache_key(source), session_id())
+    if cached is None:
+        return None
+    df, encoding = cached
+    return (df.copy(deep=False) if df is not None else None), encoding
+
+
+def derive_dataset(dataset_key, name, build):
+    """로드된 데이터셋(dataset_key)의 파생 구조를 모든 세션이 공유 (build는 데이터셋당 한 번 실행)"""
+    return get_dataset_cache().derive(dataset_key, name, build, session_id())
+
+
+def begin_session_frames():
+    """새 실행 시작: 이전 실행의 작업 프레임 기록은 같은 키일 때 재사용하도록 보관"""
+    previous = st.session_state.get(_FRAMES_KEY, {})
+    st.session_state[_FRAMES_KEY] = {}
+    st.session_state[f"{_FRAMES_KEY}_previous"] = previous
+
+
+def track_frame(name, frame, key):
+    """이번 실행에서 세션이 만든 작업 프레임(정리된 데이터, 필터 결과 등) 메모리 기록 (key가 같으면 재계산 생략)"""
+    frames = st.session_state.setdefault(_FRAMES_KEY, {})
+    previous = st.session_state.get(f"{_FRAMES_KEY}_previous", {})
+    for known in (frames, previous):
+        if name in known and known[name][0] == key:
+            frames[name] = known[name]
+            return
+    frames[name] = (key, deep_memory_bytes(frame))
+
+
+def session_memory():
+    """이 세션의 메모리 요약 (작업 프레임별, 데이터셋 캐시 중 이 세션만 사용하는 분, 합계; MB, 세션 한도는 데이터셋에만 적용)"""
+    cache = get_dataset_cache()
+    frames = {name: to_mb(nbytes) for name, (_, nbytes) in st.session_state.get(_FRAMES_KEY, {}).items()}
+    datasets = to_mb(cache.session_bytes(session_id()))
+    return {
+        'frames': frames,
+        'datasets': datasets,
+        'session_total': round(datasets + sum(frames.values()), 1),
+        'cache_total': to_mb(cache.total_bytes),
+    }
+
+
+def render_memory_panel():
+    """사이드바에 데이터셋 캐시와 이 세션의 메모리 사용량 표시 (진단 모드)"""
+    cache = get_dataset_cache()
+    summary = session_memory()
+    budget = f" / {MEMORY_BUDGET_MB}MB" if MEMORY_BUDGET_MB is not None else ""
+    session_budget = f" / {SESSION_MEMORY_BUDGET_MB}MB" if SESSION_MEMORY_BUDGET_MB is not None else ""
+    with st.sidebar.expander(f"💾 메모리 ({summary['cache_total']}MB{budget})", expanded=False):
+        st.caption(f"이 세션: 단독 사용 데이터셋 {summary['datasets']}MB{session_budget} (한도 적용), "
+                   f"작업 프레임 포함 합계 {summary['session_total']}MB (공유 차트/CSV 캐시, 저장소 모드 쿼리 결과 제외)")
+        st.dataframe(cache.report(session_id()), use_container_width=True, hide_index=True)
+        if summary['frames']:
+            frames = pd.DataFrame({'작업 프레임': list(summary['frames']), '메모리(MB)': list(summary['frames'].values())})
+            st.dataframe(frames, use_container_width=True, hide_index=True)
@@ -0,0 +1,86 @@
+"""차트(Plotly Figure) 캐시 (같은 파일/섹션/필터 선택이면 차트를 다시 만들거나 직렬화하지 않음)"""
+import json
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+from data_loader import FIGURE_CACHE_MAX_MB
+
+
+def selection_key(selection):
+    """{컬럼: 선택값 목록}을 선택 순서와 무관한 해시 가능 키로 정규화"""
+    return tuple(sorted(
+        (col, tuple(sorted(map(str, values)))) for col, values in selection.items()
+    ))
+
+
+class FigureCache:
+    """생성된 차트를 직렬화한 JSON 스펙으로 스펙 크기 기준 LRU 보관 (세션 간 공유, 스레드 안전)
+
+    변경 가능한 Figure 객체 대신 문자열을 보관하므로 세션/스레드가 공유해도 서로 영향을 주지 않음
+    """
+
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, build):
+        """key의 JSON 스펙 반환 (없으면 build()로 만든 Figure를 한 번 직렬화해 저장, build가 None이면 데이터 없음으로 저장)"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key][0]
+
+        figure = build()
+        spec = figure.to_json() if figure is not None else None
+        size = len(spec.encode('utf-8')) if spec is not None else 0
+
+        with self._lock:
+            if key in self._entries:
+                self.total_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (spec, size)
+            self.total_bytes += size
+            # 가장 오래 사용하지 않은 차트부터 제거 (방금 넣은 차트는 유지)
+            while self.max_bytes is not None and self.total_bytes > self.max_bytes and len(self._entries) > 1:
+                self.total_bytes -= self._entries.popitem(last=False)[1][1]
+        return spec
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_spec_figure_type = None
+
+
+def spec_figure(spec):
+    """캐시된 JSON 스펙을 st.plotly_chart에 넘길 Figure로 감쌈 (plotly는 처음 표시할 때 import)
+
+    st.plotly_chart는 Figure의 to_dict() 결과만 직렬화하므로, 스펙을 풀어 바로 돌려주면
+    Figure 복사(to_dict)와 dict 재검증을 건너뜀
+    """
+    global _spec_figure_type
+    if _spec_figure_type is None:
+        from plotly.basedatatypes import BaseFigure
+
+        class SpecFigure(BaseFigure):
+            """직렬화된 스펙만 가진 Figure (to_dict만 지원, 호출마다 새 dict를 풀어 반환)"""
+
+            def __init__(self, spec):
+                # BaseFigure 초기화(트레이스 생성/검증)는 건너뜀
+                self._spec = spec
+
+            def to_dict(self):
+                return json.loads(self._spec)
+
+        _spec_figure_type = SpecFigure
+    return _spec_figure_type(spec)
+
+
+@st.cache_resource(show_spinner=False)
+def get_figure_cache():
+    """프로세스 전체에서 공유하는 차트 캐시 (DASHBOARD_FIGURE_CACHE_MB, 0이면 제한 없음)"""
+    max_bytes = FIGURE_CACHE_MAX_MB * 1024 * 1024 if FIGURE_CACHE_MAX_MB is not None else None
+    return FigureCache(max_bytes)
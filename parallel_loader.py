@@ -0,0 +1,273 @@
+"""파일1/파일2 읽기와 전처리를 스레드 풀에서 동시에 실행 (화면 코드는 Future로 결과를 기다림)
+
+Excel 셀 변환은 GIL을 잡고 있어 스레드로는 겹치지 않으므로 별도 프로세스에서 파싱
+"""
+import itertools
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+import streamlit as st
+
+from analytical_store import get_analytical_store, load_contracts_table, load_sales_table
+from analytics import (DETAIL_COLUMNS_F1, DETAIL_COLUMNS_F2, FILE1_FILTER_COLUMNS, FILE2_FILTER_COLUMNS,
+                       detail_sort_keys, get_filter_index, get_sales_cube, get_sort_index)
+from data_loader import (CONTRACTS_CSV_SCHEMA, CONTRACTS_REQUIRED_COLUMNS, LOAD_WORKERS, PARSE_PROCESSES,
+                         SALES_REQUIRED_COLUMNS, find_sales_columns, get_file_kind, get_file_name, load_source,
+                         prepare_contracts_frame, prepare_sales_frame, sidecar_is_current, source_cache_key)
+from dataset_cache import cached_dataframe, derive_dataset, load_dataframe
+from product_search import get_product_search_index
+from timing import session_id, use_session
+
+logger = logging.getLogger(__name__)
+
+# 로드를 기다리는 동안 진행률을 갱신하는 간격 (초)
+LOAD_POLL_SECONDS = 0.2
+
+# 파싱 프로세스 안에서 진행률을 보내는 큐 (프로세스 시작 시 설정)
+_process_progress_queue = None
+
+
+def _init_parse_process(progress_queue):
+    """파싱 프로세스 초기화: 진행률 큐 설정"""
+    global _process_progress_queue
+    _process_progress_queue = progress_queue
+
+
+def _parse_in_process(load_id, source, schema):
+    """파싱 프로세스에서 load_source 실행 (진행률은 (load_id, 읽은 양, 전체)로 큐에 보냄)"""
+    def progress(done, total):
+        _process_progress_queue.put((load_id, done, total))
+    return load_source(source, schema, progress)
+
+
+class ParsePool:
+    """Excel 파싱용 프로세스 풀 (결과 DataFrame은 pickle로 전달, 진행률은 큐로 받아 호출한 스레드의 progress에 전달)
+
+    프로세스는 파싱이 있을 때만 시작하고, 진행 중인 파싱이 모두 끝나면 종료
+    """
+
+    def __init__(self, processes):
+        self.processes = processes
+        self._context = multiprocessing.get_context('spawn')
+        self._progress_queue = self._context.Queue()
+        self._callbacks = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._executor = None
+        self._active = 0
+        threading.Thread(target=self._forward_progress, name='dashboard-parse-progress', daemon=True).start()
+
+    def _new_executor(self):
+        # 서버 프로세스는 스레드가 많으므로 fork 대신 spawn으로 새 인터프리터 시작
+        return ProcessPoolExecutor(self.processes, mp_context=self._context,
+                                   initializer=_init_parse_process, initargs=(self._progress_queue,))
+
+    def _forward_progress(self):
+        """파싱 프로세스가 보낸 진행률을 해당 로드의 progress로 전달 (이미 끝난 로드의 진행률은 버림)"""
+        while True:
+            load_id, done, total = self._progress_queue.get()
+            callback = self._callbacks.get(load_id)
+            if callback is not None:
+                callback(done, total)
+
+    def load(self, source, schema=None, progress=None):
+        """load_source(source, schema)를 파싱 프로세스에서 실행하고 끝날 때까지 기다려 (DataFrame, 인코딩) 반환"""
+        load_id = next(self._ids)
+        if progress is not None:
+            self._callbacks[load_id] = progress
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._new_executor()
+            executor = self._executor
+            self._active += 1
+        try:
+            return executor.submit(_parse_in_process, load_id, source, schema).result()
+        except BrokenProcessPool:
+            # 파싱 프로세스가 비정상 종료(메모리 부족 등)되면 다음 로드 때 풀을 새로 만들도록 버리고 오류 전달
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            raise
+        finally:
+            self._callbacks.pop(load_id, None)
+            with self._lock:
+                self._active -= 1
+                # 진행 중인 파싱이 없으면 프로세스 종료 (파싱 중 늘어난 메모리를 쥔 채 대기하지 않음, 다음 파싱 때 새로 시작)
+                if self._active == 0 and self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                    self._executor = None
+
+
+@st.cache_resource(show_spinner=False)
+def get_parse_pool():
+    """프로세스 전체에서 공유하는 Excel 파싱 프로세스 풀 (DASHBOARD_PARSE_PROCESSES, 0이면 None)"""
+    if PARSE_PROCESSES is None:
+        return None
+    return ParsePool(PARSE_PROCESSES)
+
+
+def parse_source(source, schema=None, progress=None):
+    """파일 읽기: Excel은 파싱 프로세스에서 (기본 파일은 유효한 스냅샷이 없을 때만), 나머지는 이 스레드에서
+
+    CSV(pyarrow)와 Parquet 읽기는 GIL을 놓고 실행되므로 스레드만으로 다른 파일 로드와 겹침
+    """
+    pool = get_parse_pool()
+    if (pool is None or get_file_kind(source) != 'Excel'
+            or (isinstance(source, str) and sidecar_is_current(source, schema))):
+        return load_source(source, schema, progress)
+    return pool.load(source, schema, progress)
+
+
+def prepare_sales_derived(source, raw):
+    """파일1 전처리 → 큐브/필터 인덱스/정렬 인덱스 (앱과 같은 캐시 키, 필수 컬럼이 없으면 건너뜀)"""
+    column_mapping = find_sales_columns(raw.columns)
+    if any(key not in column_mapping for key in SALES_REQUIRED_COLUMNS):
+        return
+
+    dataset_key = source_cache_key(source)
+    df = derive_dataset(dataset_key, 'sales', lambda: prepare_sales_frame(raw, column_mapping))
+    cube = get_sales_cube(dataset_key, df)
+    get_filter_index(dataset_key, 'cube', cube, FILE1_FILTER_COLUMNS)
+    get_filter_index(dataset_key, 'rows', df, FILE1_FILTER_COLUMNS)
+    get_sort_index(dataset_key, 'rows', df, detail_sort_keys(DETAIL_COLUMNS_F1))
+
+
+def prepare_contracts_derived(source, raw):
+    """파일2 전처리 → 필터 인덱스/제품명 검색 인덱스/정렬 인덱스 (필수 컬럼이 없으면 건너뜀)"""
+    if any(col not in raw.columns for col in CONTRACTS_REQUIRED_COLUMNS):
+        return
+
+    dataset_key = source_cache_key(source)
+    df, _ = derive_dataset(dataset_key, 'contracts', lambda: prepare_contracts_frame(raw))
+    get_filter_index(dataset_key, 'rows', df, FILE2_FILTER_COLUMNS)
+    get_product_search_index(dataset_key, df['제품명'])
+    get_sort_index(dataset_key, 'rows', df, detail_sort_keys(DETAIL_COLUMNS_F2))
+
+
+def prepare_sales_table(raw):
+    """분석 저장소 적재용 파일1 전처리 → (정리된 프레임, 0) (필수 컬럼이 없으면 ValueError)"""
+    column_mapping = find_sales_columns(raw.columns)
+    missing_keys = [key for key in SALES_REQUIRED_COLUMNS if key not in column_mapping]
+    if missing_keys:
+        raise ValueError(f"필수 컬럼을 찾을 수 없습니다: {', '.join(missing_keys)} "
+                         f"(현재 파일의 컬럼명: {', '.join(map(str, raw.columns))})")
+    return prepare_sales_frame(raw, column_mapping), 0
+
+
+def prepare_contracts_table(raw):
+    """분석 저장소 적재용 파일2 전처리 → (정리된 프레임, 월 변환 실패로 제외한 행 수) (필수 컬럼이 없으면 ValueError)"""
+    missing_cols = [col for col in CONTRACTS_REQUIRED_COLUMNS if col not in raw.columns]
+    if missing_cols:
+        raise ValueError(f"파일2에 필수 컬럼이 없습니다: {', '.join(missing_cols)}")
+    return prepare_contracts_frame(raw)
+
+
+# 파일 종류별 (CSV 읽기 스키마, 읽은 뒤 미리 만들 파생 구조, 저장소 적재용 전처리, 저장소 적재 함수)
+LOADERS = {
+    'sales': (None, prepare_sales_derived, prepare_sales_table, load_sales_table),
+    'contracts': (CONTRACTS_CSV_SCHEMA, prepare_contracts_derived, prepare_contracts_table, load_contracts_table),
+}
+
+
+def load_prepared(source, kind, progress=None):
+    """파일을 읽고 (캐시 공유) 전처리/인덱스까지 만들어 둔 뒤 원본 (DataFrame, 인코딩) 반환
+
+    읽기 오류는 그대로 전달, 전처리 오류는 화면 실행에서 같은 단계를 다시 실행하며 표시하므로 여기서는 기록만 함
+    """
+    schema, prepare_derived, _, _ = LOADERS[kind]
+    raw, encoding = load_dataframe(source, schema, progress, parse_source)
+    if raw is not None and not raw.empty:
+        try:
+            prepare_derived(source, raw)
+        except Exception as e:
+            logger.warning("전처리 미리 실행 실패 (%s): %s", get_file_name(source), e)
+    return raw, encoding
+
+
+def load_into_store(store, source, kind, progress=None):
+    """분석 저장소 사용 시: 파일을 읽어 전처리한 뒤 저장소에 적재하고 테이블 반환 (이미 적재된 파일은 읽지 않음)
+
+    원본/정리된 프레임은 데이터셋 캐시에 올리지 않고 적재 후 버림, 읽기/전처리 오류는 그대로 전달
+    """
+    schema, _, prepare_table, load_table = LOADERS[kind]
+
+    def build():
+        raw, _ = parse_source(source, schema, progress)
+        if raw is None or raw.empty:
+            raise ValueError("파일이 비어있거나 읽을 수 없습니다")
+        return prepare_table(raw)
+
+    return load_table(store, source_cache_key(source), build)
+
+
+@st.cache_resource(show_spinner=False)
+def get_load_executor():
+    """프로세스 전체에서 공유하는 로드용 스레드 풀 (DASHBOARD_LOAD_WORKERS)"""
+    return ThreadPoolExecutor(max_workers=LOAD_WORKERS, thread_name_prefix='dashboard-load')
+
+
+class DatasetLoad:
+    """백그라운드에서 진행 중인 파일 로드 하나 (Future와 진행률)"""
+
+    def __init__(self, source, kind):
+        self.source = source
+        self.kind = kind
+        self.done = 0
+        self.total = None
+        self.future = None
+
+    def report(self, done, total):
+        """작업 스레드에서 진행률 기록 (Excel은 청크마다, 파티션은 파티션마다)"""
+        self.done, self.total = done, total
+
+    def result(self, on_progress=None):
+        """로드가 끝날 때까지 기다려 결과((DataFrame, 인코딩) 또는 StoreTable) 반환 (기다리는 동안 on_progress(읽은 양, 전체)로 진행률 전달)"""
+        while True:
+            try:
+                return self.future.result(timeout=LOAD_POLL_SECONDS)
+            except FutureTimeoutError:
+                if on_progress is not None and self.total:
+                    on_progress(self.done, self.total)
+
+
+def _run_load(session, source, kind, progress):
+    """작업 스레드: 요청한 세션 이름으로 캐시를 사용하며 읽기/전처리 실행 (분석 저장소 사용 시 저장소에 적재)"""
+    with use_session(session):
+        store = get_analytical_store()
+        if store is not None:
+            return load_into_store(store, source, kind, progress)
+        return load_prepared(source, kind, progress)
+
+
+def loaded_result(source, kind):
+    """이미 로드된 결과 (캐시된 (DataFrame, 인코딩), 분석 저장소 사용 시 적재된 StoreTable) 또는 None"""
+    store = get_analytical_store()
+    if store is not None:
+        return store.table(kind, source_cache_key(source))
+    return cached_dataframe(source)
+
+
+def start_load(source, kind):
+    """source 읽기와 전처리를 스레드 풀에서 바로 시작하고 DatasetLoad 반환 (kind: 'sales' 또는 'contracts')
+
+    결과는 (DataFrame, 인코딩), 분석 저장소 사용 시 StoreTable
+    재실행 등으로 이미 로드된 파일이면 스레드 풀에 넣지 않고 끝난 Future로 바로 반환 (파생 구조는 같은 캐시 항목에 있음)
+    """
+    load = DatasetLoad(source, kind)
+    try:
+        loaded = loaded_result(source, kind)
+    except Exception as e:
+        # 한도를 넘어 거절한 파일 등: 결과를 기다리는 화면 코드에서 오류 표시
+        load.future = Future()
+        load.future.set_exception(e)
+        return load
+    if loaded is not None:
+        load.future = Future()
+        load.future.set_result(loaded)
+        return load
+    load.future = get_load_executor().submit(_run_load, session_id(), source, kind, load.report)
+    return load
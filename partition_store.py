@@ -0,0 +1,136 @@
+"""연도/월 파티션 저장소 (월별 추출 파일을 파티션 단위로 적재하고, 선택한 연도/월 파티션만 읽음)
+
+사용법:
+    python partition_store.py sales data/2025년_12월_영업실적.xlsx
+    python partition_store.py contracts data/2025년_12월_비용약정.csv
+"""
+import argparse
+import hashlib
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from data_loader import CONTRACTS_CSV_SCHEMA, clean_column_names, normalize_object_columns, read_dataframe
+
+# 저장소 루트 (환경 변수 DASHBOARD_PARTITIONS로 변경 가능)
+PARTITION_ROOT = os.environ.get('DASHBOARD_PARTITIONS', 'data/partitions')
+PARTITION_FILE = 'part.parquet'
+
+# 파티션 종류: sales = 파일1(영업실적), contracts = 파일2(비용약정)
+PARTITION_KINDS = ('sales', 'contracts')
+
+
+def parse_year(values):
+    """'2025년' → '2025' (대시보드 전처리와 같은 규칙)"""
+    return values.astype(str).str.replace('년', '').str.strip()
+
+
+def parse_month(values):
+    """'1월' → 1 (변환할 수 없으면 NaN)"""
+    return pd.to_numeric(values.astype(str).str.replace('월', '').str.strip(), errors='coerce')
+
+
+def partition_path(root, kind, year, month):
+    """연도/월 파티션 파일 경로 (root/kind/year=2025/month=01/part.parquet)"""
+    return os.path.join(root, kind, f"year={year}", f"month={int(month):02d}", PARTITION_FILE)
+
+
+def list_partitions(root, kind):
+    """저장된 파티션 목록 {연도: [월, ...]} (디렉터리 이름만 확인하고 데이터는 읽지 않음)"""
+    base = os.path.join(root, kind)
+    if not os.path.isdir(base):
+        return {}
+
+    partitions = {}
+    for year_dir in os.scandir(base):
+        if not (year_dir.is_dir() and year_dir.name.startswith('year=')):
+            continue
+        months = sorted(
+            int(month_dir.name[len('month='):])
+            for month_dir in os.scandir(year_dir.path)
+            if month_dir.name.startswith('month=') and os.path.exists(os.path.join(month_dir.path, PARTITION_FILE))
+        )
+        if months:
+            partitions[year_dir.name[len('year='):]] = months
+    return dict(sorted(partitions.items()))
+
+
+def write_partitions(df, root, kind):
+    """df를 연도/월로 나눠 해당 파티션만 교체 저장하고 ([(연도, 월, 행 수)], 월 변환 실패 행 수) 반환"""
+    years = parse_year(df['연도'])
+    months = parse_month(df['월'])
+    valid = months.notna()
+
+    written = []
+    for (year, month), part in df[valid].groupby([years[valid], months[valid].astype(int)], sort=True):
+        path = partition_path(root, kind, year, month)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 임시 파일에 쓴 뒤 교체해 읽는 중인 대시보드가 반쯤 쓴 파일을 보지 않도록 함
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        pq.write_table(pa.Table.from_pandas(part, preserve_index=False), tmp_path)
+        os.replace(tmp_path, path)
+        written.append((year, int(month), len(part)))
+    return written, int((~valid).sum())
+
+
+def ingest_file(path, root=PARTITION_ROOT, kind='sales'):
+    """월별 추출 파일(CSV/Excel)을 읽어 포함된 연도/월 파티션만 교체 (파일2 CSV는 스키마 컬럼만)"""
+    df, _ = read_dataframe(path, CONTRACTS_CSV_SCHEMA if kind == 'contracts' else None)
+    df = normalize_object_columns(clean_column_names(df))
+    return write_partitions(df, root, kind)
+
+
+class PartitionSelection:
+    """파티션 저장소에서 선택한 연도/월 (load_dataframe에 파일 대신 전달)"""
+
+    file_kind = 'Parquet 파티션'
+
+    def __init__(self, root, kind, year, months):
+        self.root = root
+        self.kind = kind
+        self.year = year
+        self.months = sorted(int(month) for month in months)
+        self.paths = [
+            path for path in (partition_path(root, kind, year, month) for month in self.months)
+            if os.path.exists(path)
+        ]
+        self.name = f"{os.path.join(root, kind)} ({year}년 {', '.join(map(str, self.months))}월)"
+
+    def cache_key(self):
+        """선택한 파티션 파일들의 경로+수정시각+크기 기준 캐시 키"""
+        signatures = []
+        for path in self.paths:
+            stat = os.stat(path)
+            signatures.append(f"{path}:{stat.st_mtime_ns}:{stat.st_size}")
+        digest = hashlib.blake2b('|'.join(signatures).encode(), digest_size=16).hexdigest()
+        return f"partitions:{os.path.abspath(os.path.join(self.root, self.kind))}:{self.year}:{digest}"
+
+    def load(self, progress=None):
+        """선택한 파티션만 읽어 하나의 (DataFrame, 인코딩 None)으로 반환 (progress(읽은 파티션 수, 전체)는 파티션마다 호출)"""
+        frames = []
+        for path in self.paths:
+            frames.append(pq.read_table(path).to_pandas())
+            if progress is not None:
+                progress(len(frames), len(self.paths))
+        return (pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()), None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="월별 추출 파일을 연도/월 파티션 저장소에 적재 (해당 월 파티션만 교체)")
+    parser.add_argument('kind', choices=PARTITION_KINDS, help="sales: 파일1(영업실적), contracts: 파일2(비용약정)")
+    parser.add_argument('files', nargs='+', help="적재할 CSV/Excel 파일")
+    parser.add_argument('--root', default=PARTITION_ROOT, help=f"저장소 루트 (기본값: {PARTITION_ROOT})")
+    args = parser.parse_args(argv)
+
+    for path in args.files:
+        written, skipped = ingest_file(path, args.root, args.kind)
+        for year, month, rows in written:
+            print(f"{path}: {year}년 {month}월 파티션 {rows:,}행 저장")
+        if skipped:
+            print(f"{path}: 월 변환 실패 {skipped:,}행 제외")
+
+
+if __name__ == '__main__':
+    main()
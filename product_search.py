@@ -0,0 +1,74 @@
+"""제품명 검색 인덱스 (파일당 한 번 생성, 입력마다 전체 목록을 훑지 않도록)"""
+import os
+import unicodedata
+
+from data_loader import present_categories
+from dataset_cache import derive_dataset
+
+# 자모 단위 검색 (환경 변수 DASHBOARD_SEARCH_JAMO=1, 기본값은 꺼짐: 입력한 글자를 그대로 포함하는 제품명만 검색)
+# 켜면 'ㅋ'처럼 초성만 입력해도 검색되지만 '쿠'가 '쿡'에도 일치하는 등 결과가 넓어짐
+PRODUCT_SEARCH_JAMO = os.environ.get('DASHBOARD_SEARCH_JAMO', '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+# 호환용 자모(키보드 입력) 자음 → 초성 자모 (예: 'ㅋ' → 'ᄏ')
+_COMPAT_CHOSEONG = {
+    compat: chr(0x1100 + idx)
+    for idx, compat in enumerate('ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ')
+}
+
+
+def normalize_name(text, jamo=False):
+    """검색용 정규화: 소문자 변환 (jamo=True면 한글을 자모 단위로 분해)"""
+    text = str(text).lower()
+    if jamo:
+        text = unicodedata.normalize('NFD', text)
+        text = ''.join(_COMPAT_CHOSEONG.get(ch, ch) for ch in text)
+    return text
+
+
+def _ngrams(text, n):
+    """text의 길이 n 부분 문자열 집합"""
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class ProductSearchIndex:
+    """제품명 n-gram 역색인 (부분 문자열 검색, 접두어 일치 우선 정렬)"""
+
+    def __init__(self, names, ngram=2, jamo=False):
+        self.names = list(names)
+        self.ngram = ngram
+        self.jamo = jamo
+        self._normalized = [normalize_name(name, jamo) for name in self.names]
+        # 길이 1 ~ ngram 부분 문자열 → 제품 번호 집합 (짧은 검색어도 색인으로 처리)
+        self._postings = {}
+        for idx, text in enumerate(self._normalized):
+            for n in range(1, ngram + 1):
+                for gram in _ngrams(text, n):
+                    self._postings.setdefault(gram, set()).add(idx)
+
+    def search(self, query, limit=None):
+        """query를 포함하는 제품명 목록 (접두어 일치 → 앞쪽 일치 → 이름순)"""
+        query = normalize_name(query, self.jamo)
+        if not query:
+            return []
+
+        grams = _ngrams(query, min(len(query), self.ngram))
+        postings = sorted((self._postings.get(gram, set()) for gram in grams), key=len)
+        candidates = set.intersection(*postings) if postings else set()
+
+        # n-gram 후보 중 실제로 검색어를 포함하는 제품만 남기고 일치 위치로 정렬
+        matches = []
+        for idx in candidates:
+            position = self._normalized[idx].find(query)
+            if position >= 0:
+                matches.append((position, idx))
+        matches.sort()
+        results = [self.names[idx] for _, idx in matches]
+        return results[:limit] if limit is not None else results
+
+
+def get_product_search_index(cache_key, product_names, jamo=PRODUCT_SEARCH_JAMO):
+    """로드된 파일(cache_key)마다 한 번만 제품명(범주형 컬럼) 검색 인덱스를 생성해 모든 세션이 공유"""
+    return derive_dataset(
+        cache_key, 'product_search:jamo' if jamo else 'product_search',
+        lambda: ProductSearchIndex(present_categories(product_names), jamo=jamo)
+    )
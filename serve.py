@@ -0,0 +1,27 @@
+"""대시보드 서버 실행 (기본 파일을 백그라운드에서 미리 로드하면서 Streamlit 서버 시작)
+
+사용법:
+    python serve.py                       # streamlit run app.py 와 같음
+    python serve.py --server.port 8502    # streamlit run 옵션 그대로 전달
+"""
+import logging
+import os
+import sys
+
+from streamlit.web import cli as stcli
+
+from startup import start_prewarm
+
+
+def main():
+    # 기본 파일 경로(data/...)가 앱 폴더 기준이므로 앱 폴더에서 실행
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    # 미리 로드 진행 상황(완료/실패)을 서버 로그로 출력
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    start_prewarm()
+    sys.argv = ['streamlit', 'run', 'app.py', *sys.argv[1:]]
+    sys.exit(stcli.main())
+
+
+if __name__ == '__main__':
+    main()
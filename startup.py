@@ -0,0 +1,63 @@
+"""서버 시작 준비 (무거운 라이브러리 지연 import, 기본 파일과 파생 구조를 백그라운드에서 미리 로드)"""
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+import types
+
+logger = logging.getLogger(__name__)
+
+# 첫 화면에 필요 없는 무거운 모듈 (앱에서는 지연 import, 미리 로드 시에는 바로 import)
+HEAVY_MODULES = ('plotly.express', 'plotly.graph_objects', 'openpyxl')
+
+
+class LazyModule(types.ModuleType):
+    """속성에 처음 접근할 때 실제 모듈을 import하는 대리 모듈"""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self.__name__)
+        return getattr(self._module, attr)
+
+
+def lazy_import(name):
+    """이미 import된 모듈이면 그대로, 아니면 처음 사용할 때 import하는 대리 모듈 반환"""
+    return sys.modules.get(name) or LazyModule(name)
+
+
+def prewarm():
+    """무거운 모듈 import와 기본 파일 미리 로드 (두 파일을 동시에 읽음, 월별 파티션 저장소가 있는 파일과 실패한 파일은 건너뜀)"""
+    from data_loader import DEFAULT_FILE1, DEFAULT_FILE2
+    from parallel_loader import start_load
+    from partition_store import PARTITION_ROOT, list_partitions
+
+    started = time.perf_counter()
+    for name in HEAVY_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+
+    # 로드(읽기 → 전처리 → 큐브/인덱스)는 앱과 같은 스레드 풀과 캐시 키 사용
+    loads = [start_load(path, table) for path, table in [(DEFAULT_FILE1, 'sales'), (DEFAULT_FILE2, 'contracts')]
+             if os.path.exists(path) and not list_partitions(PARTITION_ROOT, table)]
+    for load in loads:
+        try:
+            load.result()
+        except Exception as e:
+            # 앱 실행 시 같은 오류를 화면에 표시하므로 여기서는 알리고 넘어감
+            logger.warning("미리 로드 실패 (%s): %s", load.source, e)
+    logger.info("미리 로드 완료 (%.1f초)", time.perf_counter() - started)
+
+
+def start_prewarm():
+    """prewarm을 백그라운드 스레드로 시작 (서버는 기다리지 않고 바로 시작, 먼저 접속한 세션은 진행 중인 로드를 기다림)"""
+    thread = threading.Thread(target=prewarm, name='dashboard-prewarm', daemon=True)
+    thread.start()
+    return thread
@@ -41,7 +41,7 @@ timeout /t 2 /nobreak >nul
 start http://localhost:8501
 
 REM Streamlit   (   )
-C:\Users\20021396\AppData\Local\Python\pythoncore-3.14-64\python.exe -m streamlit run app.py
+C:\Users\20021396\AppData\Local\Python\pythoncore-3.14-64\python.exe serve.py
 
 REM  Ǹ ޽ ǥ
 echo.
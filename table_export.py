@@ -0,0 +1,102 @@
+"""상세 데이터 테이블 표시/CSV 내보내기 유틸리티"""
+import codecs
+import io
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+from data_loader import EXPORT_CACHE_MAX_MB
+
+# CSV를 한 번에 직렬화하지 않고 나눠 쓰는 행 수
+CSV_CHUNK_ROWS = 50_000
+
+
+def to_display_frame(frame, display_columns):
+    """상세 테이블 표시용 프레임 ('월'을 'N월' 문자열로 변환 후 컬럼 선택)"""
+    return frame.assign(월=frame['월_숫자'].astype(str) + '월')[display_columns]
+
+
+def iter_csv_chunks(df, rows, display_columns, chunk_rows=CSV_CHUNK_ROWS):
+    """행 번호(rows) 순서대로 chunk_rows행씩 CSV 문자열 조각 생성 (첫 조각에만 헤더 포함)"""
+    if len(rows) == 0:
+        yield to_display_frame(df.iloc[rows], display_columns).to_csv(index=False)
+        return
+    for start in range(0, len(rows), chunk_rows):
+        chunk = to_display_frame(df.iloc[rows[start:start + chunk_rows]], display_columns)
+        yield chunk.to_csv(index=False, header=start == 0)
+
+
+class FrameRows:
+    """메모리의 프레임에서 필터링된 행 번호를 정렬 인덱스 순서로 페이지/CSV 조각으로 제공 (상세 테이블, CSV 내보내기)"""
+
+    def __init__(self, df, rows, sort_index, display_columns):
+        self._df = df
+        self._rows = rows
+        self._sort_index = sort_index
+        self.sort_names = sort_index.names
+        self.display_columns = display_columns
+
+    def __len__(self):
+        return len(self._rows)
+
+    def page(self, sort_name, reverse, start, size):
+        """정렬 기준(sort_name) 순서의 start번째부터 size행을 표시용 프레임으로 반환"""
+        ordered_rows = self._sort_index.ordered_rows(self._rows, sort_name, reverse)
+        return to_display_frame(self._df.iloc[ordered_rows[start:start + size]], self.display_columns)
+
+    def csv_chunks(self, sort_name, reverse):
+        """정렬 기준(sort_name) 순서의 전체 행을 CSV 문자열 조각으로 생성 (첫 조각에만 헤더 포함)"""
+        ordered_rows = self._sort_index.ordered_rows(self._rows, sort_name, reverse)
+        return iter_csv_chunks(self._df, ordered_rows, self.display_columns)
+
+
+def build_csv_bytes(chunks):
+    """CSV 문자열 조각을 차례로 utf-8로 인코딩해 이어 붙인 utf-8-sig 바이트 (전체 CSV 문자열은 만들지 않음)"""
+    buffer = io.BytesIO()
+    buffer.write(codecs.BOM_UTF8)
+    for chunk in chunks:
+        buffer.write(chunk.encode('utf-8'))
+    # getvalue는 내부 버퍼를 그대로 넘기므로 결과는 한 벌만 생김
+    return buffer.getvalue()
+
+
+class CsvExportCache:
+    """만든 CSV 바이트를 크기 기준 LRU로 보관 (세션 간 공유, 스레드 안전, 한도보다 큰 파일은 보관하지 않음)"""
+
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, build):
+        """key(데이터셋, 필터 선택, 표, 정렬)의 CSV 바이트 반환 (없으면 build()로 만들어 저장)"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        data = build()
+        if self.max_bytes is not None and len(data) > self.max_bytes:
+            return data
+
+        with self._lock:
+            if key in self._entries:
+                self.total_bytes -= len(self._entries.pop(key))
+            self._entries[key] = data
+            self.total_bytes += len(data)
+            # 가장 오래 내려받지 않은 파일부터 제거
+            while self.max_bytes is not None and self.total_bytes > self.max_bytes:
+                self.total_bytes -= len(self._entries.popitem(last=False)[1])
+        return data
+
+    def __len__(self):
+        return len(self._entries)
+
+
+@st.cache_resource(show_spinner=False)
+def get_export_cache():
+    """프로세스 전체에서 공유하는 CSV 내보내기 캐시 (DASHBOARD_EXPORT_CACHE_MB, 0이면 제한 없음)"""
+    max_bytes = EXPORT_CACHE_MAX_MB * 1024 * 1024 if EXPORT_CACHE_MAX_MB is not None else None
+    return CsvExportCache(max_bytes)
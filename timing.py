@@ -0,0 +1,195 @@
+"""실행 단계별 시간 측정 (재실행마다 로드/정리/필터/섹션/차트/테이블 시간 기록, JSON lines 로그와 사이드바 패널)"""
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# 시간 로그 파일 경로 (환경 변수 DASHBOARD_TIMING_LOG, 기본값은 기록하지 않음)
+# 실행마다 세션 id와 필터 상태를 한 줄씩 추가하고 크기 제한이 없으므로 측정할 때만 설정
+TIMING_LOG_PATH = os.environ.get('DASHBOARD_TIMING_LOG', '').strip()
+
+# 로그에 선택값 목록을 그대로 남기는 최대 개수 (초과하면 개수만 기록)
+LOG_SELECTION_MAX_VALUES = 20
+
+# 세션 밖(서버 시작 시 미리 로드하는 스레드 등)에서 실행될 때의 세션 id
+SERVER_SESSION = 'server'
+
+_SESSION_KEY = '_timing_session_id'
+_TIMER_KEY = '_timing_run'
+_log_lock = threading.Lock()
+_thread_session = threading.local()
+
+
+class RunTimer:
+    """한 번의 실행(전체 재실행 또는 fragment 재실행)의 단계별 경과 시간"""
+
+    def __init__(self, kind='run'):
+        self.kind = kind
+        self.started = time.perf_counter()
+        self.started_at = datetime.now()
+        self.stages = {}
+        self.filters = {}
+        self.finished = False
+
+    def record(self, name, started):
+        """started(perf_counter 값)부터 지금까지의 시간을 name 단계에 더함"""
+        self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - started
+
+    @contextmanager
+    def stage(self, name):
+        """with 블록 실행 시간을 name 단계로 기록 (예외로 끝나도 기록)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, started)
+
+    def call(self, name, func, *args, **kwargs):
+        """func 실행 시간을 name 단계로 기록하고 결과 반환"""
+        with self.stage(name):
+            return func(*args, **kwargs)
+
+    def total(self):
+        """실행 시작부터 지금까지의 시간"""
+        return time.perf_counter() - self.started
+
+    def to_frame(self):
+        """단계별 시간 표 (오래 걸린 순)"""
+        frame = pd.DataFrame({'단계': list(self.stages), '시간(초)': list(self.stages.values())})
+        return frame.sort_values('시간(초)', ascending=False, ignore_index=True)
+
+
+def session_id():
+    """브라우저 세션별 식별자 (로그에서 세션 단위로 묶기 위함, 세션 밖에서는 SERVER_SESSION)"""
+    session = getattr(_thread_session, 'id', None)
+    if session is not None:
+        return session
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return SERVER_SESSION
+    if _SESSION_KEY not in st.session_state:
+        st.session_state[_SESSION_KEY] = uuid.uuid4().hex[:12]
+    return st.session_state[_SESSION_KEY]
+
+
+@contextmanager
+def use_session(session):
+    """with 블록 동안 이 스레드의 session_id()를 session으로 지정 (세션 대신 작업하는 백그라운드 스레드용)"""
+    previous = getattr(_thread_session, 'id', None)
+    _thread_session.id = session
+    try:
+        yield
+    finally:
+        _thread_session.id = previous
+
+
+def start_run(kind='run'):
+    """새 실행의 타이머를 만들어 세션에 저장"""
+    timer = RunTimer(kind)
+    st.session_state[_TIMER_KEY] = timer
+    return timer
+
+
+def current_timer():
+    """진행 중인 실행의 타이머 (전체 실행이 끝난 뒤 fragment만 재실행되면 fragment용 타이머 생성)"""
+    timer = st.session_state.get(_TIMER_KEY)
+    if timer is None or timer.finished:
+        previous = timer
+        timer = start_run('fragment')
+        if previous is not None:
+            timer.filters = previous.filters
+    return timer
+
+
+def summarize_selection(selection):
+    """{컬럼: 선택값 목록} → 로그용 요약 (값이 많으면 개수만)"""
+    summary = {}
+    for col, values in selection.items():
+        values = [value.item() if hasattr(value, 'item') else value for value in values]
+        summary[col] = values if len(values) <= LOG_SELECTION_MAX_VALUES else {'count': len(values)}
+    return summary
+
+
+def write_log(record, path=TIMING_LOG_PATH):
+    """로그 파일에 JSON 한 줄 추가 (실패해도 대시보드 동작에는 영향 없음)"""
+    if not path:
+        return
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    try:
+        with _log_lock:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+    except OSError:
+        pass
+
+
+def finish_run(timer, filters=None, memory=None):
+    """실행을 마치고 세션 id, 필터 상태, 단계별 시간(과 메모리 요약)을 로그에 기록"""
+    if filters is not None:
+        timer.filters = filters
+    timer.finished = True
+    record = {
+        'time': timer.started_at.isoformat(timespec='milliseconds'),
+        'session': session_id(),
+        'kind': timer.kind,
+        'total': round(timer.total(), 6),
+        'stages': {name: round(seconds, 6) for name, seconds in timer.stages.items()},
+        'filters': timer.filters,
+    }
+    if memory is not None:
+        record['memory'] = memory
+    write_log(record)
+
+
+def log_background(name, started, session):
+    """실행 밖(다운로드 버튼을 누른 뒤 만드는 파일 등)에서 started부터 걸린 시간을 kind 'background'로 기록"""
+    write_log({
+        'time': datetime.now().isoformat(timespec='milliseconds'),
+        'session': session,
+        'kind': 'background',
+        'total': round(time.perf_counter() - started, 6),
+        'stages': {name: round(time.perf_counter() - started, 6)},
+    })
+
+
+def timed_section(name):
+    """섹션 함수 실행 시간을 name 단계로 기록 (@st.fragment 안쪽에 적용해 섹션만 재실행될 때도 기록)"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            timer = current_timer()
+            try:
+                return timer.call(name, func, *args, **kwargs)
+            finally:
+                # fragment 재실행은 전체 실행의 마지막 기록이 없으므로 여기서 따로 기록
+                if timer.kind == 'fragment':
+                    finish_run(timer)
+        return wrapper
+    return decorator
+
+
+def timing_panel_enabled():
+    """시간 패널 표시 여부: URL 쿼리 ?timing=1 또는 환경 변수 DASHBOARD_TIMING=1"""
+    flag = st.query_params.get('timing') or os.environ.get('DASHBOARD_TIMING', '')
+    return str(flag).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def render_timing_panel(timer):
+    """사이드바에 이번 실행의 단계별 시간 표 표시"""
+    with st.sidebar.expander(f"⏱️ 실행 시간 ({timer.total():.2f}초)", expanded=False):
+        st.dataframe(timer.to_frame().style.format({'시간(초)': '{:.3f}'}),
+                     use_container_width=True, hide_index=True)
+        if TIMING_LOG_PATH:
+            st.caption(f"세션 {session_id()} | 섹션만 다시 실행된 경우는 로그에만 기록됩니다")
+        else:
+            st.caption(f"세션 {session_id()} | DASHBOARD_TIMING_LOG를 설정하면 실행마다 로그 파일에 기록합니다")